@@ -0,0 +1,235 @@
+"""Run the full pipeline against local SEC and Drive stand-ins and report throughput.
+
+Each scenario starts fresh fake servers, writes a synthetic ticker CSV and runs
+``sec_api_automation.main`` in a child process, so peak RSS is per run. Extra
+arguments after ``--`` are passed to the CLI unchanged:
+
+    python benchmarks/bench_end_to_end.py --tickers 10 100 1000
+    python benchmarks/bench_end_to_end.py --tickers 100 --latency-ms 40 --rate-429 0.01 -- --pipeline
+    python benchmarks/bench_end_to_end.py --fixtures benchmarks/fixtures/*.htm --json bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from functools import wraps
+from pathlib import Path
+
+from fake_servers import FakeDriveServer, FakeSecServer, ticker_for
+
+
+STAGES = (
+    "resolve_company",
+    "plan_backfill",
+    "download_documents",
+    "convert_documents",
+    "upload_documents",
+    "upload_backfill_documents",
+)
+STAGE_MODULES = ("sec_api_automation.main", "sec_api_automation.pipeline", "sec_api_automation.async_runner")
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def run_child(stats_path: Path, cli_args: list[str]) -> None:
+    import importlib
+
+    timings: dict[str, list[float]] = {stage: [] for stage in STAGES}
+    lock = threading.Lock()
+
+    def timed(stage: str, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with lock:
+                    timings[stage].append(time.perf_counter() - started)
+
+        return wrapper
+
+    # The stage functions are imported by name into each runner module, so each
+    # module's reference is wrapped separately.
+    for module_name in STAGE_MODULES:
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError:
+            continue
+        for stage in STAGES:
+            if hasattr(module, stage):
+                setattr(module, stage, timed(stage, getattr(module, stage)))
+
+    from sec_api_automation.main import main
+
+    sys.argv = ["sec-api-automation", *cli_args]
+    main()
+    stats_path.write_text(
+        json.dumps(
+            {
+                "stages": timings,
+                "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            }
+        ),
+        encoding="utf-8",
+    )
+
+
+def write_inputs(work: Path, tickers: int) -> dict[str, str]:
+    with (work / "tickers.csv").open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["ticker", "company_name"])
+        writer.writerows([ticker_for(index), ""] for index in range(tickers))
+    (work / "client_secrets.json").write_text("{}", encoding="utf-8")
+    # A valid, non-expiring token means the OAuth flow never leaves the machine.
+    token = {
+        "token": "bench-token",
+        "refresh_token": "bench-refresh",
+        "client_id": "bench",
+        "client_secret": "bench",
+        "token_uri": "http://127.0.0.1:9/token",
+        "expiry": "2999-01-01T00:00:00Z",
+    }
+    (work / "token.json").write_text(json.dumps(token), encoding="utf-8")
+    return {
+        "GOOGLE_DRIVE_AUTH_MODE": "oauth",
+        "GOOGLE_OAUTH_CLIENT_SECRETS": str(work / "client_secrets.json"),
+        "GOOGLE_OAUTH_TOKEN_PATH": str(work / "token.json"),
+        "GOOGLE_DRIVE_PARENT_FOLDER_ID": "bench-root",
+    }
+
+
+def run_scenario(args: argparse.Namespace, tickers: int, cli_extra: list[str]) -> dict:
+    fixtures = [Path(path) for path in args.fixtures or []]
+    sec_server = FakeSecServer(
+        tickers,
+        latency_ms=args.latency_ms,
+        rate_429=args.rate_429,
+        document_kb=args.document_kb,
+        fixtures=fixtures,
+        history_years=args.history_years,
+    )
+    drive_server = FakeDriveServer(latency_ms=args.drive_latency_ms)
+    with sec_server, drive_server, tempfile.TemporaryDirectory(prefix="sec-bench-") as tmp:
+        work = Path(tmp)
+        env = {
+            **os.environ,
+            **write_inputs(work, tickers),
+            "SEC_USER_AGENT": "Benchmark bench@example.com",
+            "SEC_BASE_URL": sec_server.url,
+            "SEC_DATA_BASE_URL": sec_server.url,
+            "SEC_MIN_REQUEST_INTERVAL_SECONDS": str(args.sec_interval),
+            "SEC_MAX_REQUESTS_PER_SECOND": str(args.sec_max_rps),
+            "GOOGLE_DRIVE_API_ENDPOINT": drive_server.url,
+        }
+        output_dir = work / "output"
+        cli_args = ["--tickers-csv", str(work / "tickers.csv"), "--output-dir", str(output_dir), *cli_extra]
+        stats_path = work / "stats.json"
+        log_path = work / "run.log"
+        started = time.perf_counter()
+        with log_path.open("w", encoding="utf-8") as log:
+            completed = subprocess.run(
+                [sys.executable, __file__, "--child", str(stats_path), "--", *cli_args],
+                env=env,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+        seconds = time.perf_counter() - started
+        if completed.returncode != 0:
+            tail = log_path.read_text(encoding="utf-8").splitlines()[-20:]
+            raise SystemExit(f"Run with {tickers} tickers failed:\n" + "\n".join(tail))
+
+        with (output_dir / "results.csv").open(newline="", encoding="utf-8") as handle:
+            rows = list(csv.DictReader(handle))
+        stats = json.loads(stats_path.read_text(encoding="utf-8"))
+        return {
+            "tickers": tickers,
+            "companies": len(rows),
+            "companies_with_folder": sum(1 for row in rows if row.get("drive_folder_link")),
+            "seconds": seconds,
+            "companies_per_minute": len(rows) / seconds * 60 if seconds else 0.0,
+            "peak_rss_mb": stats["peak_rss_mb"],
+            "stage_latency_ms": {
+                stage: {
+                    f"p{pct}": percentile(values, pct) * 1000
+                    for pct in (50, 95, 99)
+                }
+                for stage, values in stats["stages"].items()
+                if values
+            },
+            "sec_requests": dict(sec_server.requests),
+            "sec_bytes": sec_server.bytes_sent,
+            "drive_requests": dict(drive_server.requests),
+            "drive_uploaded_bytes": drive_server.uploaded_bytes,
+        }
+
+
+def print_report(result: dict) -> None:
+    print(
+        f"\n{result['tickers']} tickers: {result['companies']} companies in {result['seconds']:.1f}s"
+        f" ({result['companies_per_minute']:.1f}/min), peak RSS {result['peak_rss_mb']:.0f} MB"
+    )
+    print(f"  {'stage':20} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage, latency in result["stage_latency_ms"].items():
+        print(f"  {stage:20} {latency['p50']:9.1f} {latency['p95']:9.1f} {latency['p99']:9.1f}")
+    sec_total = sum(result["sec_requests"].values())
+    drive_total = sum(result["drive_requests"].values())
+    print(f"  SEC requests   {sec_total:6d}  {json.dumps(result['sec_requests'], sort_keys=True)}")
+    print(f"  Drive requests {drive_total:6d}  {json.dumps(result['drive_requests'], sort_keys=True)}")
+
+
+def main() -> None:
+    if len(sys.argv) > 2 and sys.argv[1] == "--child":
+        separator = sys.argv.index("--")
+        run_child(Path(sys.argv[2]), sys.argv[separator + 1 :])
+        return
+
+    argv = sys.argv[1:]
+    cli_extra: list[str] = []
+    if "--" in argv:
+        separator = argv.index("--")
+        argv, cli_extra = argv[:separator], argv[separator + 1 :]
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickers", type=int, nargs="+", default=[10, 100], help="Scenario sizes")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Added latency per SEC response")
+    parser.add_argument("--drive-latency-ms", type=float, default=20.0, help="Added latency per Drive response")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of SEC requests answered with 429")
+    parser.add_argument("--document-kb", type=int, default=256, help="Size of the synthetic 10-K (10-Q is half)")
+    parser.add_argument("--sec-interval", type=float, default=0.0, help="SEC_MIN_REQUEST_INTERVAL_SECONDS for the run")
+    parser.add_argument("--sec-max-rps", type=float, default=1000.0, help="SEC_MAX_REQUESTS_PER_SECOND for the run")
+    parser.add_argument(
+        "--history-years",
+        type=int,
+        default=0,
+        help="Serve this many older years of filings in a paged submissions file (for --since runs)",
+    )
+    parser.add_argument("--fixtures", nargs="*", help="Recorded .htm filings served as 10-K/10-Q bodies")
+    parser.add_argument("--json", type=Path, help="Also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    results = []
+    for tickers in args.tickers:
+        result = run_scenario(args, tickers, cli_extra)
+        print_report(result)
+        results.append(result)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
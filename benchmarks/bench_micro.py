@@ -0,0 +1,93 @@
+"""Micro-benchmarks for the hot helpers: HTML to text, text PDF writing and filing selection.
+
+    python benchmarks/bench_micro.py
+    python benchmarks/bench_micro.py --document-kb 2048 --repeat 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from fake_servers import synthetic_html
+
+from sec_api_automation.document_builder import _html_to_text, _write_text_pdf
+from sec_api_automation.filing_table import FilingTable
+from sec_api_automation.sec_client import list_filings
+
+
+FORMS = ["8-K", "10-Q", "10-K", "4", "3", "SC 13G", "8-K/A", "S-8", "DEF 14A"]
+
+
+def measure(func: Callable[[], object], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def synthetic_submissions(rows: int, seed: int = 7) -> dict:
+    rng = random.Random(seed)
+    dates = sorted(
+        (f"20{rng.randint(5, 24):02d}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" for _ in range(rows)),
+        reverse=True,
+    )
+    return {
+        "filings": {
+            "recent": {
+                "form": [rng.choice(FORMS) for _ in range(rows)],
+                "filingDate": dates,
+                "accessionNumber": [f"0000000001-{index:010d}" for index in range(rows)],
+                "primaryDocument": ["doc.htm"] * rows,
+                "items": [""] * rows,
+            }
+        }
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--document-kb", type=int, default=1024, help="Size of the synthetic HTML filing")
+    parser.add_argument("--filings", type=int, default=1000, help="Rows in the synthetic submissions payload")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    args = parser.parse_args()
+
+    html = synthetic_html("Annual Report", args.document_kb * 1024)
+    text = _html_to_text(html)
+    submissions = synthetic_submissions(args.filings)
+    forms = {"10-K", "10-Q", "8-K", "8-K/A"}
+
+    def select_with_list() -> None:
+        filings = list_filings(submissions, forms)
+        next((f for f in filings if f.form == "10-K"), None)
+        next((f for f in filings if f.form == "10-Q"), None)
+        [f for f in filings if f.form in {"8-K", "8-K/A"}]
+
+    def select_with_table() -> None:
+        table = FilingTable.from_submissions(submissions)
+        table.latest("10-K")
+        table.latest("10-Q")
+        table.filings({"8-K", "8-K/A"})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pdf_path = Path(tmp) / "out.pdf"
+        cases: list[tuple[str, Callable[[], object], str]] = [
+            ("_html_to_text", lambda: _html_to_text(html), f"{len(html) / 1e6:.1f} MB HTML"),
+            ("_write_text_pdf", lambda: _write_text_pdf(text, pdf_path), f"{len(text.splitlines())} lines"),
+            ("list_filings", select_with_list, f"{args.filings} rows"),
+            ("FilingTable", select_with_table, f"{args.filings} rows"),
+        ]
+        print(f"{'benchmark':18} {'input':>16} {'median ms':>10}")
+        for name, func, label in cases:
+            print(f"{name:18} {label:>16} {measure(func, args.repeat) * 1000:10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Compare the per-line drawString PDF writer with the text-object renderer.
+
+    python benchmarks/bench_pdf_render.py
+    python benchmarks/bench_pdf_render.py --document-kb 8192 --repeat 3
+    python benchmarks/bench_pdf_render.py path/to/10k.htm
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+from fake_servers import synthetic_html
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+from sec_api_automation.document_builder import _html_to_text
+from sec_api_automation.pdf_renderer import RenderOptions, render_text_pdf
+
+
+# The writer used before pdf_renderer: one drawString text object per
+# 110-character chunk.
+def draw_string_pdf(lines: Iterable[str], output_path: Path) -> int:
+    pdf = canvas.Canvas(str(output_path), pagesize=letter, invariant=True)
+    width, height = letter
+    y = height - 40
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line:
+            continue
+        for chunk in [line[i : i + 110] for i in range(0, len(line), 110)]:
+            pdf.drawString(40, y, chunk)
+            y -= 14
+            if y < 40:
+                pdf.showPage()
+                y = height - 40
+    pages = pdf.getPageNumber()
+    pdf.save()
+    return pages
+
+
+def measure(func: Callable[[], int], repeat: int) -> tuple[float, int]:
+    timings = []
+    pages = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        pages = func()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), pages
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("documents", nargs="*", type=Path, help="Saved HTML filings (synthetic if omitted)")
+    parser.add_argument("--document-kb", type=int, default=2048, help="Size of the synthetic HTML filing")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per writer")
+    args = parser.parse_args()
+
+    if args.documents:
+        text = "\n".join(_html_to_text(path.read_text(errors="replace")) for path in args.documents)
+    else:
+        text = _html_to_text(synthetic_html("Annual Report", args.document_kb * 1024))
+    lines = text.splitlines()
+    text_mb = len(text.encode()) / 1_000_000
+
+    writers: dict[str, Callable[[Path], int]] = {
+        "drawString (old)": lambda path: draw_string_pdf(lines, path),
+        "text object": lambda path: render_text_pdf(lines, path),
+        "text object, no compression": lambda path: render_text_pdf(
+            lines, path, RenderOptions(compress=False)
+        ),
+    }
+    print(f"{text_mb:.1f} MB of text, {len(lines)} lines")
+    print(f"{'writer':<30} {'seconds':>8} {'MB/s':>7} {'pages':>6} {'PDF KB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, writer in writers.items():
+            pdf_path = Path(tmp) / "out.pdf"
+            seconds, pages = measure(lambda: writer(pdf_path), args.repeat)
+            size_kb = pdf_path.stat().st_size / 1024
+            print(f"{name:<30} {seconds:>8.3f} {text_mb / seconds:>7.2f} {pages:>6} {size_kb:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare the streaming and BeautifulSoup HTML text extractors on saved filings.
+
+Save a few real 10-K/10-Q primary documents (the ``.htm`` files linked from a
+filing index) into ``benchmarks/fixtures/``, or let ``--fetch`` download them:
+
+    python benchmarks/bench_text_extraction.py --fetch <archive-url> [<archive-url> ...]
+    python benchmarks/bench_text_extraction.py benchmarks/fixtures/*.htm --repeat 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import time
+import tracemalloc
+from pathlib import Path
+
+from sec_api_automation.sec_client import SecClient
+from sec_api_automation.text_extraction import EXTRACTORS
+
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+def fetch_fixtures(urls: list[str]) -> None:
+    user_agent = os.getenv("SEC_USER_AGENT", "")
+    if not user_agent:
+        raise SystemExit("SEC_USER_AGENT is required to fetch fixtures")
+    sec = SecClient(user_agent=user_agent)
+    for url in urls:
+        target = FIXTURES_DIR / url.rstrip("/").rsplit("/", 1)[-1]
+        sec.download_to_file(url, target)
+        print(f"saved {target} ({target.stat().st_size / 1e6:.1f} MB)")
+
+
+def run_extractor(name: str, path: Path) -> int:
+    with path.open("rb") as handle:
+        return sum(1 for _ in EXTRACTORS[name](handle))
+
+
+def measure(name: str, path: Path, repeat: int) -> tuple[float, int, float]:
+    timings = []
+    lines = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        lines = run_extractor(name, path)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    run_extractor(name, path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), lines, peak / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="*", help="HTML fixtures (default: benchmarks/fixtures/*.htm)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per extractor and file")
+    parser.add_argument("--fetch", nargs="+", metavar="URL", help="Download SEC archive documents as fixtures")
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetch_fixtures(args.fetch)
+    paths = [Path(p) for p in args.paths] or sorted(FIXTURES_DIR.glob("*.htm*"))
+    if not paths:
+        raise SystemExit(f"No fixtures found; pass paths or add .htm files to {FIXTURES_DIR}")
+
+    print(f"{'file':40} {'MB':>6} {'extractor':>9} {'seconds':>8} {'MB/s':>6} {'lines':>7} {'peak MB':>8}")
+    for path in paths:
+        size_mb = path.stat().st_size / 1e6
+        for name in EXTRACTORS:
+            seconds, lines, peak_mb = measure(name, path, args.repeat)
+            print(
+                f"{path.name[:40]:40} {size_mb:6.1f} {name:>9} {seconds:8.2f}"
+                f" {size_mb / seconds:6.1f} {lines:7d} {peak_mb:8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""Local stand-ins for sec.gov/data.sec.gov and the Drive v3 API used by the benchmarks.
+
+Both servers run on a background thread, count the requests they serve, and
+answer with synthetic (or recorded) data so a full run needs no network access.
+"""
+
+from __future__ import annotations
+
+import email
+import email.policy
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+FILLER = (
+    "The Company's revenue increased compared with the prior year period, driven by higher volumes "
+    "and pricing. Operating expenses reflected continued investment in research and development. "
+)
+PDF_BODY = b"%PDF-1.4\n1 0 obj << /Type /Catalog >> endobj\n" + b"0" * 2048 + b"\n%%EOF\n"
+
+
+def ticker_for(index: int) -> str:
+    return f"T{index:05d}"
+
+
+def cik_for(index: int) -> str:
+    return str(index + 1).zfill(10)
+
+
+def synthetic_html(title: str, size_bytes: int) -> bytes:
+    paragraphs = []
+    total = 0
+    for number in itertools.count():
+        paragraph = f"<p>{number}. {FILLER}</p>\n"
+        paragraphs.append(paragraph)
+        total += len(paragraph)
+        if total >= size_bytes:
+            break
+    return (
+        f"<html><head><title>{title}</title><style>p {{ margin: 0 }}</style></head><body>"
+        f"<h1>{title}</h1>{''.join(paragraphs)}</body></html>"
+    ).encode()
+
+
+class _Server:
+    def __init__(self, latency_ms: float = 0.0) -> None:
+        self.latency_seconds = latency_ms / 1000
+        self.requests: Counter[str] = Counter()
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "_Server":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.requests.clear()
+            self.bytes_sent = 0
+
+    def _count(self, endpoint: str, size: int) -> None:
+        with self._lock:
+            self.requests[endpoint] += 1
+            self.bytes_sent += size
+
+    def respond(
+        self,
+        method: str,
+        path: str,
+        headers: dict[str, str],
+        body: bytes,
+    ) -> tuple[int, dict[str, str], bytes]:
+        raise NotImplementedError
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _serve(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                if server.latency_seconds:
+                    time.sleep(server.latency_seconds)
+                status, headers, payload = server.respond(
+                    self.command, self.path, {k.lower(): v for k, v in self.headers.items()}, body
+                )
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PUT = do_PATCH = _serve
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        return Handler
+
+
+class FakeSecServer(_Server):
+    def __init__(
+        self,
+        companies: int,
+        latency_ms: float = 0.0,
+        rate_429: float = 0.0,
+        document_kb: int = 256,
+        fixtures: list[Path] | None = None,
+        seed: int = 7,
+        history_years: int = 0,
+    ) -> None:
+        super().__init__(latency_ms)
+        self.companies = companies
+        self.history_years = history_years
+        self.rate_429 = rate_429
+        self._random = random.Random(seed)
+        self._fixtures = [path.read_bytes() for path in fixtures or []]
+        self._annual = synthetic_html("Annual Report", document_kb * 1024)
+        self._quarterly = synthetic_html("Quarterly Report", document_kb * 512)
+        self._press_release = synthetic_html("Press Release: Company Reports Fourth Quarter Results", 16 * 1024)
+
+    def _document(self, cik: int, name: str) -> bytes:
+        if name in {"k.htm", "q.htm"} and self._fixtures:
+            return self._fixtures[(cik + (name == "q.htm")) % len(self._fixtures)]
+        if name == "k.htm":
+            return self._annual
+        if name == "q.htm":
+            return self._quarterly
+        if name == "ex99-1.htm":
+            return self._press_release
+        if name == "ex99-2.pdf":
+            return PDF_BODY
+        return synthetic_html("Current Report", 4 * 1024)
+
+    @staticmethod
+    def _columns(cik: int, filings: list[tuple[str, str, int, str, str]]) -> dict:
+        return {
+            "form": [f[0] for f in filings],
+            "filingDate": [f[1] for f in filings],
+            "accessionNumber": [f"{cik:010d}-{f[1][2:4]}-{f[2]:06d}" for f in filings],
+            "primaryDocument": [f[3] for f in filings],
+            "items": [f[4] for f in filings],
+        }
+
+    def _history(self) -> list[tuple[str, str, int, str, str]]:
+        # A year of a quarterly filer per year of history: one 10-K, three 10-Qs,
+        # four earnings 8-Ks (sequence numbers ending in 4) and one other 8-K.
+        filings = []
+        for offset in range(1, self.history_years + 1):
+            year, base = 2024 - offset, offset * 100
+            filings += [
+                ("10-Q", f"{year}-11-01", base + 25, "q.htm", ""),
+                ("8-K", f"{year}-10-25", base + 34, "e8k.htm", "2.02,9.01"),
+                ("10-Q", f"{year}-08-01", base + 15, "q.htm", ""),
+                ("8-K", f"{year}-07-25", base + 24, "e8k.htm", "2.02,9.01"),
+                ("10-Q", f"{year}-05-01", base + 5, "q.htm", ""),
+                ("8-K", f"{year}-04-25", base + 14, "e8k.htm", "2.02,9.01"),
+                ("8-K", f"{year}-03-10", base + 3, "f8k.htm", "8.01"),
+                ("10-K", f"{year}-02-15", base + 2, "k.htm", ""),
+                ("8-K", f"{year}-01-25", base + 4, "e8k.htm", "2.02,9.01"),
+            ]
+        return filings
+
+    def _submissions(self, cik: int) -> dict:
+        filings = [
+            ("8-K", "2024-05-20", 6, "a8k.htm", "5.02"),
+            ("10-Q", "2024-05-01", 5, "q.htm", ""),
+            ("8-K", "2024-04-25", 4, "e8k.htm", "2.02,9.01"),
+            ("8-K", "2024-03-10", 3, "f8k.htm", "8.01"),
+            ("10-K", "2024-02-15", 2, "k.htm", ""),
+            ("4", "2024-02-01", 1, "form4.xml", ""),
+        ]
+        # Older years are served as a paged file, as EDGAR does for long-lived filers.
+        pages = [{"name": f"CIK{cik:010d}-submissions-001.json"}] if self.history_years else []
+        return {
+            "cik": str(cik),
+            "name": f"Company {cik}",
+            "filings": {"recent": self._columns(cik, filings), "files": pages},
+        }
+
+    def _index(self, accession_nodash: str) -> dict:
+        earnings = accession_nodash.endswith("4")
+        items = [{"name": "e8k.htm" if earnings else "a8k.htm", "size": "4096"}]
+        if earnings:
+            items += [
+                {"name": "ex99-1.htm", "size": str(len(self._press_release))},
+                {"name": "ex99-2.pdf", "size": str(len(PDF_BODY))},
+            ]
+        return {"directory": {"item": items}}
+
+    def _route(self, path: str) -> tuple[str, bytes] | None:
+        if path == "/files/company_tickers_exchange.json":
+            data = [[int(cik_for(i)), f"Company {i + 1}", ticker_for(i), "Nasdaq"] for i in range(self.companies)]
+            return "company_tickers", json.dumps({"fields": ["cik", "name", "ticker", "exchange"], "data": data}).encode()
+        if path == "/files/company_tickers.json":
+            payload = {
+                str(i): {"cik_str": int(cik_for(i)), "ticker": ticker_for(i), "title": f"Company {i + 1}"}
+                for i in range(self.companies)
+            }
+            return "company_tickers", json.dumps(payload).encode()
+        match = re.fullmatch(r"/submissions/CIK(\d{10})\.json", path)
+        if match:
+            return "submissions", json.dumps(self._submissions(int(match.group(1)))).encode()
+        match = re.fullmatch(r"/submissions/CIK(\d{10})-submissions-001\.json", path)
+        if match and self.history_years:
+            page = self._columns(int(match.group(1)), self._history())
+            return "submissions_page", json.dumps(page).encode()
+        match = re.fullmatch(r"/Archives/edgar/data/(\d+)/(\d+)/(.+)", path)
+        if match:
+            cik, accession, name = int(match.group(1)), match.group(2), match.group(3)
+            if name == "index.json":
+                return "archive_index", json.dumps(self._index(accession)).encode()
+            return "archive_document", self._document(cik, name)
+        return None
+
+    def respond(self, method, path, headers, body):
+        with self._lock:
+            throttled = self._random.random() < self.rate_429
+        if throttled:
+            self._count("429", 0)
+            return 429, {"Retry-After": "1"}, b""
+        routed = self._route(urlsplit(path).path)
+        if routed is None:
+            self._count("404", 0)
+            return 404, {}, b""
+        endpoint, payload = routed
+        match = re.fullmatch(r"bytes=(\d+)-(\d*)", headers.get("range", ""))
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else len(payload) - 1
+            payload = payload[start : end + 1]
+            self._count(f"{endpoint}_range", len(payload))
+            return 206, {"Content-Type": "application/octet-stream"}, payload
+        self._count(endpoint, len(payload))
+        return 200, {"Content-Type": "application/octet-stream"}, payload
+
+
+class FakeDriveServer(_Server):
+    def __init__(self, latency_ms: float = 0.0) -> None:
+        super().__init__(latency_ms)
+        self.files: dict[str, dict] = {}
+        self.uploaded_bytes = 0
+        self._ids = itertools.count(1)
+        self._session_ids = itertools.count(1)
+        self._sessions: dict[str, tuple[str, str | None, dict]] = {}
+
+    def _new_file(self, metadata: dict, content: bytes | None) -> dict:
+        with self._lock:
+            file_id = f"file{next(self._ids)}"
+        record = {
+            "id": file_id,
+            "name": metadata.get("name", ""),
+            "mimeType": metadata.get("mimeType", "application/pdf"),
+            "parents": metadata.get("parents", []),
+            "webViewLink": f"https://drive.example/{file_id}",
+        }
+        self._store_content(record, content)
+        self.files[file_id] = record
+        return record
+
+    def _store_content(self, record: dict, content: bytes | None) -> None:
+        if content is not None:
+            record["md5Checksum"] = hashlib.md5(content).hexdigest()
+            with self._lock:
+                self.uploaded_bytes += len(content)
+
+    def _list(self, query: str) -> dict:
+        name = re.search(r"name = '((?:[^'\\]|\\.)*)'", query)
+        parent = re.search(r"'([^']+)' in parents", query)
+        matches = [
+            record
+            for record in self.files.values()
+            if (name is None or record["name"] == name.group(1).replace("\\'", "'"))
+            and (parent is None or parent.group(1) in record["parents"])
+            and ("mimeType =" not in query or record["mimeType"] == "application/vnd.google-apps.folder")
+        ]
+        return {"files": matches}
+
+    @staticmethod
+    def _split_multipart(content_type: str, body: bytes) -> list[email.message.Message]:
+        message = email.message_from_bytes(
+            f"Content-Type: {content_type}\r\n\r\n".encode() + body,
+            policy=email.policy.HTTP,
+        )
+        return list(message.iter_parts())
+
+    def _upload(self, method: str, file_id: str | None, query: dict, headers: dict, body: bytes):
+        upload_type = query.get("uploadType", [""])[0]
+        if upload_type == "resumable" and "upload_id" not in query:
+            metadata = json.loads(body or b"{}")
+            session = f"s{next(self._session_ids)}"
+            self._sessions[session] = (method, file_id, metadata)
+            location = f"{self.url}/upload/drive/v3/files?uploadType=resumable&upload_id={session}"
+            return "upload_session", 200, {"Location": location}, b""
+        if upload_type == "resumable":
+            method, file_id, metadata = self._sessions.pop(query["upload_id"][0])
+            content = body
+        else:
+            parts = self._split_multipart(headers.get("content-type", ""), body)
+            metadata = json.loads(parts[0].get_content())
+            content = parts[1].get_payload(decode=True)
+        if file_id is None:
+            return "upload", 200, {"Content-Type": "application/json"}, json.dumps(self._new_file(metadata, content)).encode()
+        record = self.files.get(file_id)
+        if record is None:
+            return "update", 404, {"Content-Type": "application/json"}, b'{"error": {"code": 404}}'
+        record.update({key: value for key, value in metadata.items() if key == "name"})
+        self._store_content(record, content)
+        return "update", 200, {"Content-Type": "application/json"}, json.dumps(record).encode()
+
+    def _dispatch(self, method: str, path: str, headers: dict, body: bytes):
+        parts = urlsplit(path)
+        query = parse_qs(parts.query)
+        route = parts.path
+        if route == "/drive/v3/files" and method == "POST":
+            record = self._new_file(json.loads(body or b"{}"), None)
+            return "folder_create", 200, {"Content-Type": "application/json"}, json.dumps(record).encode()
+        if route == "/drive/v3/files" and method == "GET":
+            payload = self._list(query.get("q", [""])[0])
+            return "list", 200, {"Content-Type": "application/json"}, json.dumps(payload).encode()
+        if re.fullmatch(r"/drive/v3/files/[^/]+/permissions", route):
+            return "permission", 200, {"Content-Type": "application/json"}, b'{"id": "anyoneWithLink"}'
+        if route == "/upload/drive/v3/files":
+            return self._upload(method, None, query, headers, body)
+        match = re.fullmatch(r"/upload/drive/v3/files/([^/]+)", route)
+        if match:
+            return self._upload(method, match.group(1), query, headers, body)
+        return "unknown", 404, {}, b"{}"
+
+    def _batch(self, headers: dict, body: bytes) -> tuple[int, dict[str, str], bytes]:
+        boundary = "batch_response_boundary"
+        chunks = []
+        for part in self._split_multipart(headers.get("content-type", ""), body):
+            raw = part.get_payload(decode=True).replace(b"\r\n", b"\n")
+            head, _, inner_body = raw.partition(b"\n\n")
+            request_line, *header_lines = head.decode().split("\n")
+            method, path, _ = request_line.split(" ", 2)
+            inner_headers = {
+                name.strip().lower(): value.strip()
+                for name, _, value in (line.partition(":") for line in header_lines)
+            }
+            endpoint, status, _, payload = self._dispatch(method, path, inner_headers, inner_body)
+            self._count(f"batch_{endpoint}", len(payload))
+            content_id = part.get("Content-ID", "").strip("<>")
+            chunks.append(
+                f"--{boundary}\r\nContent-Type: application/http\r\nContent-ID: <response-{content_id}>\r\n\r\n"
+                f"HTTP/1.1 {status} OK\r\nContent-Type: application/json\r\n\r\n".encode()
+                + payload
+                + b"\r\n"
+            )
+        chunks.append(f"--{boundary}--\r\n".encode())
+        return 200, {"Content-Type": f"multipart/mixed; boundary={boundary}"}, b"".join(chunks)
+
+    def respond(self, method, path, headers, body):
+        if urlsplit(path).path == "/batch/drive/v3":
+            self._count("batch", len(body))
+            return self._batch(headers, body)
+        endpoint, status, response_headers, payload = self._dispatch(method, path, headers, body)
+        self._count(endpoint, len(payload))
+        return status, response_headers, payload
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping
+
+import httpx
+
+from .async_sec_client import AsyncSecClient
+from .bulk_submissions import SubmissionsArchive
+from .document_builder import raw_download_path
+from .drive_client import DriveClient
+from .filing_selector import (
+    PROBE_BYTES,
+    EarningsExhibits,
+    ExhibitProbe,
+    candidate_batches,
+    exhibits_to_probe,
+    extract_ex99_filenames,
+    extract_exhibit_sizes,
+    probe_from_head,
+    rank_earnings_candidates,
+    select_earnings_exhibits,
+)
+from .metrics import METRICS
+from .rate_control import RateController
+from .reporting import CompanyResult
+from .sec_client import DocumentTooLargeError, FilingMeta
+from .stages import (
+    CompanyJob,
+    DocumentTask,
+    StageOptions,
+    apply_previous_state,
+    convert_documents,
+    failed_result,
+    note_download,
+    plan_documents,
+    reuse_earnings_documents,
+    reuse_stored_download,
+    select_filings,
+    upload_documents,
+)
+
+
+async def identify_latest_earnings_8k_async(
+    sec: AsyncSecClient,
+    cik: str,
+    eight_ks: list[FilingMeta],
+) -> EarningsExhibits | None:
+    for batch in candidate_batches(rank_earnings_candidates(eight_ks)):
+        indexes = await asyncio.gather(
+            *(sec.get_filing_index(cik=cik, accession=filing.accession) for filing in batch)
+        )
+        for filing, index_json in zip(batch, indexes):
+            if extract_ex99_filenames(index_json):
+                probes = await probe_exhibits_async(sec, cik, filing, index_json)
+                return select_earnings_exhibits(filing, index_json, probes)
+    return None
+
+
+async def probe_exhibits_async(
+    sec: AsyncSecClient,
+    cik: str,
+    filing: FilingMeta,
+    index_json: dict[str, Any],
+) -> dict[str, ExhibitProbe]:
+    sizes = extract_exhibit_sizes(index_json)
+    names = exhibits_to_probe(index_json)
+    heads = await asyncio.gather(
+        *(sec.get_head(sec.sec_archive_url(cik, filing.accession, name), PROBE_BYTES) for name in names),
+        return_exceptions=True,
+    )
+    probes: dict[str, ExhibitProbe] = {}
+    for name, head in zip(names, heads):
+        if isinstance(head, httpx.HTTPError):
+            logging.warning("Could not probe %s for cik=%s: %s", name, cik, head)
+            continue
+        if isinstance(head, BaseException):
+            raise head
+        probes[name] = probe_from_head(head, sizes.get(name, 0))
+    return probes
+
+
+@METRICS.timed("stage_seconds", stage="resolve")
+async def resolve_company_async(
+    sec: AsyncSecClient,
+    job: CompanyJob,
+    output_dir: Path,
+    ticker_to_cik: Mapping[str, str],
+    options: StageOptions = StageOptions(),
+) -> None:
+    ticker = job.ticker.upper()
+    cik = ticker_to_cik.get(ticker)
+    if not cik:
+        logging.warning("No CIK found for ticker=%s", job.ticker)
+        return
+
+    submissions = await sec.get_submissions(cik)
+    job.cik = cik
+    job.resolved_company_name = job.company_name or submissions.get("name", ticker)
+
+    # The table loads paged history synchronously, so filings are selected in
+    # a worker thread and each page it asks for is fetched on this loop.
+    loop = asyncio.get_running_loop()
+
+    def load_page(name: str) -> dict[str, Any]:
+        return asyncio.run_coroutine_threadsafe(sec.get_submissions_page(name), loop).result()
+
+    latest_10k, latest_10q, latest_8ks = await asyncio.to_thread(select_filings, submissions, load_page)
+    job.latest_8k_accession = latest_8ks[0].accession if latest_8ks else ""
+    state = options.state
+    previous = state.get_company(cik) if state else None
+    if previous and previous.latest_8k_accession == job.latest_8k_accession:
+        plan_documents(job, output_dir, latest_10k, latest_10q, None)
+        reuse_earnings_documents(job, output_dir, state)
+    else:
+        earnings = await identify_latest_earnings_8k_async(sec, cik, latest_8ks)
+        plan_documents(job, output_dir, latest_10k, latest_10q, earnings)
+    if previous:
+        apply_previous_state(job, previous, state)
+
+
+async def _download_document_async(
+    sec: AsyncSecClient,
+    job: CompanyJob,
+    document: DocumentTask,
+    options: StageOptions,
+) -> None:
+    if reuse_stored_download(document, options):
+        return
+    try:
+        document.raw_path = await sec.download_to_file(
+            document.source_url,
+            raw_download_path(document.output_path),
+            max_bytes=options.max_document_bytes,
+        )
+    except DocumentTooLargeError as exc:
+        logging.warning("Skipping %s for ticker=%s: %s", document.kind, job.ticker, exc)
+        document.error = type(exc).__name__
+        return
+    # Hashing into the document store reads the whole file, so it runs off the event loop.
+    await asyncio.to_thread(note_download, document, options)
+
+
+@METRICS.timed("stage_seconds", stage="download")
+async def download_documents_async(
+    sec: AsyncSecClient,
+    job: CompanyJob,
+    options: StageOptions = StageOptions(),
+) -> None:
+    await asyncio.gather(
+        *(
+            _download_document_async(sec, job, document, options)
+            for document in job.documents
+            if not document.unchanged
+        )
+    )
+
+
+async def process_one_company_async(
+    sec: AsyncSecClient,
+    drive: DriveClient,
+    output_dir: Path,
+    drive_parent_folder_id: str | None,
+    ticker: str,
+    company_name: str,
+    ticker_to_cik: Mapping[str, str],
+    options: StageOptions = StageOptions(),
+    job: CompanyJob | None = None,
+) -> CompanyResult:
+    job = job or CompanyJob(ticker=ticker, company_name=company_name)
+    await resolve_company_async(sec, job, output_dir, ticker_to_cik, options)
+    await download_documents_async(sec, job, options)
+    await asyncio.to_thread(convert_documents, job, options)
+    return await asyncio.to_thread(upload_documents, drive, job, drive_parent_folder_id, options)
+
+
+async def run_async(
+    user_agent: str,
+    timeout_seconds: int,
+    min_interval_seconds: float,
+    drive: DriveClient,
+    output_dir: Path,
+    drive_parent_folder_id: str | None,
+    jobs: Iterable[CompanyJob],
+    on_result: Callable[[CompanyJob, CompanyResult], None],
+    concurrency: int = 16,
+    ticker_to_cik: Mapping[str, str] | None = None,
+    submissions_archive: SubmissionsArchive | None = None,
+    options: StageOptions = StageOptions(),
+    rate_controller: RateController | None = None,
+) -> None:
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async with AsyncSecClient(
+        user_agent=user_agent,
+        timeout_seconds=timeout_seconds,
+        min_interval_seconds=min_interval_seconds,
+        max_connections=max(1, concurrency),
+        rate_controller=rate_controller,
+    ) as sec:
+        sec.submissions_archive = submissions_archive
+        if ticker_to_cik is None:
+            ticker_to_cik = await sec.ticker_to_cik_map()
+
+        async def run_one(job: CompanyJob) -> None:
+            try:
+                logging.info("Processing ticker=%s company=%s", job.ticker, job.company_name)
+                result = await process_one_company_async(
+                    sec=sec,
+                    drive=drive,
+                    output_dir=output_dir,
+                    drive_parent_folder_id=drive_parent_folder_id,
+                    ticker=job.ticker,
+                    company_name=job.company_name,
+                    ticker_to_cik=ticker_to_cik,
+                    options=options,
+                    job=job,
+                )
+            except Exception as exc:  # noqa: BLE001
+                logging.exception("Failed ticker=%s: %s", job.ticker, exc)
+                job.error = type(exc).__name__
+                result = failed_result(job.ticker, job.company_name)
+            finally:
+                semaphore.release()
+            on_result(job, result)
+
+        # A job is taken from `jobs` only when a slot is free, so a lazy source
+        # such as a --queue worker's claims is not drained up front.
+        running: set[asyncio.Task] = set()
+        for job in jobs:
+            await semaphore.acquire()
+            task = asyncio.create_task(run_one(job))
+            running.add(task)
+            task.add_done_callback(running.discard)
+        await asyncio.gather(*running)
@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+from .metrics import METRICS
+from .rate_control import SEC_MAX_REQUESTS_PER_SECOND, RateController
+from .sec_client import (
+    SEC_BASE,
+    SEC_DATA_BASE,
+    DocumentTooLargeError,
+    endpoint_name,
+    sec_archive_url,
+    sec_retry,
+    ticker_map_from_company_tickers,
+)
+
+if TYPE_CHECKING:
+    from .bulk_submissions import SubmissionsArchive
+
+
+class AsyncSecClient:
+    def __init__(
+        self,
+        user_agent: str,
+        timeout_seconds: int = 20,
+        min_interval_seconds: float = 0.2,
+        max_connections: int = 20,
+        max_requests_per_second: float = SEC_MAX_REQUESTS_PER_SECOND,
+        rate_controller: RateController | None = None,
+    ) -> None:
+        self.timeout_seconds = timeout_seconds
+        # Pass the SecClient's controller to share one request budget with it.
+        self.rate_controller = rate_controller or RateController.from_interval(
+            min_interval_seconds, max_requests_per_second
+        )
+        self.submissions_archive: SubmissionsArchive | None = None
+        self.client = httpx.AsyncClient(
+            headers={"User-Agent": user_agent},
+            timeout=timeout_seconds,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+
+    async def __aenter__(self) -> "AsyncSecClient":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def _throttle(self) -> None:
+        delay = self.rate_controller.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+            METRICS.incr("sec_throttle_sleep_seconds_total", delay)
+
+    def _record(self, url: str, response: httpx.Response) -> None:
+        METRICS.incr("sec_requests_total", endpoint=endpoint_name(url), status=response.status_code)
+        self.rate_controller.record_response(response.status_code, response.headers.get("Retry-After"))
+
+    @sec_retry(httpx.HTTPError)
+    async def _get(self, url: str) -> httpx.Response:
+        await self._throttle()
+        try:
+            response = await self.client.get(url)
+        except httpx.HTTPError:
+            METRICS.incr("sec_requests_total", endpoint=endpoint_name(url), status="error")
+            raise
+        self._record(url, response)
+        METRICS.incr("sec_bytes_downloaded_total", len(response.content), endpoint=endpoint_name(url))
+        response.raise_for_status()
+        return response
+
+    @sec_retry(httpx.HTTPError)
+    async def download_to_file(
+        self,
+        url: str,
+        output_path: Path,
+        max_bytes: int | None = None,
+    ) -> Path:
+        await self._throttle()
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_name(f"{output_path.name}.part")
+        try:
+            async with self.client.stream("GET", url) as response:
+                self._record(url, response)
+                response.raise_for_status()
+                declared = int(response.headers.get("Content-Length") or 0)
+                if max_bytes and declared > max_bytes:
+                    raise DocumentTooLargeError(url, declared, max_bytes)
+                written = 0
+                with tmp_path.open("wb") as handle:
+                    async for chunk in response.aiter_bytes():
+                        written += len(chunk)
+                        if max_bytes and written > max_bytes:
+                            raise DocumentTooLargeError(url, written, max_bytes)
+                        handle.write(chunk)
+                METRICS.incr("sec_bytes_downloaded_total", written, endpoint=endpoint_name(url))
+            os.replace(tmp_path, output_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return output_path
+
+    @sec_retry(httpx.HTTPError)
+    async def get_head(self, url: str, num_bytes: int = 8192) -> bytes:
+        await self._throttle()
+        headers = {"Range": f"bytes=0-{num_bytes - 1}"}
+        async with self.client.stream("GET", url, headers=headers) as response:
+            self._record(url, response)
+            response.raise_for_status()
+            head = b""
+            async for chunk in response.aiter_bytes():
+                head += chunk
+                if len(head) >= num_bytes:
+                    break
+            METRICS.incr("sec_bytes_downloaded_total", len(head), endpoint=endpoint_name(url))
+            return head[:num_bytes]
+
+    async def get_json(self, url: str) -> dict[str, Any]:
+        response = await self._get(url)
+        return response.json()
+
+    async def get_bytes(self, url: str) -> bytes:
+        response = await self._get(url)
+        return response.content
+
+    async def get_company_tickers(self) -> dict[str, dict[str, Any]]:
+        return await self.get_json(f"{SEC_BASE}/files/company_tickers.json")
+
+    async def ticker_to_cik_map(self) -> dict[str, str]:
+        return ticker_map_from_company_tickers(await self.get_company_tickers())
+
+    async def get_submissions(self, cik: str) -> dict[str, Any]:
+        if self.submissions_archive is not None:
+            submissions = self.submissions_archive.get(cik)
+            if submissions is not None:
+                return submissions
+        return await self.get_json(f"{SEC_DATA_BASE}/submissions/CIK{cik}.json")
+
+    async def get_submissions_page(self, name: str) -> dict[str, Any]:
+        if self.submissions_archive is not None:
+            page = self.submissions_archive.get_file(name)
+            if page is not None:
+                return page
+        return await self.get_json(f"{SEC_DATA_BASE}/submissions/{name}")
+
+    async def get_filing_index(self, cik: str, accession: str) -> dict[str, Any]:
+        acc_nodash = accession.replace("-", "")
+        return await self.get_json(
+            f"{SEC_BASE}/Archives/edgar/data/{int(cik)}/{acc_nodash}/index.json"
+        )
+
+    def sec_archive_url(self, cik: str, accession: str, filename: str) -> str:
+        return sec_archive_url(cik, accession, filename)
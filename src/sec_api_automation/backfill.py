@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Mapping
+
+from .db import connect
+from .filing_selector import (
+    PREFETCH_INDEXES,
+    REG_FD_ITEM,
+    RESULTS_ITEM,
+    extract_ex99_filenames,
+    probe_exhibits,
+    select_earnings_exhibits,
+)
+from .filing_table import FilingTable
+from .metrics import METRICS
+from .reporting import CompanyResult
+from .sec_client import FilingMeta, SecClient, sec_archive_url
+from .stages import (
+    EARNINGS_KINDS,
+    CompanyJob,
+    DocumentTask,
+    StageOptions,
+    company_folder_name,
+    failed_result,
+)
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    ticker TEXT NOT NULL,
+    accession TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    form TEXT NOT NULL,
+    filing_date TEXT NOT NULL,
+    source_url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    drive_file_id TEXT NOT NULL,
+    error TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (ticker, accession, kind)
+);
+CREATE INDEX IF NOT EXISTS documents_status ON documents(status);
+CREATE TABLE IF NOT EXISTS examined_8ks (
+    ticker TEXT NOT NULL,
+    accession TEXT NOT NULL,
+    PRIMARY KEY (ticker, accession)
+);
+"""
+
+PERIODIC_KINDS = {"10-K": "10K", "10-Q": "10Q"}
+EIGHT_K_FORMS = ("8-K", "8-K/A")
+
+
+@dataclass(frozen=True)
+class BackfillEntry:
+    accession: str
+    kind: str
+    form: str
+    filing_date: str
+    source_url: str
+    status: str
+
+
+def is_earnings_8k(filing: FilingMeta) -> bool:
+    # Item 2.02 carries the earnings release and 7.01 most investor decks;
+    # filings from before items were reported have to be looked at.
+    return not filing.items or RESULTS_ITEM in filing.items or REG_FD_ITEM in filing.items
+
+
+def backfill_output_path(output_dir: Path, ticker: str, kind: str, filing: FilingMeta) -> Path:
+    # Several filings of a kind land in one year, so the accession keeps names unique.
+    year = filing.filing_date[:4]
+    return output_dir / ticker / year / f"{ticker}_{kind}_{filing.filing_date}_{filing.accession}.pdf"
+
+
+# Per-accession progress of a backfill. Every planned document is written as
+# 'pending' and becomes 'done' once it is on Drive or 'failed' with its error;
+# 8-Ks whose exhibits were already looked at are remembered so a resumed run
+# does not fetch their indexes again.
+class BackfillCheckpoint:
+    def __init__(self, path: Path, wal: bool = True) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = connect(path, wal=wal)
+        self._db.executescript(_SCHEMA)
+
+    def entries(self, ticker: str) -> dict[tuple[str, str], BackfillEntry]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT accession, kind, form, filing_date, source_url, status FROM documents"
+                " WHERE ticker = ?",
+                (ticker,),
+            ).fetchall()
+        return {(row["accession"], row["kind"]): BackfillEntry(**dict(row)) for row in rows}
+
+    def examined_8ks(self, ticker: str) -> set[str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT accession FROM examined_8ks WHERE ticker = ?", (ticker,)
+            ).fetchall()
+        return {row["accession"] for row in rows}
+
+    def plan(self, ticker: str, documents: list[DocumentTask], examined: list[str]) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO documents (ticker, accession, kind, form, filing_date, source_url,"
+                " status, drive_file_id, error, updated_at) VALUES (?, ?, ?, ?, ?, ?, 'pending', '', '', ?)",
+                [
+                    (ticker, doc.accession, doc.kind, doc.form, doc.filing_date, doc.source_url, now)
+                    for doc in documents
+                ],
+            )
+            self._db.executemany(
+                "INSERT OR IGNORE INTO examined_8ks (ticker, accession) VALUES (?, ?)",
+                [(ticker, accession) for accession in examined],
+            )
+
+    def record(self, ticker: str, documents: list[DocumentTask]) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE documents SET status = ?, drive_file_id = ?, error = ?, updated_at = ?"
+                " WHERE ticker = ? AND accession = ? AND kind = ?",
+                [
+                    (
+                        "done" if doc.drive_file_id else "failed",
+                        doc.drive_file_id,
+                        doc.error or ("" if doc.drive_file_id else "NotUploaded"),
+                        now,
+                        ticker,
+                        doc.accession,
+                        doc.kind,
+                    )
+                    for doc in documents
+                ],
+            )
+
+    def done_kinds(self, ticker: str) -> set[str]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT kind FROM documents WHERE ticker = ? AND status = 'done'", (ticker,)
+            ).fetchall()
+        return {row["kind"] for row in rows}
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) AS n FROM documents GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+@METRICS.timed("stage_seconds", stage="plan")
+def plan_backfill(
+    sec: SecClient,
+    job: CompanyJob,
+    output_dir: Path,
+    ticker_to_cik: Mapping[str, str],
+    since: str,
+    checkpoint: BackfillCheckpoint,
+) -> list[CompanyJob]:
+    # Returns one job per filing year with the documents still to do, so the
+    # download, convert and upload stages interleave years of many companies
+    # instead of working through one company's whole history at a time.
+    ticker = job.ticker.upper()
+    cik = ticker_to_cik.get(ticker)
+    if not cik:
+        logging.warning("No CIK found for ticker=%s", job.ticker)
+        return [job]
+
+    submissions = sec.get_submissions(cik)
+    job.cik = cik
+    job.resolved_company_name = job.company_name or submissions.get("name", ticker)
+    # between() pulls in the paged filings.files history once `since` reaches past the recent block.
+    table = FilingTable.from_submissions(submissions, sec.get_submissions_page)
+    known = checkpoint.entries(ticker)
+    examined = checkpoint.examined_8ks(ticker)
+
+    def task(kind: str, filing: FilingMeta, filename: str) -> DocumentTask:
+        return DocumentTask(
+            kind=kind,
+            source_url=sec_archive_url(cik, filing.accession, filename),
+            output_path=backfill_output_path(output_dir, ticker, kind, filing),
+            accession=filing.accession,
+            form=filing.form,
+            filing_date=filing.filing_date,
+        )
+
+    planned = [
+        task(PERIODIC_KINDS[filing.form], filing, filing.primary_document)
+        for filing in table.between(PERIODIC_KINDS, since)
+    ]
+    for entry in known.values():
+        if entry.kind in EARNINGS_KINDS and entry.filing_date >= since:
+            filename = entry.source_url.rsplit("/", 1)[-1]
+            filing = FilingMeta(entry.form, entry.filing_date, entry.accession, filename)
+            planned.append(task(entry.kind, filing, filename))
+
+    new_8ks = [
+        filing
+        for filing in table.between(EIGHT_K_FORMS, since)
+        if filing.accession not in examined and is_earnings_8k(filing)
+    ]
+
+    def examine(filing: FilingMeta) -> list[DocumentTask]:
+        index_json = sec.get_filing_index(cik=cik, accession=filing.accession)
+        if not extract_ex99_filenames(index_json):
+            return []
+        probes = probe_exhibits(sec, cik, filing, index_json)
+        earnings = select_earnings_exhibits(filing, index_json, probes)
+        if earnings is None:
+            return []
+        found: list[DocumentTask] = []
+        if earnings.deck_filename:
+            found.append(task("EarningsDeck", filing, earnings.deck_filename))
+        if earnings.transcript_filename:
+            found.append(task("Transcript", filing, earnings.transcript_filename))
+        return found
+
+    # Every candidate 8-K needs its index, so a few are fetched at a time; the
+    # shared rate limit still paces them against the other workers.
+    with ThreadPoolExecutor(max_workers=PREFETCH_INDEXES) as pool:
+        for found in pool.map(examine, new_8ks):
+            planned += found
+    checkpoint.plan(ticker, planned, [filing.accession for filing in new_8ks])
+
+    done = {key for key, entry in known.items() if entry.status == "done"}
+    pending = [doc for doc in planned if (doc.accession, doc.kind) not in done]
+    by_year: dict[str, list[DocumentTask]] = {}
+    for document in sorted(pending, key=lambda doc: doc.filing_date, reverse=True):
+        by_year.setdefault(document.filing_date[:4], []).append(document)
+    METRICS.incr("backfill_documents_planned_total", len(pending))
+    logging.info(
+        "Backfill ticker=%s since %s: %d documents to do, %d already done, %d new 8-Ks examined",
+        ticker,
+        since,
+        len(pending),
+        len(planned) - len(pending),
+        len(new_8ks),
+    )
+    if not by_year:
+        return [job]
+    return [
+        CompanyJob(
+            ticker=job.ticker,
+            company_name=job.company_name,
+            cik=cik,
+            resolved_company_name=job.resolved_company_name,
+            documents=documents,
+        )
+        for documents in by_year.values()
+    ]
+
+
+@METRICS.timed("stage_seconds", stage="upload")
+def upload_backfill_documents(
+    job: CompanyJob,
+    drive_parent_folder_id: str | None,
+    checkpoint: BackfillCheckpoint,
+    options: StageOptions,
+) -> CompanyResult:
+    # Files go into a subfolder per filing year. Uploads always go through
+    # DriveSync, so a document uploaded just before an interrupted run
+    # recorded it is matched by MD5 on resume rather than uploaded twice.
+    ticker = job.ticker.upper()
+    if not job.cik:
+        return failed_result(ticker, job.company_name or ticker)
+
+    sync = options.drive_sync
+    folder_id, folder_link = sync.company_folder(company_folder_name(job), drive_parent_folder_id)
+    by_year: dict[str, list[DocumentTask]] = {}
+    for document in job.documents:
+        if document.pdf_path:
+            by_year.setdefault(document.filing_date[:4], []).append(document)
+    for year, documents in by_year.items():
+        year_folder = sync.company_folder(year, folder_id)
+        _, file_ids = sync.sync_files(year, folder_id, year_folder, [doc.pdf_path for doc in documents])
+        for document in documents:
+            document.drive_file_id = file_ids[document.pdf_path]
+    checkpoint.record(ticker, job.documents)
+    METRICS.incr("backfill_documents_done_total", sum(bool(doc.drive_file_id) for doc in job.documents))
+
+    kinds = checkpoint.done_kinds(ticker)
+    return CompanyResult(
+        company_name=job.resolved_company_name,
+        ticker=ticker,
+        drive_folder_link=folder_link,
+        has_10k="10K" in kinds,
+        has_10q="10Q" in kinds,
+        has_deck="EarningsDeck" in kinds,
+        has_transcript="Transcript" in kinds,
+    )
+
+
+@dataclass
+class _Progress:
+    job: CompanyJob
+    remaining: int
+    result: CompanyResult | None = None
+
+
+# Year jobs of one company finish out of order on different workers; the
+# company is reported to `on_result` once, after its last year is through.
+class BackfillTracker:
+    def __init__(self, on_result: Callable[[CompanyJob, CompanyResult], None]) -> None:
+        self._on_result = on_result
+        self._lock = threading.Lock()
+        self._progress: dict[str, _Progress] = {}
+
+    def expect(self, job: CompanyJob, chunks: list[CompanyJob]) -> list[CompanyJob]:
+        with self._lock:
+            self._progress[job.ticker] = _Progress(job, len(chunks))
+        return chunks
+
+    def finish(self, chunk: CompanyJob, result: CompanyResult) -> None:
+        with self._lock:
+            progress = self._progress.get(chunk.ticker)
+            if progress is None:
+                # The plan stage itself failed, so there is only this one job.
+                progress = _Progress(chunk, 1)
+            if chunk is not progress.job:
+                progress.job.documents.extend(chunk.documents)
+                progress.job.error = progress.job.error or chunk.error
+            # done_kinds only grows, so the last uploaded year has the fullest flags.
+            if progress.result is None or result.drive_folder_link:
+                progress.result = result
+            progress.remaining -= 1
+            if progress.remaining:
+                return
+            self._progress.pop(chunk.ticker, None)
+        self._on_result(progress.job, progress.result)
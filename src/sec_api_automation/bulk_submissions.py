@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import json
+import logging
+import re
+import struct
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable
+
+from .sec_client import SEC_BASE, SecClient
+
+
+BULK_SUBMISSIONS_URL = f"{SEC_BASE}/Archives/edgar/daily-index/bulkdata/submissions.zip"
+
+_MEMBER_PATTERN = re.compile(r"^CIK(\d{10})(?:-submissions-\d+)?\.json$")
+
+_EOCD = struct.Struct("<4s4H2LH")
+_ZIP64_LOCATOR = struct.Struct("<4sLQL")
+_ZIP64_EOCD = struct.Struct("<4sQ2H2L4Q")
+_CENTRAL_DIR = struct.Struct("<4s4B4HL2L5H2L")
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_ZIP64_EXTRA_ID = 0x0001
+_MAX_EOCD_SEARCH = 65536 + _EOCD.size
+
+
+@dataclass(frozen=True)
+class _Member:
+    header_offset: int
+    compress_size: int
+    compress_type: int
+
+
+def _find_central_directory(handle: BinaryIO) -> tuple[int, int]:
+    handle.seek(0, 2)
+    file_size = handle.tell()
+    tail_size = min(file_size, _MAX_EOCD_SEARCH)
+    handle.seek(file_size - tail_size)
+    tail = handle.read(tail_size)
+    eocd_at = tail.rfind(b"PK\x05\x06")
+    if eocd_at < 0:
+        raise ValueError("Not a zip archive: end of central directory not found")
+    _, _, _, _, entries, cd_size, cd_offset, _ = _EOCD.unpack_from(tail, eocd_at)
+
+    locator_at = eocd_at - _ZIP64_LOCATOR.size
+    if locator_at >= 0 and tail[locator_at : locator_at + 4] == b"PK\x06\x07":
+        _, _, zip64_eocd_offset, _ = _ZIP64_LOCATOR.unpack_from(tail, locator_at)
+        handle.seek(zip64_eocd_offset)
+        record = _ZIP64_EOCD.unpack(handle.read(_ZIP64_EOCD.size))
+        entries, cd_size, cd_offset = record[7], record[8], record[9]
+    return cd_offset, entries
+
+
+def _zip64_values(extra: bytes, wanted: int) -> list[int]:
+    offset = 0
+    while offset + 4 <= len(extra):
+        header_id, size = struct.unpack_from("<2H", extra, offset)
+        if header_id == _ZIP64_EXTRA_ID:
+            return list(struct.unpack_from(f"<{wanted}Q", extra, offset + 4))
+        offset += 4 + size
+    raise ValueError("Zip64 extra field missing")
+
+
+def _scan_members(zip_path: Path, ciks: set[str]) -> dict[str, _Member]:
+    members: dict[str, _Member] = {}
+    with zip_path.open("rb", buffering=1024 * 1024) as handle:
+        cd_offset, entries = _find_central_directory(handle)
+        handle.seek(cd_offset)
+        for _ in range(entries):
+            header = _CENTRAL_DIR.unpack(handle.read(_CENTRAL_DIR.size))
+            if header[0] != b"PK\x01\x02":
+                raise ValueError("Corrupt zip central directory")
+            compress_type = header[6]
+            compress_size, file_size = header[10], header[11]
+            name_len, extra_len, comment_len = header[12], header[13], header[14]
+            header_offset = header[18]
+            name = handle.read(name_len).decode("utf-8")
+            extra = handle.read(extra_len)
+            handle.seek(comment_len, 1)
+
+            match = _MEMBER_PATTERN.match(name)
+            if not match or match.group(1) not in ciks:
+                continue
+
+            overflow = [v == 0xFFFFFFFF for v in (file_size, compress_size, header_offset)]
+            if any(overflow):
+                values = iter(_zip64_values(extra, sum(overflow)))
+                if overflow[0]:
+                    file_size = next(values)
+                if overflow[1]:
+                    compress_size = next(values)
+                if overflow[2]:
+                    header_offset = next(values)
+            members[name] = _Member(header_offset, compress_size, compress_type)
+    return members
+
+
+# Also reads companyfacts.zip, whose members follow the same CIK##########.json naming.
+class SubmissionsArchive:
+    def __init__(self, zip_path: Path, ciks: Iterable[str]) -> None:
+        self.zip_path = zip_path
+        wanted = {str(cik).zfill(10) for cik in ciks}
+        started = time.monotonic()
+        self._members = _scan_members(zip_path, wanted)
+        logging.info(
+            "Indexed %d submissions files for %d CIKs from %s in %.1fs",
+            len(self._members),
+            len(wanted),
+            zip_path,
+            time.monotonic() - started,
+        )
+
+    def _read_member(self, member: _Member) -> bytes:
+        with self.zip_path.open("rb") as handle:
+            handle.seek(member.header_offset)
+            header = _LOCAL_HEADER.unpack(handle.read(_LOCAL_HEADER.size))
+            handle.seek(header[10] + header[11], 1)
+            remaining = member.compress_size
+            if member.compress_type == 0:
+                return handle.read(remaining)
+            if member.compress_type != 8:
+                raise ValueError(f"Unsupported zip compression method {member.compress_type}")
+            inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+            parts: list[bytes] = []
+            while remaining > 0:
+                chunk = handle.read(min(remaining, 1024 * 1024))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                parts.append(inflater.decompress(chunk))
+            parts.append(inflater.flush())
+            return b"".join(parts)
+
+    def get_file(self, name: str) -> dict[str, Any] | None:
+        member = self._members.get(name)
+        if member is None:
+            return None
+        return json.loads(self._read_member(member))
+
+    def get(self, cik: str) -> dict[str, Any] | None:
+        return self.get_file(f"CIK{str(cik).zfill(10)}.json")
+
+
+def ensure_bulk_archive(sec: SecClient, url: str, zip_path: Path, max_age_hours: float = 24.0) -> Path:
+    if zip_path.exists() and time.time() - zip_path.stat().st_mtime < max_age_hours * 3600:
+        return zip_path
+    logging.info("Downloading %s to %s", url, zip_path)
+    return sec.download_to_file(url, zip_path, use_cache=False)
+
+
+def ensure_bulk_submissions(sec: SecClient, zip_path: Path, max_age_hours: float = 24.0) -> Path:
+    return ensure_bulk_archive(sec, BULK_SUBMISSIONS_URL, zip_path, max_age_hours)
@@ -5,31 +5,54 @@ from pathlib import Path
 import os
 
 
+# SEC request settings. AppConfig holds one; subcommands that never touch
+# Google Drive load this on its own.
+@dataclass(frozen=True)
+class SecConfig:
+    user_agent: str
+    request_timeout_seconds: int = 20
+    min_request_interval_seconds: float = 0.2
+    max_requests_per_second: float = 10.0
+
+    @staticmethod
+    def from_env() -> "SecConfig":
+        user_agent = os.getenv("SEC_USER_AGENT", "")
+        request_timeout = os.getenv("SEC_REQUEST_TIMEOUT_SECONDS", "").strip()
+        min_request_interval = os.getenv("SEC_MIN_REQUEST_INTERVAL_SECONDS", "").strip()
+        max_requests_per_second = os.getenv("SEC_MAX_REQUESTS_PER_SECOND", "").strip()
+        if not user_agent:
+            raise ValueError(
+                "SEC_USER_AGENT is required. Example: 'First Last email@domain.com'"
+            )
+        return SecConfig(
+            user_agent=user_agent,
+            request_timeout_seconds=int(request_timeout) if request_timeout else 20,
+            min_request_interval_seconds=float(min_request_interval) if min_request_interval else 0.2,
+            max_requests_per_second=float(max_requests_per_second) if max_requests_per_second else 10.0,
+        )
+
+
 @dataclass(frozen=True)
 class AppConfig:
-    sec_user_agent: str
+    sec: SecConfig
     drive_auth_mode: str
     drive_credentials_path: Path | None
     drive_oauth_client_secrets_path: Path | None
     drive_oauth_token_path: Path
     drive_parent_folder_id: str | None
+    drive_api_endpoint: str | None
     output_dir: Path
     work_dir: Path
-    request_timeout_seconds: int = 20
-    min_request_interval_seconds: float = 0.2
 
     @staticmethod
     def from_env(output_dir: Path, work_dir: Path) -> "AppConfig":
-        sec_user_agent = os.getenv("SEC_USER_AGENT", "")
+        sec = SecConfig.from_env()
         drive_auth_mode = os.getenv("GOOGLE_DRIVE_AUTH_MODE", "oauth").strip().lower()
         drive_credentials = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "")
         oauth_client_secrets = os.getenv("GOOGLE_OAUTH_CLIENT_SECRETS", "")
         oauth_token_path = os.getenv("GOOGLE_OAUTH_TOKEN_PATH", "").strip()
         drive_parent_folder_id = os.getenv("GOOGLE_DRIVE_PARENT_FOLDER_ID", "").strip()
-        if not sec_user_agent:
-            raise ValueError(
-                "SEC_USER_AGENT is required. Example: 'First Last email@domain.com'"
-            )
+        drive_api_endpoint = os.getenv("GOOGLE_DRIVE_API_ENDPOINT", "").strip()
         if drive_auth_mode not in {"oauth", "service_account"}:
             raise ValueError("GOOGLE_DRIVE_AUTH_MODE must be 'oauth' or 'service_account'")
         if drive_auth_mode == "service_account" and not drive_credentials:
@@ -44,7 +67,7 @@ class AppConfig:
             Path(oauth_token_path) if oauth_token_path else (work_dir / "google_oauth_token.json")
         )
         return AppConfig(
-            sec_user_agent=sec_user_agent,
+            sec=sec,
             drive_auth_mode=drive_auth_mode,
             drive_credentials_path=Path(drive_credentials) if drive_credentials else None,
             drive_oauth_client_secrets_path=(
@@ -52,6 +75,7 @@ class AppConfig:
             ),
             drive_oauth_token_path=resolved_oauth_token_path,
             drive_parent_folder_id=drive_parent_folder_id or None,
+            drive_api_endpoint=drive_api_endpoint or None,
             output_dir=output_dir,
             work_dir=work_dir,
         )
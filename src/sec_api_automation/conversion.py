@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.queues import SimpleQueue
+from dataclasses import dataclass
+from pathlib import Path
+
+from .document_builder import normalize_file_to_pdf
+from .metrics import METRICS
+from .pdf_renderer import RenderOptions, partial_path
+
+
+@dataclass(frozen=True)
+class ConversionOutcome:
+    output_path: Path | None
+    seconds: float
+    error: str = ""
+
+
+def _register_worker(pids: SimpleQueue) -> None:
+    pids.put(os.getpid())
+
+
+def _convert_in_worker(
+    raw_path: str,
+    output_path: str,
+    extractor: str,
+    render: RenderOptions,
+    text_path: str | None,
+) -> tuple[float, dict]:
+    # A worker converts one document at a time, so the counters drained here
+    # are this document's; the parent adds them to its own METRICS.
+    started = time.perf_counter()
+    try:
+        normalize_file_to_pdf(
+            Path(raw_path), Path(output_path), extractor, render, Path(text_path) if text_path else None
+        )
+    except Exception:
+        METRICS.drain_counters()
+        raise
+    return time.perf_counter() - started, METRICS.drain_counters()
+
+
+def _remove_partial_outputs(output_path: Path, text_path: Path | None) -> None:
+    # A killed worker never reaches its own cleanup, so the PDF and text it
+    # was writing are removed here.
+    partial_path(output_path).unlink(missing_ok=True)
+    if text_path is not None:
+        partial_path(text_path).unlink(missing_ok=True)
+
+
+class ConversionExecutor:
+    def __init__(self, workers: int, timeout_seconds: float = 300.0) -> None:
+        self.workers = max(1, workers)
+        self.timeout_seconds = timeout_seconds
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._pool, self._worker_pids = self._new_pool()
+
+    def _new_pool(self) -> tuple[ProcessPoolExecutor, SimpleQueue]:
+        # Each worker reports its PID as it starts, so a hung one can be killed.
+        context = multiprocessing.get_context("spawn")
+        pids = context.SimpleQueue()
+        pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_register_worker,
+            initargs=(pids,),
+        )
+        return pool, pids
+
+    def _recycle(self, broken: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is not broken:
+                return
+            # ProcessPoolExecutor cannot cancel a running task, so a hung worker
+            # is only reclaimed by killing the processes and starting a new pool.
+            pids = self._worker_pids
+            while not pids.empty():
+                try:
+                    os.kill(pids.get(), signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+            broken.shutdown(wait=False, cancel_futures=True)
+            pids.close()
+            self._pool, self._worker_pids = self._new_pool()
+
+    def _run_once(
+        self,
+        raw_path: Path,
+        output_path: Path,
+        extractor: str,
+        render: RenderOptions,
+        text_path: Path | None,
+    ) -> ConversionOutcome | None:
+        with self._lock:
+            pool = self._pool
+        started = time.perf_counter()
+        try:
+            future = pool.submit(
+                _convert_in_worker,
+                str(raw_path),
+                str(output_path),
+                extractor,
+                render,
+                str(text_path) if text_path else None,
+            )
+            seconds, counters = future.result(timeout=self.timeout_seconds)
+            METRICS.add_counters(counters)
+            return ConversionOutcome(output_path, seconds)
+        except FuturesTimeoutError:
+            logging.warning("Conversion of %s timed out after %.0fs", raw_path.name, self.timeout_seconds)
+            self._recycle(pool)
+            _remove_partial_outputs(output_path, text_path)
+            return ConversionOutcome(None, time.perf_counter() - started, "timeout")
+        except BrokenProcessPool:
+            # Also raised for the other tasks of a pool killed by a timeout.
+            self._recycle(pool)
+            _remove_partial_outputs(output_path, text_path)
+            return None
+        except Exception as exc:  # noqa: BLE001
+            logging.warning("Conversion of %s failed: %s", raw_path.name, exc)
+            return ConversionOutcome(None, time.perf_counter() - started, type(exc).__name__)
+
+    def convert(
+        self,
+        raw_path: Path,
+        output_path: Path,
+        extractor: str = "stream",
+        render: RenderOptions = RenderOptions(),
+        text_path: Path | None = None,
+    ) -> ConversionOutcome:
+        with self._slots:
+            outcome = self._run_once(raw_path, output_path, extractor, render, text_path)
+            if outcome is None:
+                # Either this document crashed its worker or another task's timeout
+                # recycled the pool underneath it, so it gets one more attempt.
+                outcome = self._run_once(raw_path, output_path, extractor, render, text_path)
+            if outcome is None:
+                logging.warning("Conversion of %s crashed its worker", raw_path.name)
+                outcome = ConversionOutcome(None, 0.0, "BrokenProcessPool")
+            return outcome
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._pool.shutdown(wait=True)
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import xml.etree.ElementTree as ElementTree
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterable
+
+import requests
+
+from .db import connect
+from .metrics import METRICS
+from .sec_client import SEC_BASE, SecClient
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+WATCHED_FORMS = frozenset({"10-K", "10-K/A", "10-Q", "10-Q/A", "8-K", "8-K/A"})
+# After a longer pause every ticker runs again rather than reading a month of indexes.
+MAX_LOOKBACK_DAYS = 30
+CURRENT_FEED_PAGE = 100
+CURRENT_FEED_MAX_PAGES = 10
+
+_ATOM = "{http://www.w3.org/2005/Atom}"
+_FEED_CIK = re.compile(r"\((\d{10})\)")
+
+
+def daily_index_url(day: date) -> str:
+    quarter = (day.month - 1) // 3 + 1
+    return f"{SEC_BASE}/Archives/edgar/daily-index/{day.year}/QTR{quarter}/master.{day:%Y%m%d}.idx"
+
+
+def current_feed_url(form: str, start: int) -> str:
+    return (
+        f"{SEC_BASE}/cgi-bin/browse-edgar?action=getcurrent&type={form}&owner=include"
+        f"&start={start}&count={CURRENT_FEED_PAGE}&output=atom"
+    )
+
+
+def parse_master_index(payload: bytes, forms: Iterable[str] = WATCHED_FORMS) -> set[str]:
+    # master.idx is a text header, a line of dashes, then one
+    # "CIK|Company Name|Form Type|Date Filed|Filename" line per filing.
+    forms = set(forms)
+    text = payload.decode("latin-1")
+    _, _, body = text.partition("\n----")
+    ciks: set[str] = set()
+    for line in body.splitlines()[1:]:
+        fields = line.split("|")
+        if len(fields) == 5 and fields[2] in forms:
+            ciks.add(fields[0].strip().zfill(10))
+    return ciks
+
+
+def parse_current_feed(payload: bytes) -> list[str]:
+    # Entry titles read "8-K - Company Name (0000320193) (Filer)".
+    root = ElementTree.fromstring(payload)
+    ciks = []
+    for entry in root.iter(f"{_ATOM}entry"):
+        match = _FEED_CIK.search(entry.findtext(f"{_ATOM}title", ""))
+        if match:
+            ciks.append(match.group(1))
+    return ciks
+
+
+# Learns which CIKs filed a watched form since the last run from EDGAR's
+# daily master index: one request per business day instead of one
+# submissions request per ticker. The last day read is kept in SQLite.
+class DailyIndexWatcher:
+    def __init__(self, sec: SecClient, path: Path) -> None:
+        self.sec = sec
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = connect(path)
+        self._db.executescript(_SCHEMA)
+
+    def last_processed(self) -> date | None:
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'last_processed_date'").fetchone()
+        return date.fromisoformat(row["value"]) if row else None
+
+    def mark_processed(self, day: date) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_processed_date', ?)",
+                (day.isoformat(),),
+            )
+
+    def _fetch_optional(self, url: str) -> bytes | None:
+        try:
+            return self.sec.get_bytes(url)
+        except requests.HTTPError as exc:
+            # EDGAR answers 403 or 404 for an index that does not exist.
+            if exc.response is not None and exc.response.status_code in {403, 404}:
+                return None
+            raise
+
+    def changed_ciks(
+        self,
+        today: date,
+        forms: Iterable[str] = WATCHED_FORMS,
+        current_feed: bool = False,
+    ) -> tuple[set[str] | None, date]:
+        # Returns the CIKs that filed since the last processed day and the day
+        # to record once the run has finished. The CIKs are None, meaning every
+        # ticker should run, when there is no recent last day to start from.
+        forms = set(forms)
+        last = self.last_processed()
+        if last is None or last < today - timedelta(days=MAX_LOOKBACK_DAYS):
+            logging.info("Daily indexes last processed through %s; running every ticker", last)
+            return None, today - timedelta(days=1)
+
+        ciks: set[str] = set()
+        day = last + timedelta(days=1)
+        through = last
+        read = 0
+        while day <= today:
+            # Indexes are only published for business days.
+            if day.weekday() < 5:
+                payload = self._fetch_optional(daily_index_url(day))
+                if payload is None:
+                    # An index appears on the evening of its day; a missing
+                    # one from before yesterday was a holiday.
+                    if day >= today - timedelta(days=1):
+                        break
+                else:
+                    ciks |= parse_master_index(payload, forms)
+                    read += 1
+            through = day
+            day += timedelta(days=1)
+        METRICS.incr("daily_indexes_read_total", read)
+
+        if current_feed:
+            ciks |= self._current_feed_ciks(forms)
+        logging.info(
+            "Read %d daily indexes after %s: %d filers of %s",
+            read,
+            last,
+            len(ciks),
+            ", ".join(sorted(forms)),
+        )
+        return ciks, through
+
+    def _current_feed_ciks(self, forms: set[str]) -> set[str]:
+        # The getcurrent Atom feed lists filings accepted today, before they
+        # reach a daily index. type= matches amendments too.
+        ciks: set[str] = set()
+        for form in sorted({form.removesuffix("/A") for form in forms}):
+            for page in range(CURRENT_FEED_MAX_PAGES):
+                payload = self._fetch_optional(current_feed_url(form, page * CURRENT_FEED_PAGE))
+                entries = parse_current_feed(payload) if payload else []
+                ciks.update(entries)
+                if len(entries) < CURRENT_FEED_PAGE:
+                    break
+        return ciks
@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+
+def connect(path: Path, wal: bool = True) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    # WAL needs shared memory between all readers, so files opened from several
+    # hosts over a network filesystem stay on the rollback journal.
+    connection.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
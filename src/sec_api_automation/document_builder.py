@@ -1,39 +1,34 @@
 from __future__ import annotations
 
+import itertools
+import os
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, Iterable, Iterator, Optional, TextIO
 
 from bs4 import BeautifulSoup
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
 
+from .metrics import METRICS
+from .pdf_renderer import RenderOptions, partial_path, render_text_pdf
 from .sec_client import SecClient
+from .text_extraction import EXTRACTORS
 
 
 PDF_MAGIC = b"%PDF"
+NO_TEXT_PLACEHOLDER = "Document downloaded but no readable text was extracted."
 
 
-def _write_text_pdf(text: str, output_path: Path) -> None:
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-    pdf = canvas.Canvas(str(output_path), pagesize=letter)
-    width, height = letter
-    y = height - 40
-    for raw_line in text.splitlines():
-        line = raw_line.strip()
-        if not line:
-            continue
-        chunks = [line[i : i + 110] for i in range(0, len(line), 110)]
-        for chunk in chunks:
-            pdf.drawString(40, y, chunk)
-            y -= 14
-            if y < 40:
-                pdf.showPage()
-                y = height - 40
-    pdf.save()
-
-
-def _html_to_text(html_bytes: bytes) -> str:
-    soup = BeautifulSoup(html_bytes, "html.parser")
+def _write_text_pdf(
+    text: str | Iterable[str],
+    output_path: Path,
+    render: RenderOptions = RenderOptions(),
+) -> None:
+    lines = text.splitlines() if isinstance(text, str) else text
+    METRICS.incr("pdf_pages_written_total", render_text_pdf(lines, output_path, render))
+
+
+def _html_to_text(html: bytes | BinaryIO) -> str:
+    soup = BeautifulSoup(html, "html.parser")
     for tag in soup(["script", "style", "noscript"]):
         tag.decompose()
     return soup.get_text("\n", strip=True)
@@ -42,22 +37,83 @@ def _html_to_text(html_bytes: bytes) -> str:
 def normalize_to_pdf(raw_bytes: bytes, output_path: Path) -> None:
     output_path.parent.mkdir(parents=True, exist_ok=True)
     if raw_bytes.startswith(PDF_MAGIC):
-        output_path.write_bytes(raw_bytes)
+        tmp_path = partial_path(output_path)
+        tmp_path.write_bytes(raw_bytes)
+        os.replace(tmp_path, output_path)
         return
 
     text = _html_to_text(raw_bytes)
     if not text:
-        text = "Document downloaded but no readable text was extracted."
+        text = NO_TEXT_PLACEHOLDER
     _write_text_pdf(text, output_path)
 
 
+def is_pdf_file(path: Path) -> bool:
+    with path.open("rb") as handle:
+        return handle.read(len(PDF_MAGIC)) == PDF_MAGIC
+
+
+def _tee_lines(lines: Iterable[str], sidecar: TextIO) -> Iterator[str]:
+    for line in lines:
+        sidecar.write(line)
+        sidecar.write("\n")
+        yield line
+
+
+def normalize_file_to_pdf(
+    raw_path: Path,
+    output_path: Path,
+    extractor: str = "stream",
+    render: RenderOptions = RenderOptions(),
+    text_path: Path | None = None,
+) -> None:
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if is_pdf_file(raw_path):
+        METRICS.incr("documents_normalized_total", source="pdf")
+        os.replace(raw_path, output_path)
+        return
+
+    METRICS.incr("documents_normalized_total", source="html")
+    with raw_path.open("rb") as handle:
+        lines = EXTRACTORS[extractor](handle)
+        first_line = next(lines, None)
+        if first_line is None:
+            _write_text_pdf(NO_TEXT_PLACEHOLDER, output_path, render)
+            return
+        lines = itertools.chain([first_line], lines)
+        # The extracted text is also kept in `text_path` for the search index,
+        # written as the PDF consumes it. Like the PDF it is moved into place,
+        # since an earlier run may have left a hard link to the document store.
+        sidecar_path = partial_path(text_path) if text_path else None
+        try:
+            with sidecar_path.open("w", encoding="utf-8") if sidecar_path else nullcontext() as sidecar:
+                if sidecar is not None:
+                    lines = _tee_lines(lines, sidecar)
+                _write_text_pdf(lines, output_path, render)
+        except BaseException:
+            if sidecar_path is not None:
+                sidecar_path.unlink(missing_ok=True)
+            raise
+        if sidecar_path is not None:
+            os.replace(sidecar_path, text_path)
+
+
+def raw_download_path(output_path: Path) -> Path:
+    return output_path.with_name(f"{output_path.stem}.raw")
+
+
 def download_and_convert(
     sec: SecClient,
     source_url: str,
     output_path: Path,
+    max_bytes: int | None = None,
+    extractor: str = "stream",
 ) -> Path:
-    payload = sec.get_bytes(source_url)
-    normalize_to_pdf(payload, output_path)
+    raw_path = sec.download_to_file(source_url, raw_download_path(output_path), max_bytes=max_bytes)
+    try:
+        normalize_file_to_pdf(raw_path, output_path, extractor)
+    finally:
+        raw_path.unlink(missing_ok=True)
     return output_path
 
 
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from .db import connect
+from .metrics import METRICS
+from .pdf_renderer import RenderOptions
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    source_key TEXT PRIMARY KEY,
+    digest TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    bytes INTEGER NOT NULL,
+    content_type TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS renditions (
+    digest TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (digest, variant)
+);
+CREATE TABLE IF NOT EXISTS links (
+    output_path TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    linked_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS links_blob ON links(digest, variant);
+"""
+
+# A PDF filing is linked as-is; its raw blob is its rendition.
+PASSTHROUGH = ""
+
+
+@dataclass(frozen=True)
+class StoredBlob:
+    digest: str
+    bytes: int
+    content_type: str
+
+
+@dataclass(frozen=True)
+class GcReport:
+    links_dropped: int
+    renditions_removed: int
+    blobs_removed: int
+    bytes_freed: int
+
+
+def source_key(source_url: str) -> str:
+    # EDGAR archive documents are immutable and a co-registrant filing is
+    # served under every filer's CIK, so accession folder plus filename
+    # identifies the document regardless of which CIK path it came from.
+    parts = urlsplit(source_url).path.rstrip("/").split("/")
+    return "/".join(parts[-2:])
+
+
+def render_variant(extractor: str, render: RenderOptions) -> str:
+    return hashlib.sha256(repr((extractor, render)).encode()).hexdigest()[:12]
+
+
+def _file_digest(path: Path) -> str:
+    # hashlib.file_digest needs Python 3.11.
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        while chunk := handle.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _move(source: Path, destination: Path) -> None:
+    try:
+        os.replace(source, destination)
+    except OSError:
+        # The store may sit on another filesystem than the output directory.
+        shutil.move(str(source), str(destination))
+
+
+def _link_or_copy(source: Path, destination: Path) -> Path:
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}")
+    try:
+        os.link(source, temp)
+    except OSError:
+        shutil.copyfile(source, temp)
+    os.replace(temp, destination)
+    return destination
+
+
+# Raw filing payloads and their rendered PDFs, stored once by the SHA-256 of
+# the raw bytes. Output files are hard links into the store (copies when the
+# output directory is on another filesystem), and `links` records which output
+# path points at which blob so gc() can tell what is still referenced.
+class DocumentStore:
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        self._lock = threading.Lock()
+        (root / "tmp").mkdir(parents=True, exist_ok=True)
+        self._db = connect(root / "index.sqlite3")
+        self._db.executescript(_SCHEMA)
+
+    def raw_path(self, digest: str) -> Path:
+        return self.root / "raw" / digest[:2] / digest
+
+    def rendition_path(self, digest: str, variant: str) -> Path:
+        if variant == PASSTHROUGH:
+            return self.raw_path(digest)
+        return self.root / "pdf" / digest[:2] / f"{digest}.{variant}.pdf"
+
+    def text_path(self, digest: str, variant: str) -> Path:
+        return self.rendition_path(digest, variant).with_suffix(".txt")
+
+    def temp_path(self, suffix: str = "") -> Path:
+        return self.root / "tmp" / f"{uuid.uuid4().hex}{suffix}"
+
+    def find(self, source_url: str) -> StoredBlob | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT b.digest, b.bytes, b.content_type FROM sources s JOIN blobs b ON b.digest = s.digest"
+                " WHERE s.source_key = ?",
+                (source_key(source_url),),
+            ).fetchone()
+        if row is None or not self.raw_path(row["digest"]).exists():
+            return None
+        return StoredBlob(row["digest"], row["bytes"], row["content_type"])
+
+    def add_raw(self, source_url: str, path: Path, content_type: str) -> StoredBlob:
+        digest = _file_digest(path)
+        size = path.stat().st_size
+        destination = self.raw_path(digest)
+        if destination.exists():
+            # Same bytes under another URL, e.g. an exhibit refiled by a subsidiary.
+            path.unlink()
+            METRICS.incr("document_store_duplicate_bytes_total", size)
+        else:
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            _move(path, destination)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO blobs (digest, bytes, content_type, created_at) VALUES (?, ?, ?, ?)",
+                (digest, size, content_type, time.time()),
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO sources (source_key, digest) VALUES (?, ?)",
+                (source_key(source_url), digest),
+            )
+        return StoredBlob(digest, size, content_type)
+
+    def has_rendition(self, digest: str, variant: str) -> bool:
+        return self.rendition_path(digest, variant).exists()
+
+    def add_rendition(self, digest: str, variant: str, path: Path, text_path: Path | None = None) -> Path:
+        # Two workers rendering the same blob at once both succeed; the last
+        # os.replace wins and both results are identical.
+        destination = self.rendition_path(digest, variant)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        if text_path is not None and text_path.exists():
+            os.replace(text_path, self.text_path(digest, variant))
+        os.replace(path, destination)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO renditions (digest, variant, bytes, created_at) VALUES (?, ?, ?, ?)",
+                (digest, variant, destination.stat().st_size, time.time()),
+            )
+        return destination
+
+    def link_text(self, output_path: Path, digest: str, variant: str) -> Path | None:
+        # PDF filings and renditions made without a search index have no text.
+        source = self.text_path(digest, variant)
+        if variant == PASSTHROUGH or not source.exists():
+            return None
+        return _link_or_copy(source, output_path)
+
+    def link(self, output_path: Path, digest: str, variant: str) -> Path:
+        _link_or_copy(self.rendition_path(digest, variant), output_path)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO links (output_path, digest, variant, linked_at) VALUES (?, ?, ?, ?)",
+                (str(output_path.resolve()), digest, variant, time.time()),
+            )
+        return output_path
+
+    def gc(self, min_age_seconds: float = 3600.0, dry_run: bool = False) -> GcReport:
+        # A link whose output file is gone no longer references anything. Blobs
+        # younger than `min_age_seconds` are kept so a run that has stored a
+        # document but not linked it yet is left alone.
+        cutoff = time.time() - min_age_seconds
+        with self._lock:
+            links = self._db.execute("SELECT output_path, digest, variant FROM links").fetchall()
+            renditions = self._db.execute(
+                "SELECT digest, variant, bytes, created_at FROM renditions"
+            ).fetchall()
+            blobs = self._db.execute("SELECT digest, bytes, created_at FROM blobs").fetchall()
+        exists = {row["output_path"]: os.path.exists(row["output_path"]) for row in links}
+        dead_links = [path for path, present in exists.items() if not present]
+        live = {(row["digest"], row["variant"]) for row in links if exists[row["output_path"]]}
+        dead_renditions = [
+            row
+            for row in renditions
+            if row["created_at"] < cutoff and (row["digest"], row["variant"]) not in live
+        ]
+        removed = {(row["digest"], row["variant"]) for row in dead_renditions}
+        kept = {digest for digest, _ in live} | {
+            row["digest"] for row in renditions if (row["digest"], row["variant"]) not in removed
+        }
+        dead_blobs = [row for row in blobs if row["created_at"] < cutoff and row["digest"] not in kept]
+        if not dry_run:
+            with self._lock, self._db:
+                self._db.executemany(
+                    "DELETE FROM links WHERE output_path = ?", [(path,) for path in dead_links]
+                )
+                self._db.executemany("DELETE FROM renditions WHERE digest = ? AND variant = ?", removed)
+                dead_digests = [(row["digest"],) for row in dead_blobs]
+                self._db.executemany("DELETE FROM blobs WHERE digest = ?", dead_digests)
+                self._db.executemany("DELETE FROM sources WHERE digest = ?", dead_digests)
+            for digest, variant in removed:
+                self.rendition_path(digest, variant).unlink(missing_ok=True)
+                self.text_path(digest, variant).unlink(missing_ok=True)
+            for row in dead_blobs:
+                self.raw_path(row["digest"]).unlink(missing_ok=True)
+            for temp in (self.root / "tmp").iterdir():
+                if temp.stat().st_mtime < cutoff:
+                    temp.unlink(missing_ok=True)
+        report = GcReport(
+            links_dropped=len(dead_links),
+            renditions_removed=len(dead_renditions),
+            blobs_removed=len(dead_blobs),
+            bytes_freed=sum(row["bytes"] for row in [*dead_renditions, *dead_blobs]),
+        )
+        logging.info(
+            "%s %d stale links, %d renditions and %d raw blobs (%.1f MB) from %s",
+            "Would drop" if dry_run else "Dropped",
+            report.links_dropped,
+            report.renditions_removed,
+            report.blobs_removed,
+            report.bytes_freed / 1_000_000,
+            self.root,
+        )
+        return report
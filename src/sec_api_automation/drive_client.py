@@ -1,34 +1,138 @@
 from __future__ import annotations
 
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
 from google.auth.transport.requests import Request
 from google.oauth2 import service_account
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaFileUpload
 
+from .metrics import METRICS
+
 
 SCOPES = ["https://www.googleapis.com/auth/drive"]
+FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+# Drive rejects batches with more than 100 calls.
+MAX_BATCH_CALLS = 100
+RESUMABLE_THRESHOLD_BYTES = 5 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class DriveFile:
+    file_id: str
+    name: str
+    md5_checksum: str
+
+
+def _quote(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
 
 
 class DriveClient:
-    def __init__(self, credentials: Credentials | service_account.Credentials) -> None:
-        self.service = build("drive", "v3", credentials=credentials, cache_discovery=False)
+    def __init__(
+        self,
+        credentials: Credentials | service_account.Credentials,
+        upload_workers: int = 4,
+        resumable_threshold_bytes: int = RESUMABLE_THRESHOLD_BYTES,
+        api_endpoint: str | None = None,
+    ) -> None:
+        self.credentials = credentials
+        self.api_endpoint = api_endpoint
+        self.upload_workers = max(1, upload_workers)
+        self.resumable_threshold_bytes = resumable_threshold_bytes
+        self._local = threading.local()
+        # Upload threads, and the Drive service each one builds, live as long
+        # as the client; close() shuts them down.
+        self._pool: ThreadPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def service(self) -> Any:
+        # httplib2, which backs googleapiclient, is not thread-safe, so every
+        # thread builds and keeps its own service object.
+        service = getattr(self._local, "service", None)
+        if service is None:
+            if self.api_endpoint:
+                # Media uploads and batches are addressed from the discovery
+                # document's rootUrl, so the endpoint is swapped in there.
+                document = json.loads(get_static_doc("drive", "v3"))
+                document["rootUrl"] = self.api_endpoint.rstrip("/") + "/"
+                service = build_from_document(document, credentials=self.credentials)
+            else:
+                service = build("drive", "v3", credentials=self.credentials, cache_discovery=False)
+            self._local.service = service
+        return service
+
+    def _media(self, file_path: Path) -> MediaFileUpload:
+        resumable = file_path.stat().st_size > self.resumable_threshold_bytes
+        return MediaFileUpload(str(file_path), mimetype="application/pdf", resumable=resumable)
+
+    def _execute(self, operation: str, request: Any, uploaded_bytes: int = 0) -> Any:
+        try:
+            with METRICS.timer("drive_request_seconds", operation=operation):
+                response = request.execute()
+        except HttpError as exc:
+            METRICS.incr("drive_requests_total", operation=operation, status=exc.resp.status)
+            raise
+        METRICS.incr("drive_requests_total", operation=operation, status="ok")
+        if uploaded_bytes:
+            METRICS.incr("drive_bytes_uploaded_total", uploaded_bytes)
+        return response
+
+    def _execute_batch(self, requests: list[Any]) -> list[dict[str, Any] | Exception]:
+        # Returns each call's response, or the exception it failed with, in
+        # request order. A failed call does not undo the others in its batch,
+        # so callers keep what succeeded and only retry the failures.
+        results: dict[str, dict[str, Any] | Exception] = {}
+
+        def collect(request_id: str, response: dict[str, Any], exception: Exception | None) -> None:
+            results[request_id] = response if exception is None else exception
+
+        for start in range(0, len(requests), MAX_BATCH_CALLS):
+            chunk = requests[start : start + MAX_BATCH_CALLS]
+            batch = self.service.new_batch_http_request(callback=collect)
+            for index, request in enumerate(chunk, start):
+                batch.add(request, request_id=str(index))
+            try:
+                self._execute("batch", batch)
+            except HttpError as exc:
+                for index in range(start, start + len(chunk)):
+                    results.setdefault(str(index), exc)
+            METRICS.incr("drive_batched_calls_total", len(chunk))
+        failed = sum(isinstance(result, Exception) for result in results.values())
+        if failed:
+            METRICS.incr("drive_batched_calls_failed_total", failed)
+        return [results[str(index)] for index in range(len(requests))]
 
     @classmethod
-    def from_service_account(cls, credentials_path: Path) -> "DriveClient":
+    def from_service_account(
+        cls,
+        credentials_path: Path,
+        upload_workers: int = 4,
+        api_endpoint: str | None = None,
+    ) -> "DriveClient":
         credentials = service_account.Credentials.from_service_account_file(
             str(credentials_path), scopes=SCOPES
         )
-        return cls(credentials=credentials)
+        return cls(credentials=credentials, upload_workers=upload_workers, api_endpoint=api_endpoint)
 
     @classmethod
     def from_oauth(
         cls,
         client_secrets_path: Path,
         token_path: Path,
+        upload_workers: int = 4,
+        api_endpoint: str | None = None,
     ) -> "DriveClient":
         creds: Credentials | None = None
         if token_path.exists():
@@ -42,7 +146,7 @@ class DriveClient:
 
         token_path.parent.mkdir(parents=True, exist_ok=True)
         token_path.write_text(creds.to_json(), encoding="utf-8")
-        return cls(credentials=creds)
+        return cls(credentials=creds, upload_workers=upload_workers, api_endpoint=api_endpoint)
 
     def create_company_folder(
         self,
@@ -51,40 +155,170 @@ class DriveClient:
     ) -> tuple[str, str]:
         metadata: dict[str, str | list[str]] = {
             "name": folder_name,
-            "mimeType": "application/vnd.google-apps.folder",
+            "mimeType": FOLDER_MIME_TYPE,
         }
         if parent_folder_id:
             metadata["parents"] = [parent_folder_id]
-        folder = (
-            self.service.files()
-            .create(body=metadata, fields="id,webViewLink", supportsAllDrives=True)
-            .execute()
+        folder = self._execute(
+            "create_folder",
+            self.service.files().create(body=metadata, fields="id,webViewLink", supportsAllDrives=True),
         )
         folder_id = folder["id"]
+        self._execute("share_folder", self._share_request(folder_id))
+
+        folder_link = folder.get("webViewLink") or f"https://drive.google.com/drive/folders/{folder_id}"
+        return folder_id, folder_link
 
-        self.service.permissions().create(
+    def _share_request(self, folder_id: str) -> Any:
+        return self.service.permissions().create(
             fileId=folder_id,
             body={"type": "anyone", "role": "reader"},
             supportsAllDrives=True,
-        ).execute()
+        )
 
-        folder_link = folder.get("webViewLink") or f"https://drive.google.com/drive/folders/{folder_id}"
-        return folder_id, folder_link
+    def find_folder(self, folder_name: str, parent_folder_id: str | None = None) -> tuple[str, str] | None:
+        query = f"name = {_quote(folder_name)} and mimeType = {_quote(FOLDER_MIME_TYPE)} and trashed = false"
+        if parent_folder_id:
+            query += f" and {_quote(parent_folder_id)} in parents"
+        response = self._execute(
+            "find_folder",
+            self.service.files().list(
+                q=query,
+                fields="files(id,webViewLink)",
+                orderBy="createdTime",
+                pageSize=1,
+                supportsAllDrives=True,
+                includeItemsFromAllDrives=True,
+            ),
+        )
+        files = response.get("files", [])
+        if not files:
+            return None
+        folder_id = files[0]["id"]
+        return folder_id, files[0].get("webViewLink") or f"https://drive.google.com/drive/folders/{folder_id}"
+
+    def list_folder_files(self, folder_id: str) -> dict[str, DriveFile]:
+        files: dict[str, DriveFile] = {}
+        page_token: str | None = None
+        while True:
+            response = self._execute(
+                "list_files",
+                self.service.files().list(
+                    q=f"{_quote(folder_id)} in parents and trashed = false",
+                    fields="nextPageToken,files(id,name,md5Checksum)",
+                    orderBy="createdTime",
+                    pageSize=1000,
+                    pageToken=page_token,
+                    supportsAllDrives=True,
+                    includeItemsFromAllDrives=True,
+                ),
+            )
+            for item in response.get("files", []):
+                # Keep the oldest file when a name is duplicated.
+                files.setdefault(
+                    item["name"],
+                    DriveFile(item["id"], item["name"], item.get("md5Checksum", "")),
+                )
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                return files
+
+    def create_company_folders(
+        self,
+        folder_names: list[str],
+        parent_folder_id: str | None = None,
+    ) -> list[tuple[str, str] | None]:
+        # None marks a folder whose create call failed; the caller creates
+        # that one on its own later. Folders that were created are always
+        # returned, so none is left behind to be created twice.
+        if not folder_names:
+            return []
+        files = self.service.files()
+        created = self._execute_batch(
+            [
+                files.create(
+                    body={
+                        "name": name,
+                        "mimeType": FOLDER_MIME_TYPE,
+                        **({"parents": [parent_folder_id]} if parent_folder_id else {}),
+                    },
+                    fields="id,webViewLink",
+                    supportsAllDrives=True,
+                )
+                for name in folder_names
+            ]
+        )
+        folders = [None if isinstance(result, Exception) else result for result in created]
+        for name, result in zip(folder_names, created):
+            if isinstance(result, Exception):
+                logging.warning("Batched create of Drive folder %r failed: %s", name, result)
+        made = [folder for folder in folders if folder is not None]
+        shared = self._execute_batch([self._share_request(folder["id"]) for folder in made])
+        for folder, result in zip(made, shared):
+            if isinstance(result, Exception):
+                # Sharing is safe to repeat, so a failed grant is retried on its own.
+                try:
+                    self._execute("share_folder", self._share_request(folder["id"]))
+                except HttpError as exc:
+                    logging.warning("Drive folder %s was created but not shared: %s", folder["id"], exc)
+        return [
+            (
+                folder["id"],
+                folder.get("webViewLink") or f"https://drive.google.com/drive/folders/{folder['id']}",
+            )
+            if folder is not None
+            else None
+            for folder in folders
+        ]
 
-    def upload_file(self, folder_id: str, file_path: Path) -> str:
+    def upload_file(self, folder_id: str, file_path: Path) -> tuple[str, str]:
         metadata = {
             "name": file_path.name,
             "parents": [folder_id],
         }
-        media = MediaFileUpload(str(file_path), mimetype="application/pdf", resumable=True)
-        upload = (
-            self.service.files()
-            .create(
+        media = self._media(file_path)
+        upload = self._execute(
+            "upload",
+            self.service.files().create(
                 body=metadata,
                 media_body=media,
                 fields="id,webViewLink",
                 supportsAllDrives=True,
-            )
-            .execute()
+            ),
+            uploaded_bytes=media.size(),
+        )
+        return upload["id"], upload.get("webViewLink", "")
+
+    def _upload_pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.upload_workers, thread_name_prefix="drive-upload"
+                )
+            return self._pool
+
+    def upload_files(self, folder_id: str, file_paths: list[Path]) -> list[tuple[str, str]]:
+        if len(file_paths) <= 1 or self.upload_workers == 1:
+            return [self.upload_file(folder_id, path) for path in file_paths]
+        return list(self._upload_pool().map(lambda path: self.upload_file(folder_id, path), file_paths))
+
+    def close(self) -> None:
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+    def update_file(self, file_id: str, file_path: Path) -> tuple[str, str]:
+        media = self._media(file_path)
+        updated = self._execute(
+            "update",
+            self.service.files().update(
+                fileId=file_id,
+                body={"name": file_path.name},
+                media_body=media,
+                fields="id,webViewLink",
+                supportsAllDrives=True,
+            ),
+            uploaded_bytes=media.size(),
         )
-        return upload.get("webViewLink", "")
+        return updated["id"], updated.get("webViewLink", "")
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from pathlib import Path
+
+from googleapiclient.errors import HttpError
+
+from .db import connect
+from .drive_client import DriveClient, DriveFile
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    parent_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    folder_id TEXT NOT NULL,
+    folder_link TEXT NOT NULL,
+    PRIMARY KEY (parent_id, name)
+);
+"""
+
+MD5_CHUNK_BYTES = 1024 * 1024
+
+
+def file_md5(path: Path) -> str:
+    digest = hashlib.md5()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(MD5_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DriveFolderCache:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = connect(path)
+        self._db.executescript(_SCHEMA)
+
+    def get(self, name: str, parent_id: str | None) -> tuple[str, str] | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT folder_id, folder_link FROM folders WHERE parent_id = ? AND name = ?",
+                (parent_id or "", name),
+            ).fetchone()
+        return (row["folder_id"], row["folder_link"]) if row else None
+
+    def put(self, name: str, parent_id: str | None, folder_id: str, folder_link: str) -> None:
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO folders (parent_id, name, folder_id, folder_link) VALUES (?, ?, ?, ?)",
+                (parent_id or "", name, folder_id, folder_link),
+            )
+
+    def forget(self, folder_id: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM folders WHERE folder_id = ?", (folder_id,))
+
+
+class DriveSync:
+    def __init__(self, drive: DriveClient, cache: DriveFolderCache) -> None:
+        self.drive = drive
+        self.cache = cache
+        # A folder created by this run is known to be empty on its first sync, so it is not listed.
+        self._created: set[str] = set()
+        self._folder_locks: dict[tuple[str, str | None], threading.Lock] = {}
+        self._folder_locks_lock = threading.Lock()
+
+    def find_folder(self, name: str, parent_id: str | None) -> tuple[str, str] | None:
+        folder = self.cache.get(name, parent_id)
+        if folder is None:
+            folder = self.drive.find_folder(name, parent_id)
+            if folder is not None:
+                self.cache.put(name, parent_id, *folder)
+        return folder
+
+    def remember_folder(
+        self,
+        name: str,
+        parent_id: str | None,
+        folder_id: str,
+        folder_link: str,
+        created: bool = False,
+    ) -> None:
+        self.cache.put(name, parent_id, folder_id, folder_link)
+        if created:
+            self._created.add(folder_id)
+
+    def company_folder(self, name: str, parent_id: str | None) -> tuple[str, str]:
+        # Backfill year chunks of one company upload on different threads. The
+        # lookup and the create share a per-folder lock, so only the first of
+        # them creates the folder and the rest find it.
+        with self._folder_locks_lock:
+            lock = self._folder_locks.setdefault((name, parent_id), threading.Lock())
+        with lock:
+            folder = self.find_folder(name, parent_id)
+            if folder is None:
+                folder = self.drive.create_company_folder(name, parent_folder_id=parent_id)
+                self.remember_folder(name, parent_id, *folder, created=True)
+        return folder
+
+    def _remote_files(
+        self,
+        name: str,
+        parent_id: str | None,
+        folder: tuple[str, str],
+    ) -> tuple[tuple[str, str], dict[str, DriveFile]]:
+        if folder[0] in self._created:
+            self._created.discard(folder[0])
+            return folder, {}
+        try:
+            return folder, self.drive.list_folder_files(folder[0])
+        except HttpError as exc:
+            if exc.resp.status != 404:
+                raise
+        logging.info("Drive folder %s is gone, looking it up again", folder[0])
+        self.cache.forget(folder[0])
+        folder = self.company_folder(name, parent_id)
+        return folder, self.drive.list_folder_files(folder[0])
+
+    def sync_files(
+        self,
+        name: str,
+        parent_id: str | None,
+        folder: tuple[str, str],
+        paths: list[Path],
+    ) -> tuple[tuple[str, str], dict[Path, str]]:
+        folder, remote = self._remote_files(name, parent_id, folder)
+        file_ids: dict[Path, str] = {}
+        new_paths: list[Path] = []
+        updated = 0
+        for path in paths:
+            existing = remote.get(path.name)
+            if existing is None:
+                new_paths.append(path)
+            elif existing.md5_checksum == file_md5(path):
+                file_ids[path] = existing.file_id
+            else:
+                file_ids[path], _ = self.drive.update_file(existing.file_id, path)
+                updated += 1
+        for path, (file_id, _) in zip(new_paths, self.drive.upload_files(folder[0], new_paths)):
+            file_ids[path] = file_id
+        logging.info(
+            "Drive sync folder=%s: %d new, %d updated, %d unchanged",
+            name,
+            len(new_paths),
+            updated,
+            len(paths) - len(new_paths) - updated,
+        )
+        return folder, file_ids
@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import io
+import itertools
+import logging
 import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any
+from typing import Any, Callable, Iterator
 
+import requests
+
+from .document_builder import PDF_MAGIC
 from .sec_client import FilingMeta, SecClient
+from .text_extraction import iter_text_lines
 
 
 EX99_PATTERN = re.compile(r"(exhibit|ex)[-_]?99([._-]?\d+)?", re.IGNORECASE)
@@ -12,6 +20,38 @@ EARNINGS_HINT_PATTERN = re.compile(
     r"(earnings|results|quarterly|q[1-4]|presentation|slides|conference|transcript)",
     re.IGNORECASE,
 )
+# 8-K item codes: 2.02 Results of Operations, 7.01 Regulation FD, 9.01 Exhibits.
+RESULTS_ITEM = "2.02"
+REG_FD_ITEM = "7.01"
+EXHIBITS_ITEM = "9.01"
+PREFETCH_INDEXES = 3
+
+# Exhibit probes read the first few KB of an EX-99 whose filename does not say
+# what it is (ex991.htm) and score its title and headings.
+PROBE_BYTES = 8 * 1024
+MAX_PROBES = 4
+PROBE_TEXT_LINES = 40
+CONFIDENT_SCORE = 5
+LARGE_EXHIBIT_BYTES = 100 * 1024
+DECK_TEXT_PATTERN = re.compile(
+    r"(investor presentation|earnings presentation|supplemental (slides|presentation)|\bslides?\b)",
+    re.IGNORECASE,
+)
+TRANSCRIPT_TEXT_PATTERN = re.compile(
+    r"(\btranscript\b|\boperator:|prepared remarks|question[- ]and[- ]answer)",
+    re.IGNORECASE,
+)
+PRESS_RELEASE_PATTERN = re.compile(
+    r"(press release|for immediate release|\bannounces\b|\breports (first|second|third|fourth|full[- ]year))",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class ExhibitProbe:
+    size: int
+    is_pdf: bool
+    text: str
 
 
 @dataclass
@@ -42,7 +82,22 @@ def extract_ex99_filenames(index_json: dict[str, Any]) -> list[str]:
     return names
 
 
-def _score_deck(name: str) -> int:
+def extract_exhibit_sizes(index_json: dict[str, Any]) -> dict[str, int]:
+    sizes: dict[str, int] = {}
+    for entry in index_json.get("directory", {}).get("item", []):
+        size = str(entry.get("size") or "").strip()
+        sizes[entry.get("name", "")] = int(size) if size.isdigit() else 0
+    return sizes
+
+
+def probe_from_head(head: bytes, size: int) -> ExhibitProbe:
+    if head.startswith(PDF_MAGIC):
+        return ExhibitProbe(size=size, is_pdf=True, text="")
+    lines = itertools.islice(iter_text_lines(io.BytesIO(head)), PROBE_TEXT_LINES)
+    return ExhibitProbe(size=size, is_pdf=False, text="\n".join(lines))
+
+
+def _score_deck(name: str, probe: ExhibitProbe | None = None) -> int:
     name_lower = name.lower()
     score = 0
     if any(token in name_lower for token in ["deck", "slides", "presentation"]):
@@ -51,10 +106,19 @@ def _score_deck(name: str) -> int:
         score += 2
     if any(token in name_lower for token in ["transcript", "conference", "call"]):
         score -= 5
+    if probe is not None:
+        if probe.is_pdf:
+            score += 2
+        if DECK_TEXT_PATTERN.search(probe.text):
+            score += 5
+        if TRANSCRIPT_TEXT_PATTERN.search(probe.text):
+            score -= 5
+        if PRESS_RELEASE_PATTERN.search(probe.text):
+            score -= 6
     return score
 
 
-def _score_transcript(name: str) -> int:
+def _score_transcript(name: str, probe: ExhibitProbe | None = None) -> int:
     name_lower = name.lower()
     score = 0
     if any(token in name_lower for token in ["transcript", "conference", "call", "prepared"]):
@@ -63,42 +127,143 @@ def _score_transcript(name: str) -> int:
         score += 1
     if any(token in name_lower for token in ["deck", "slides", "presentation"]):
         score -= 5
+    if probe is not None:
+        if TRANSCRIPT_TEXT_PATTERN.search(probe.text):
+            score += 5
+        if DECK_TEXT_PATTERN.search(probe.text):
+            score -= 5
+        if PRESS_RELEASE_PATTERN.search(probe.text):
+            score -= 6
+        if not probe.is_pdf and probe.size >= LARGE_EXHIBIT_BYTES:
+            score += 1
     return score
 
 
-def _pick_best(candidates: list[str], scorer) -> str | None:
+def _pick_best(
+    candidates: list[str],
+    scorer: Callable[[str, ExhibitProbe | None], int],
+    probes: dict[str, ExhibitProbe],
+) -> str | None:
     if not candidates:
         return None
-    ranked = sorted(((scorer(name), name) for name in candidates), reverse=True)
+    ranked = sorted(((scorer(name, probes.get(name)), name) for name in candidates), reverse=True)
     best_score, best_name = ranked[0]
     if best_score < 1:
         return None
     return best_name
 
 
+def _earnings_candidates(index_json: dict[str, Any]) -> list[str]:
+    ex99_files = extract_ex99_filenames(index_json)
+    earnings_candidates = [name for name in ex99_files if EARNINGS_HINT_PATTERN.search(name)]
+    return earnings_candidates or ex99_files
+
+
+def exhibits_to_probe(index_json: dict[str, Any]) -> list[str]:
+    candidates = _earnings_candidates(index_json)
+    if all(
+        any(scorer(name) >= CONFIDENT_SCORE for name in candidates)
+        for scorer in (_score_deck, _score_transcript)
+    ):
+        return []
+    unclear = [
+        name
+        for name in candidates
+        if max(_score_deck(name), _score_transcript(name)) < CONFIDENT_SCORE
+    ]
+    return unclear[:MAX_PROBES]
+
+
+def select_earnings_exhibits(
+    filing: FilingMeta,
+    index_json: dict[str, Any],
+    probes: dict[str, ExhibitProbe] | None = None,
+) -> EarningsExhibits | None:
+    candidates = _earnings_candidates(index_json)
+    if not candidates:
+        return None
+
+    deck = _pick_best(candidates, _score_deck, probes or {})
+    transcript = _pick_best(candidates, _score_transcript, probes or {})
+
+    if deck and transcript == deck:
+        transcript = None
+
+    return EarningsExhibits(
+        filing=filing,
+        deck_filename=deck,
+        transcript_filename=transcript,
+    )
+
+
+def _earnings_rank(filing: FilingMeta) -> int | None:
+    if not filing.items:
+        return 2
+    if RESULTS_ITEM in filing.items:
+        return 0
+    if REG_FD_ITEM in filing.items:
+        return 1
+    if EXHIBITS_ITEM in filing.items:
+        return 3
+    # Without Item 9.01 the filing carries no exhibits, so there is no EX-99 to find.
+    return None
+
+
+def rank_earnings_candidates(eight_ks: list[FilingMeta]) -> list[FilingMeta]:
+    ranked = [(rank, filing) for filing in eight_ks if (rank := _earnings_rank(filing)) is not None]
+    # sorted() is stable, so filings keep their newest-first order within a rank.
+    return [filing for _, filing in sorted(ranked, key=lambda item: item[0])]
+
+
+def candidate_batches(
+    candidates: list[FilingMeta],
+    prefetch: int = PREFETCH_INDEXES,
+) -> Iterator[list[FilingMeta]]:
+    start = 0
+    while start < len(candidates):
+        # An Item 2.02 filing almost always carries the earnings exhibits, so it is
+        # fetched on its own; anything less certain is fetched a few at a time.
+        size = 1 if start == 0 and RESULTS_ITEM in candidates[0].items else max(1, prefetch)
+        yield candidates[start : start + size]
+        start += size
+
+
 def identify_latest_earnings_8k(
     sec: SecClient,
     cik: str,
     eight_ks: list[FilingMeta],
+    prefetch: int = PREFETCH_INDEXES,
 ) -> EarningsExhibits | None:
-    for filing in eight_ks:
-        index_json = sec.get_filing_index(cik=cik, accession=filing.accession)
-        ex99_files = extract_ex99_filenames(index_json)
-        if not ex99_files:
-            continue
-
-        earnings_candidates = [name for name in ex99_files if EARNINGS_HINT_PATTERN.search(name)]
-        candidates = earnings_candidates or ex99_files
+    def fetch_index(filing: FilingMeta) -> dict[str, Any]:
+        return sec.get_filing_index(cik=cik, accession=filing.accession)
 
-        deck = _pick_best(candidates, _score_deck)
-        transcript = _pick_best(candidates, _score_transcript)
+    for batch in candidate_batches(rank_earnings_candidates(eight_ks), prefetch):
+        if len(batch) == 1:
+            indexes = [fetch_index(batch[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=len(batch)) as pool:
+                indexes = list(pool.map(fetch_index, batch))
+        for filing, index_json in zip(batch, indexes):
+            if extract_ex99_filenames(index_json):
+                probes = probe_exhibits(sec, cik, filing, index_json)
+                return select_earnings_exhibits(filing, index_json, probes)
+    return None
 
-        if deck and transcript == deck:
-            transcript = None
 
-        return EarningsExhibits(
-            filing=filing,
-            deck_filename=deck,
-            transcript_filename=transcript,
-        )
-    return None
+def probe_exhibits(
+    sec: SecClient,
+    cik: str,
+    filing: FilingMeta,
+    index_json: dict[str, Any],
+) -> dict[str, ExhibitProbe]:
+    sizes = extract_exhibit_sizes(index_json)
+    probes: dict[str, ExhibitProbe] = {}
+    for name in exhibits_to_probe(index_json):
+        url = sec.sec_archive_url(cik, filing.accession, name)
+        try:
+            head = sec.get_head(url, PROBE_BYTES)
+        except requests.RequestException as exc:
+            logging.warning("Could not probe %s: %s", url, exc)
+            continue
+        probes[name] = probe_from_head(head, sizes.get(name, 0))
+    return probes
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import bisect
+import heapq
+from datetime import date, timedelta
+from typing import Any, Callable, Iterable
+
+from .sec_client import FilingMeta, parse_items
+
+
+COLUMNS = ("form", "filingDate", "accessionNumber", "primaryDocument", "items")
+
+PageLoader = Callable[[str], "dict[str, Any] | None"]
+
+# latest() only reads paged history back this far. Without a bound a 20-F
+# filer asked for its 10-K would load every page it has.
+LATEST_LOOKBACK_DAYS = 2 * 365
+
+
+# Submissions filings kept as the parallel column lists from the JSON, with a
+# per-form row index. Rows only become FilingMeta when a query returns them, and
+# the paged history in filings.files is merged in, newest page first, as far
+# back as a query needs it.
+class FilingTable:
+    __slots__ = ("_columns", "_by_form", "_dates_by_form", "_pages", "_page_loader")
+
+    def __init__(
+        self,
+        columns: dict[str, list[Any]],
+        pages: list[tuple[str, str]] | None = None,
+        page_loader: PageLoader | None = None,
+    ) -> None:
+        self._columns = columns
+        self._pages = list(pages or [])
+        self._page_loader = page_loader
+        self._by_form: dict[str, list[int]] = {}
+        self._dates_by_form: dict[str, list[str]] = {}
+        self._build_index()
+
+    @classmethod
+    def from_submissions(
+        cls,
+        submissions: dict[str, Any],
+        page_loader: PageLoader | None = None,
+    ) -> "FilingTable":
+        filings = submissions.get("filings", {})
+        recent = filings.get("recent", {})
+        # Each page is (name, filingTo); filingTo lets a page that is too old be
+        # skipped without fetching it.
+        pages = [
+            (page["name"], page.get("filingTo") or "")
+            for page in filings.get("files", [])
+            if page.get("name")
+        ]
+        return cls(_columns_from(recent), pages, page_loader)
+
+    def __len__(self) -> int:
+        return len(self._columns["form"])
+
+    def _build_index(self) -> None:
+        dates = self._columns["filingDate"]
+        rows_by_form: dict[str, list[int]] = {}
+        for row, form in enumerate(self._columns["form"]):
+            rows_by_form.setdefault(form, []).append(row)
+        # Rows are kept oldest-first so bisect can answer date-range queries;
+        # the latest filing of a form is the last row. EDGAR lists filings
+        # newest-first, so among filings of one day the lower row is newer.
+        for rows in rows_by_form.values():
+            rows.sort(key=lambda row: (dates[row], -row))
+        self._by_form = rows_by_form
+        self._dates_by_form = {form: [dates[row] for row in rows] for form, rows in rows_by_form.items()}
+
+    def _load_pages(self, since: str) -> bool:
+        # Pages run newest to oldest, so loading stops at the first page that
+        # reaches back before `since`.
+        if not self._pages or self._page_loader is None or self._earliest_date() < since:
+            return False
+        loaded = False
+        while self._pages:
+            name, filing_to = self._pages[0]
+            if filing_to and filing_to < since:
+                break
+            del self._pages[0]
+            page = self._page_loader(name)
+            if not page:
+                continue
+            extra = _columns_from(page)
+            for column in COLUMNS:
+                self._columns[column] = self._columns[column] + extra[column]
+            loaded = True
+            if min(extra["filingDate"], default=since) < since:
+                break
+        if loaded:
+            self._build_index()
+        return loaded
+
+    def _meta(self, row: int) -> FilingMeta:
+        columns = self._columns
+        return FilingMeta(
+            form=columns["form"][row],
+            filing_date=columns["filingDate"][row],
+            accession=columns["accessionNumber"][row],
+            primary_document=columns["primaryDocument"][row],
+            items=parse_items(columns["items"][row]),
+        )
+
+    def _latest_loaded(self, form: str, include_amendments: bool) -> FilingMeta | None:
+        rows = self._by_form.get(form)
+        if rows:
+            return self._meta(rows[-1])
+        amended = self._by_form.get(f"{form}/A") if include_amendments else None
+        return self._meta(amended[-1]) if amended else None
+
+    def latest(self, form: str, include_amendments: bool = True) -> FilingMeta | None:
+        filing = self._latest_loaded(form, include_amendments)
+        since = (date.today() - timedelta(days=LATEST_LOOKBACK_DAYS)).isoformat()
+        if filing is None and self._load_pages(since):
+            filing = self._latest_loaded(form, include_amendments)
+        return filing
+
+    def filings(self, forms: Iterable[str]) -> list[FilingMeta]:
+        per_form = [reversed(self._by_form.get(form, [])) for form in set(forms)]
+        return [self._meta(row) for row in heapq.merge(*per_form, key=self._newest_first, reverse=True)]
+
+    def between(self, forms: Iterable[str], start: str, end: str = "9999-12-31") -> list[FilingMeta]:
+        forms = set(forms)
+        self._load_pages(start)
+        per_form = []
+        for form in forms:
+            form_dates = self._dates_by_form.get(form, [])
+            low = bisect.bisect_left(form_dates, start)
+            high = bisect.bisect_right(form_dates, end)
+            per_form.append(reversed(self._by_form[form][low:high]) if high > low else iter(()))
+        return [self._meta(row) for row in heapq.merge(*per_form, key=self._newest_first, reverse=True)]
+
+    def _newest_first(self, row: int) -> tuple[str, int]:
+        # The row index sort key, so merging forms keeps list_filings' order.
+        return self._columns["filingDate"][row], -row
+
+    def _earliest_date(self) -> str:
+        return min((dates[0] for dates in self._dates_by_form.values() if dates), default="9999-12-31")
+
+
+def _columns_from(block: dict[str, Any]) -> dict[str, list[Any]]:
+    size = len(block.get("form", []))
+    columns: dict[str, list[Any]] = {}
+    for column in COLUMNS:
+        values = block.get(column) or []
+        # Older submissions payloads omit some columns, so pad them to the row count.
+        columns[column] = values if len(values) == size else list(values[:size]) + [""] * (size - len(values))
+    return columns
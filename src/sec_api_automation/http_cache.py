@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Mapping
+
+from .db import connect
+
+
+DEFAULT_TTL_SECONDS = {
+    "company_tickers": 24 * 3600.0,
+    "submissions": 6 * 3600.0,
+    "xbrl": 24 * 3600.0,
+    "other": 0.0,
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_digest ON entries(digest);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at);
+"""
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    url: str
+    endpoint: str
+    digest: str
+    size: int
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+
+class HttpCache:
+    def __init__(
+        self,
+        root: Path,
+        max_bytes: int = 2 * 1024**3,
+        ttl_seconds: Mapping[str, float] | None = None,
+    ) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.ttl_seconds = {**DEFAULT_TTL_SECONDS, **(ttl_seconds or {})}
+        self._lock = threading.Lock()
+        self._db = connect(root / "index.sqlite3")
+        self._db.executescript(_SCHEMA)
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / digest
+
+    def lookup(self, url: str) -> CacheEntry | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, endpoint, digest, size, etag, last_modified, fetched_at"
+                " FROM entries WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None or not self._blob_path(row["digest"]).exists():
+            return None
+        return CacheEntry(**dict(row))
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        if entry.endpoint == "archives":
+            return True
+        ttl = self.ttl_seconds.get(entry.endpoint, self.ttl_seconds["other"])
+        return time.time() - entry.fetched_at < ttl
+
+    def conditional_headers(self, entry: CacheEntry | None) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def read(self, entry: CacheEntry) -> bytes:
+        payload = self._blob_path(entry.digest).read_bytes()
+        self._touch(entry)
+        return payload
+
+    def read_head(self, entry: CacheEntry, num_bytes: int) -> bytes:
+        # Sniffing a cached document only needs its first bytes, not the blob.
+        with self._blob_path(entry.digest).open("rb") as handle:
+            head = handle.read(num_bytes)
+        self._touch(entry)
+        return head
+
+    def mark_revalidated(self, entry: CacheEntry) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE entries SET fetched_at = ? WHERE url = ?",
+                (time.time(), entry.url),
+            )
+            self._db.commit()
+
+    def revalidated(self, entry: CacheEntry) -> bytes:
+        self.mark_revalidated(entry)
+        return self.read(entry)
+
+    def copy_to(self, entry: CacheEntry, output_path: Path) -> Path:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(self._blob_path(entry.digest), output_path)
+        self._touch(entry)
+        return output_path
+
+    def _touch(self, entry: CacheEntry) -> None:
+        with self._lock:
+            self._db.execute(
+                "UPDATE entries SET accessed_at = ? WHERE url = ?",
+                (time.time(), entry.url),
+            )
+            self._db.commit()
+
+    def store(
+        self,
+        url: str,
+        endpoint: str,
+        payload: bytes,
+        headers: Mapping[str, str],
+    ) -> None:
+        digest = hashlib.sha256(payload).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not blob_path.exists():
+            tmp_path = self._blob_tmp_path(digest)
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, blob_path)
+        self._record(url, endpoint, digest, len(payload), headers)
+
+    def store_file(
+        self,
+        url: str,
+        endpoint: str,
+        path: Path,
+        headers: Mapping[str, str],
+    ) -> None:
+        hasher = hashlib.sha256()
+        with path.open("rb") as handle:
+            for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        blob_path = self._blob_path(digest)
+        if not blob_path.exists():
+            tmp_path = self._blob_tmp_path(digest)
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, blob_path)
+        self._record(url, endpoint, digest, path.stat().st_size, headers)
+
+    def _blob_tmp_path(self, digest: str) -> Path:
+        blob_path = self._blob_path(digest)
+        blob_path.parent.mkdir(parents=True, exist_ok=True)
+        return blob_path.with_name(f"{digest}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    def _record(
+        self,
+        url: str,
+        endpoint: str,
+        digest: str,
+        size: int,
+        headers: Mapping[str, str],
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            previous = self._db.execute(
+                "SELECT digest FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries"
+                " (url, endpoint, digest, size, etag, last_modified, fetched_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    endpoint,
+                    digest,
+                    size,
+                    headers.get("ETag"),
+                    headers.get("Last-Modified"),
+                    now,
+                    now,
+                ),
+            )
+            if previous and previous["digest"] != digest:
+                self._drop_blob_if_unreferenced(previous["digest"])
+            self._evict()
+            self._db.commit()
+
+    def _drop_blob_if_unreferenced(self, digest: str) -> int:
+        still_used = self._db.execute(
+            "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)
+        ).fetchone()
+        blob_path = self._blob_path(digest)
+        if still_used or not blob_path.exists():
+            return 0
+        size = blob_path.stat().st_size
+        blob_path.unlink()
+        return size
+
+    def _total_bytes(self) -> int:
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) AS total"
+            " FROM (SELECT digest, MAX(size) AS size FROM entries GROUP BY digest)"
+        ).fetchone()
+        return int(row["total"])
+
+    def _evict(self) -> None:
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute(
+            "SELECT url, digest FROM entries ORDER BY accessed_at ASC"
+        ).fetchall()
+        for row in rows:
+            if total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM entries WHERE url = ?", (row["url"],))
+            total -= self._drop_blob_if_unreferenced(row["digest"])
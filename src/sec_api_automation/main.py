@@ -1,29 +1,343 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import csv
 import logging
+import os
+import socket
+import sqlite3
+import sys
+import time
+from contextlib import nullcontext
+from datetime import date
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Mapping
 
-from .config import AppConfig
-from .document_builder import download_optional
+from .backfill import BackfillCheckpoint
+from .bulk_submissions import SubmissionsArchive, ensure_bulk_archive, ensure_bulk_submissions
+from .config import AppConfig, SecConfig
+from .conversion import ConversionExecutor
+from .daily_index import DailyIndexWatcher
+from .document_store import DocumentStore
 from .drive_client import DriveClient
-from .filing_selector import find_latest_form, identify_latest_earnings_8k
-from .reporting import CompanyResult, append_result, read_completed_tickers
-from .sec_client import SecClient, list_filings
+from .drive_sync import DriveFolderCache, DriveSync
+from .http_cache import HttpCache
+from .metrics import METRICS, SlowestProfiles
+from .pdf_renderer import PAGE_SIZES, RenderOptions
+from .pipeline import PipelineSettings, run_backfill_pipeline, run_pipeline
+from .reference_store import TickerReferenceStore
+from .reporting import CompanyResult, merge_results, worker_results_path, write_results
+from .results_store import ResultStore, load_results, store_path
+from .search_index import SearchIndex, SearchIndexer
+from .sec_client import SecClient
+from .state_store import StateStore
+from .text_extraction import EXTRACTORS
+from .work_queue import LeaseKeeper, WorkQueue
+from .xbrl_financials import (
+    COMPANYFACTS_ZIP_URL,
+    DEFAULT_CONCEPTS,
+    collect_companyfacts,
+    collect_frames,
+    default_periods,
+    load_concepts,
+    write_financials,
+)
+from .stages import (
+    CompanyJob,
+    StageOptions,
+    convert_documents,
+    download_documents,
+    failed_result,
+    resolve_company,
+    upload_documents,
+)
 
 
 def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="SEC filing to Google Drive automation")
+    parser = argparse.ArgumentParser(
+        description="SEC filing to Google Drive automation",
+        epilog="Run 'sec-api-automation merge --help' to combine the result CSVs of --queue workers.",
+    )
     parser.add_argument(
         "--tickers-csv",
-        required=True,
-        help="CSV containing ticker column; company_name is optional",
+        help="CSV containing ticker column; company_name is optional (may be omitted with --queue)",
     )
     parser.add_argument("--output-dir", default="output", help="Directory for local PDFs and result CSV")
     parser.add_argument("--result-csv", default="results.csv", help="Result CSV filename within output dir")
-    parser.add_argument("--resume", action="store_true", help="Skip tickers already present in result CSV")
-    return parser.parse_args()
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip tickers already finished in the results store; failed and partial ones run again",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only re-download and re-upload documents whose accession changed since the last run",
+    )
+    parser.add_argument(
+        "--since",
+        type=iso_date,
+        default=None,
+        metavar="YYYY-MM-DD",
+        help="Backfill every 10-K, 10-Q and earnings exhibit filed on or after this date (resumable)",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Only run tickers that filed a 10-K, 10-Q or 8-K since the last --watch run (EDGAR daily index)",
+    )
+    parser.add_argument(
+        "--watch-current-feed",
+        action="store_true",
+        help="With --watch, also include today's filings from EDGAR's recent-filings Atom feed",
+    )
+    parser.add_argument(
+        "--drive-sync",
+        action="store_true",
+        help="Reuse existing Drive company folders and skip uploads whose MD5 matches Drive",
+    )
+    parser.add_argument(
+        "--max-document-mb",
+        type=int,
+        default=0,
+        help="Skip filing documents larger than this many MB (0 disables the limit)",
+    )
+    parser.add_argument(
+        "--text-extractor",
+        choices=sorted(EXTRACTORS),
+        default="stream",
+        help="HTML text extraction backend: fast streaming parser or BeautifulSoup",
+    )
+    parser.add_argument(
+        "--pdf-page-size",
+        choices=sorted(PAGE_SIZES),
+        default="letter",
+        help="Page size of PDFs rendered from HTML and text filings",
+    )
+    parser.add_argument("--pdf-font-size", type=float, default=10.0, help="Font size of rendered PDF text")
+    parser.add_argument(
+        "--no-pdf-compression",
+        action="store_true",
+        help="Write uncompressed page streams (larger files, slightly faster rendering)",
+    )
+    parser.add_argument(
+        "--search-index",
+        default="search.sqlite3",
+        help="Full-text index of converted filings within output dir (query it with the search subcommand)",
+    )
+    parser.add_argument("--no-search-index", action="store_true", help="Do not index converted filing text")
+    parser.add_argument(
+        "--document-store",
+        default=None,
+        help="Content-addressed store shared across runs; documents are downloaded and converted once",
+    )
+    parser.add_argument(
+        "--convert-processes",
+        type=int,
+        default=0,
+        help="Convert documents to PDF in this many worker processes (0 converts in-process)",
+    )
+    parser.add_argument(
+        "--convert-timeout",
+        type=float,
+        default=300.0,
+        help="Seconds before a worker-process conversion is abandoned and the document dropped",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Overlap SEC fetches, PDF conversion and Drive uploads across companies",
+    )
+    parser.add_argument("--metadata-workers", type=int, default=2, help="Pipeline workers resolving SEC metadata")
+    parser.add_argument("--download-workers", type=int, default=2, help="Pipeline workers downloading documents")
+    parser.add_argument("--convert-workers", type=int, default=2, help="Pipeline workers converting to PDF")
+    parser.add_argument(
+        "--upload-workers",
+        type=int,
+        default=4,
+        help="Parallel Drive uploads per company, and pipeline workers uploading companies",
+    )
+    parser.add_argument("--queue-size", type=int, default=8, help="Max companies waiting between pipeline stages")
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Fetch SEC data with the asyncio client (requires the 'async' extra)",
+    )
+    parser.add_argument("--async-concurrency", type=int, default=16, help="Companies in flight in --async mode")
+    parser.add_argument(
+        "--reference-ttl-hours",
+        type=float,
+        default=24.0,
+        help="Refresh the local ticker reference store when it is older than this",
+    )
+    parser.add_argument(
+        "--bulk-submissions",
+        nargs="?",
+        const="download",
+        default=None,
+        metavar="ZIP_PATH",
+        help="Read submissions from EDGAR's bulk submissions.zip (local path, or download when no path is given)",
+    )
+    parser.add_argument(
+        "--http-cache-dir",
+        default=None,
+        help="Cache SEC responses on disk here and revalidate them on later runs",
+    )
+    parser.add_argument("--http-cache-max-mb", type=int, default=2048, help="Size cap for --http-cache-dir")
+    parser.add_argument(
+        "--metrics-json",
+        default="run_summary.json",
+        help="Run summary filename within output dir (counters and stage timers)",
+    )
+    parser.add_argument(
+        "--prometheus-textfile",
+        default=None,
+        help="Also write run metrics in Prometheus text format here (for node_exporter's textfile collector)",
+    )
+    parser.add_argument(
+        "--profile",
+        type=int,
+        nargs="?",
+        const=5,
+        default=None,
+        metavar="N",
+        help="Keep cProfile dumps of the N slowest companies (default 5) in output_dir/profiles",
+    )
+    parser.add_argument(
+        "--queue",
+        default=None,
+        help="Shared SQLite work queue; workers on any host pull tickers from it (distributed mode)",
+    )
+    parser.add_argument("--worker-id", default=None, help="Name of this --queue worker (default: host-pid)")
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=120.0,
+        help="Tickers held by a --queue worker that stops heartbeating are reclaimed after this long",
+    )
+    parser.add_argument("--claim-size", type=int, default=8, help="Tickers a --queue worker claims at a time")
+    parser.add_argument(
+        "--share-sec-budget-across-hosts",
+        action="store_true",
+        help="Split SEC_MAX_REQUESTS_PER_SECOND across workers on all hosts, not just this one",
+    )
+    args = parser.parse_args()
+    if not args.tickers_csv and not args.queue:
+        parser.error("--tickers-csv is required unless --queue is given")
+    if args.watch and (args.queue or args.since):
+        parser.error("--watch cannot be combined with --queue or --since")
+    if args.since and args.use_async:
+        parser.error("--since runs on the threaded pipeline and cannot be combined with --async")
+    if args.http_cache_dir and args.use_async:
+        parser.error("--http-cache-dir is not used by the asyncio client and cannot be combined with --async")
+    return args
+
+
+def iso_date(value: str) -> str:
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, got {value!r}") from exc
+
+
+def parse_merge_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="sec-api-automation merge",
+        description="Combine the results recorded by --queue workers into one CSV",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help="Worker result stores or CSVs (default: every <result-csv stem>.*.sqlite3 in the output dir)",
+    )
+    parser.add_argument("--output-dir", default="output", help="Directory for the merged result CSV")
+    parser.add_argument("--result-csv", default="results.csv", help="Merged CSV filename within output dir")
+    parser.add_argument(
+        "--queue",
+        default=None,
+        help="Work queue the workers used; rows follow its input order and parked tickers get failure rows",
+    )
+    return parser.parse_args(argv)
+
+
+def parse_search_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="sec-api-automation search",
+        description="Search the text of filings converted by earlier runs",
+    )
+    parser.add_argument("query", help='FTS5 query: words, "exact phrase", AND/OR/NOT, prefix*')
+    parser.add_argument("--output-dir", default="output", help="Output dir of the runs that built the index")
+    parser.add_argument("--search-index", default="search.sqlite3", help="Index filename within output dir")
+    parser.add_argument("--ticker", action="append", default=None, help="Only this ticker (repeatable)")
+    parser.add_argument("--form", action="append", default=None, help="Only this form, e.g. 8-K (repeatable)")
+    parser.add_argument("--since", default=None, help="Only filings dated on or after YYYY-MM-DD")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum number of results")
+    return parser.parse_args(argv)
+
+
+def parse_gc_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="sec-api-automation gc",
+        description="Delete documents in a --document-store that no output file links to any more",
+    )
+    parser.add_argument("document_store", help="The --document-store directory")
+    parser.add_argument(
+        "--min-age-hours",
+        type=float,
+        default=1.0,
+        help="Keep blobs stored more recently than this, in case a run has not linked them yet",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be deleted")
+    return parser.parse_args(argv)
+
+
+def parse_financials_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="sec-api-automation financials",
+        description="Write XBRL financials for the tickers in a CSV, one row per company and period",
+    )
+    parser.add_argument("--tickers-csv", required=True, help="CSV containing ticker column")
+    parser.add_argument("--output-dir", default="output", help="Directory for the financials CSV")
+    parser.add_argument(
+        "--financials-csv", default="financials.csv", help="Output filename within output dir"
+    )
+    parser.add_argument(
+        "--period",
+        action="append",
+        default=None,
+        help="Calendar period such as CY2024 or CY2024Q3 (repeatable; default: last year and 4 quarters)",
+    )
+    parser.add_argument(
+        "--concepts-csv",
+        default=None,
+        help="CSV of column,taxonomy,tag,unit,instant rows replacing the built-in concepts",
+    )
+    parser.add_argument(
+        "--companyfacts-zip",
+        nargs="?",
+        const="download",
+        default=None,
+        metavar="ZIP_PATH",
+        help="Read facts from EDGAR's bulk companyfacts.zip instead of the frames API",
+    )
+    parser.add_argument("--workers", type=int, default=4, help="Frames requests in flight")
+    parser.add_argument(
+        "--http-cache-dir",
+        default=None,
+        help="Cache for frames responses (default: output_dir/work/http_cache)",
+    )
+    return parser.parse_args(argv)
+
+
+def ticker_jobs(rows: list[dict[str, str]]) -> list[CompanyJob]:
+    jobs = []
+    for row in rows:
+        ticker = row["ticker"].strip().upper()
+        if ticker:
+            jobs.append(CompanyJob(ticker=ticker, company_name=row.get("company_name", "").strip()))
+    return jobs
 
 
 def read_ticker_rows(path: Path) -> list[dict[str, str]]:
@@ -45,91 +359,65 @@ def process_one_company(
     drive_parent_folder_id: str | None,
     ticker: str,
     company_name: str,
-    ticker_to_cik: dict[str, str],
+    ticker_to_cik: Mapping[str, str],
+    options: StageOptions = StageOptions(),
+    job: CompanyJob | None = None,
 ) -> CompanyResult:
-    cik = ticker_to_cik.get(ticker.upper())
-    if not cik:
-        logging.warning("No CIK found for ticker=%s", ticker)
-        fallback_name = company_name or ticker.upper()
-        return CompanyResult(fallback_name, ticker, "", False, False, False, False)
-
-    submissions = sec.get_submissions(cik)
-    resolved_company_name = company_name or submissions.get("name", ticker.upper())
-
-    filings = list_filings(submissions, {"10-K", "10-Q", "8-K", "8-K/A"})
-    latest_10k = find_latest_form(filings, "10-K")
-    latest_10q = find_latest_form(filings, "10-Q")
-    latest_8ks = [f for f in filings if f.form in {"8-K", "8-K/A"}]
-    earnings = identify_latest_earnings_8k(sec, cik, latest_8ks)
-
-    company_output_dir = output_dir / ticker.upper()
-    company_output_dir.mkdir(parents=True, exist_ok=True)
-
-    ten_k_path = None
-    if latest_10k:
-        ten_k_url = sec.sec_archive_url(cik, latest_10k.accession, latest_10k.primary_document)
-        ten_k_path = download_optional(sec, ten_k_url, company_output_dir / f"{ticker.upper()}_10K.pdf")
-
-    ten_q_path = None
-    if latest_10q:
-        ten_q_url = sec.sec_archive_url(cik, latest_10q.accession, latest_10q.primary_document)
-        ten_q_path = download_optional(sec, ten_q_url, company_output_dir / f"{ticker.upper()}_10Q.pdf")
-
-    deck_path = None
-    transcript_path = None
-    if earnings:
-        if earnings.deck_filename:
-            deck_url = sec.sec_archive_url(cik, earnings.filing.accession, earnings.deck_filename)
-            deck_path = download_optional(
-                sec,
-                deck_url,
-                company_output_dir / f"{ticker.upper()}_EarningsDeck.pdf",
-            )
-        if earnings.transcript_filename:
-            transcript_url = sec.sec_archive_url(cik, earnings.filing.accession, earnings.transcript_filename)
-            transcript_path = download_optional(
-                sec,
-                transcript_url,
-                company_output_dir / f"{ticker.upper()}_Transcript.pdf",
-            )
-
-    folder_id, folder_link = drive.create_company_folder(
-        f"{ticker.upper()} - {resolved_company_name}",
-        parent_folder_id=drive_parent_folder_id,
-    )
-    for file_path in [ten_k_path, ten_q_path, deck_path, transcript_path]:
-        if file_path:
-            drive.upload_file(folder_id, file_path)
-
-    return CompanyResult(
-        company_name=resolved_company_name,
-        ticker=ticker.upper(),
-        drive_folder_link=folder_link,
-        has_10k=ten_k_path is not None,
-        has_10q=ten_q_path is not None,
-        has_deck=deck_path is not None,
-        has_transcript=transcript_path is not None,
-    )
+    job = job or CompanyJob(ticker=ticker, company_name=company_name)
+    resolve_company(sec, job, output_dir, ticker_to_cik, options)
+    download_documents(sec, job, options)
+    convert_documents(job, options)
+    return upload_documents(drive, job, drive_parent_folder_id, options)
 
 
 def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "merge":
+        merge_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "search":
+        search_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "gc":
+        gc_main(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "financials":
+        financials_main(sys.argv[2:])
+        return
+
     args = parse_args()
     output_dir = Path(args.output_dir).resolve()
     output_dir.mkdir(parents=True, exist_ok=True)
+    worker_id = args.worker_id or f"{socket.gethostname()}-{os.getpid()}"
     result_csv = output_dir / args.result_csv
-    if result_csv.exists() and not args.resume:
-        result_csv.unlink()
+    if args.queue:
+        # Each worker records into its own store; `merge` combines them afterwards.
+        result_csv = worker_results_path(result_csv, worker_id)
 
     logging.basicConfig(
         level=logging.INFO,
         format="%(asctime)s %(levelname)s %(message)s",
     )
 
+    results = ResultStore(store_path(result_csv))
+    # --watch keeps earlier rows: only the companies that filed are run again.
+    if not args.queue and not args.resume and not args.watch:
+        results.clear()
+        result_csv.unlink(missing_ok=True)
+    elif results.is_empty() and result_csv.exists():
+        logging.info("Imported %d rows from %s", results.import_csv(result_csv), result_csv)
+
     config = AppConfig.from_env(output_dir=output_dir, work_dir=output_dir / "work")
+    cache = (
+        HttpCache(Path(args.http_cache_dir).resolve(), max_bytes=args.http_cache_max_mb * 1024 * 1024)
+        if args.http_cache_dir
+        else None
+    )
     sec = SecClient(
-        user_agent=config.sec_user_agent,
-        timeout_seconds=config.request_timeout_seconds,
-        min_interval_seconds=config.min_request_interval_seconds,
+        user_agent=config.sec.user_agent,
+        timeout_seconds=config.sec.request_timeout_seconds,
+        min_interval_seconds=config.sec.min_request_interval_seconds,
+        cache=cache,
+        max_requests_per_second=config.sec.max_requests_per_second,
     )
     if config.drive_auth_mode == "oauth":
         if config.drive_oauth_client_secrets_path is None:
@@ -137,47 +425,417 @@ def main() -> None:
         drive = DriveClient.from_oauth(
             client_secrets_path=config.drive_oauth_client_secrets_path,
             token_path=config.drive_oauth_token_path,
+            upload_workers=args.upload_workers,
+            api_endpoint=config.drive_api_endpoint,
         )
     else:
         if config.drive_credentials_path is None:
             raise ValueError("Missing GOOGLE_APPLICATION_CREDENTIALS for service_account mode")
         drive = DriveClient.from_service_account(
             credentials_path=config.drive_credentials_path,
+            upload_workers=args.upload_workers,
+            api_endpoint=config.drive_api_endpoint,
         )
 
-    ticker_rows = read_ticker_rows(Path(args.tickers_csv))
-    completed = read_completed_tickers(result_csv) if args.resume else set()
-    ticker_to_cik = sec.ticker_to_cik_map()
+    ticker_to_cik = TickerReferenceStore(
+        sec,
+        config.work_dir / "ticker_reference.sqlite3",
+        ttl_hours=args.reference_ttl_hours,
+    )
+    ticker_to_cik.ensure_fresh()
 
-    for row in ticker_rows:
-        ticker = row["ticker"].strip().upper()
-        company_name = row.get("company_name", "").strip()
+    options = StageOptions(
+        state=StateStore(config.work_dir / "state.sqlite3") if args.incremental else None,
+        max_document_bytes=args.max_document_mb * 1024 * 1024 if args.max_document_mb else None,
+        text_extractor=args.text_extractor,
+        render=RenderOptions(
+            page_size=args.pdf_page_size,
+            font_size=args.pdf_font_size,
+            leading=args.pdf_font_size * 1.2,
+            compress=not args.no_pdf_compression,
+        ),
+        converter=(
+            ConversionExecutor(args.convert_processes, timeout_seconds=args.convert_timeout)
+            if args.convert_processes
+            else None
+        ),
+        drive_sync=(
+            # A backfill always syncs, so resumed runs find their folders and files again.
+            DriveSync(drive, DriveFolderCache(config.work_dir / "drive_folders.sqlite3"))
+            if args.drive_sync or args.since
+            else None
+        ),
+        search_indexer=(
+            # Queue workers may share the output dir over a network filesystem.
+            SearchIndexer(SearchIndex(output_dir / args.search_index, wal=not args.queue))
+            if not args.no_search_index
+            else None
+        ),
+        document_store=DocumentStore(Path(args.document_store).resolve()) if args.document_store else None,
+    )
+    profiles = SlowestProfiles(args.profile) if args.profile else None
+    if profiles and (args.use_async or args.pipeline or args.since):
+        # Stages overlap across companies there, so a per-company profile would
+        # mix in other companies' work.
+        logging.warning("--profile only applies to the sequential runner; ignoring it")
+        profiles = None
+    try:
+        if args.queue:
+            run_queue_worker(
+                args, config, sec, drive, ticker_to_cik, results, output_dir, options, worker_id, profiles
+            )
+        else:
+            run_companies(args, config, sec, drive, ticker_to_cik, results, output_dir, options, profiles)
+    finally:
+        drive.close()
+        if options.converter is not None:
+            options.converter.shutdown()
+        if options.search_indexer is not None:
+            options.search_indexer.close()
+            indexer = options.search_indexer
+            logging.info("Indexed %d documents into %s", indexer.indexed, indexer.index.path)
+        results.export_csv(result_csv)
+        failed_documents = results.failed_documents()
+        logging.info(
+            "Wrote %s: companies by status %s, %d documents failed",
+            result_csv,
+            results.status_counts(),
+            len(failed_documents),
+        )
+        if profiles:
+            for path in profiles.dump(output_dir / "profiles"):
+                logging.info("Wrote profile %s", path)
+        logging.info(
+            "SEC request rate: %.1f/s allowed, %.1f/s over the last 10s",
+            sec.rate_controller.rate,
+            sec.rate_controller.effective_rate,
+        )
+        METRICS.write_json(output_dir / args.metrics_json)
+        if args.prometheus_textfile:
+            METRICS.write_prometheus(Path(args.prometheus_textfile).resolve())
+
+
+def attach_bulk_submissions(
+    args: argparse.Namespace,
+    config: AppConfig,
+    sec: SecClient,
+    ticker_to_cik: Mapping[str, str],
+    tickers: list[str],
+) -> None:
+    if not args.bulk_submissions:
+        return
+    zip_path = (
+        ensure_bulk_submissions(sec, config.work_dir / "submissions.zip")
+        if args.bulk_submissions == "download"
+        else Path(args.bulk_submissions).resolve()
+    )
+    sec.submissions_archive = SubmissionsArchive(
+        zip_path,
+        [cik for cik in (ticker_to_cik.get(ticker) for ticker in tickers) if cik],
+    )
+
+
+def run_companies(
+    args: argparse.Namespace,
+    config: AppConfig,
+    sec: SecClient,
+    drive: DriveClient,
+    ticker_to_cik: Mapping[str, str],
+    results: ResultStore,
+    output_dir: Path,
+    options: StageOptions,
+    profiles: SlowestProfiles | None = None,
+) -> None:
+    def record(job: CompanyJob, result: CompanyResult) -> None:
+        results.record(job, result)
+        METRICS.incr("companies_total")
 
-        if not ticker:
+    jobs = ticker_jobs(read_ticker_rows(Path(args.tickers_csv)))
+    watcher = DailyIndexWatcher(sec, config.work_dir / "daily_index.sqlite3") if args.watch else None
+    changed: set[str] | None = None
+    if watcher is not None:
+        changed, watched_through = watcher.changed_ciks(date.today(), current_feed=args.watch_current_feed)
+
+    pending: list[CompanyJob] = []
+    for job in jobs:
+        if args.resume and results.is_done(job.ticker):
+            logging.info("Skipping ticker=%s due to --resume", job.ticker)
             continue
-        if ticker in completed:
-            logging.info("Skipping ticker=%s due to --resume", ticker)
+        # Tickers never finished (new in the CSV, failed or partial) run whatever the index says.
+        filed = changed is None or ticker_to_cik.get(job.ticker) in changed
+        if not filed and results.is_done(job.ticker):
             continue
+        pending.append(job)
+    if changed is not None:
+        logging.info("--watch: %d of %d tickers filed or are unfinished", len(pending), len(jobs))
 
-        try:
-            logging.info("Processing ticker=%s company=%s", ticker, company_name)
-            result = process_one_company(
-                sec=sec,
+    attach_bulk_submissions(args, config, sec, ticker_to_cik, [job.ticker for job in pending])
+    process_jobs(args, config, sec, drive, ticker_to_cik, pending, record, output_dir, options, profiles)
+    if watcher is not None:
+        watcher.mark_processed(watched_through)
+
+
+def run_queue_worker(
+    args: argparse.Namespace,
+    config: AppConfig,
+    sec: SecClient,
+    drive: DriveClient,
+    ticker_to_cik: Mapping[str, str],
+    results: ResultStore,
+    output_dir: Path,
+    options: StageOptions,
+    worker_id: str,
+    profiles: SlowestProfiles | None = None,
+) -> None:
+    work_queue = WorkQueue(Path(args.queue).resolve(), lease_seconds=args.lease_seconds)
+    if args.tickers_csv:
+        jobs = ticker_jobs(read_ticker_rows(Path(args.tickers_csv)))
+        added = work_queue.enqueue((job.ticker, job.company_name) for job in jobs)
+        logging.info("Added %d of %d tickers to queue %s", added, len(jobs), work_queue.path)
+    attach_bulk_submissions(args, config, sec, ticker_to_cik, [task.ticker for task in work_queue.tickers()])
+
+    def record(job: CompanyJob, result: CompanyResult) -> None:
+        if not work_queue.complete(worker_id, job.ticker):
+            logging.warning("Lost the lease on ticker=%s; dropping its result", job.ticker)
+            METRICS.incr("queue_leases_lost_total")
+            return
+        results.record(job, result)
+        METRICS.incr("companies_total")
+
+    def share_budget(workers: int) -> None:
+        rate = config.sec.max_requests_per_second / workers
+        sec.rate_controller.set_max_rate(rate)
+        logging.info("Sharing the SEC request budget with %d workers: %.2f requests/s each", workers, rate)
+
+    def claimed_jobs() -> Iterator[CompanyJob]:
+        # Claimed lazily, so one pipeline runs for the whole queue and a new
+        # batch is claimed only once the previous one has been fed in.
+        while batch := work_queue.claim(worker_id, max(1, args.claim_size)):
+            for task in batch:
+                yield CompanyJob(ticker=task.ticker, company_name=task.company_name)
+
+    host = socket.gethostname()
+    with LeaseKeeper(work_queue, worker_id, host, share_budget, args.share_sec_budget_across_hosts):
+        jobs = claimed_jobs()
+        process_jobs(args, config, sec, drive, ticker_to_cik, jobs, record, output_dir, options, profiles)
+    logging.info("Worker %s found no more tickers; queue status %s", worker_id, work_queue.counts())
+
+
+def process_jobs(
+    args: argparse.Namespace,
+    config: AppConfig,
+    sec: SecClient,
+    drive: DriveClient,
+    ticker_to_cik: Mapping[str, str],
+    jobs: Iterable[CompanyJob],
+    record: Callable[[CompanyJob, CompanyResult], None],
+    output_dir: Path,
+    options: StageOptions,
+    profiles: SlowestProfiles | None = None,
+) -> None:
+    settings = PipelineSettings(
+        metadata_workers=args.metadata_workers,
+        download_workers=args.download_workers,
+        convert_workers=args.convert_workers,
+        upload_workers=args.upload_workers,
+        queue_size=args.queue_size,
+    )
+    if args.since:
+        checkpoint = BackfillCheckpoint(config.work_dir / "backfill.sqlite3", wal=not args.queue)
+        run_backfill_pipeline(
+            sec=sec,
+            output_dir=output_dir,
+            drive_parent_folder_id=config.drive_parent_folder_id,
+            ticker_to_cik=ticker_to_cik,
+            jobs=jobs,
+            on_result=record,
+            since=args.since,
+            checkpoint=checkpoint,
+            settings=settings,
+            options=options,
+        )
+        logging.info("Backfill documents by status: %s", checkpoint.counts())
+        return
+
+    if args.use_async:
+        from .async_runner import run_async
+
+        asyncio.run(
+            run_async(
+                user_agent=config.sec.user_agent,
+                timeout_seconds=config.sec.request_timeout_seconds,
+                min_interval_seconds=config.sec.min_request_interval_seconds,
+                rate_controller=sec.rate_controller,
                 drive=drive,
                 output_dir=output_dir,
                 drive_parent_folder_id=config.drive_parent_folder_id,
-                ticker=ticker,
-                company_name=company_name,
+                jobs=jobs,
+                on_result=record,
+                concurrency=args.async_concurrency,
                 ticker_to_cik=ticker_to_cik,
+                submissions_archive=sec.submissions_archive,
+                options=options,
             )
-            append_result(result_csv, result)
+        )
+        return
+
+    if args.pipeline:
+        run_pipeline(
+            sec=sec,
+            drive=drive,
+            output_dir=output_dir,
+            drive_parent_folder_id=config.drive_parent_folder_id,
+            ticker_to_cik=ticker_to_cik,
+            jobs=jobs,
+            options=options,
+            on_result=record,
+            settings=settings,
+        )
+        return
+
+    for job in jobs:
+        ticker = job.ticker
+        company_name = job.company_name
+        try:
+            logging.info("Processing ticker=%s company=%s", ticker, company_name)
+            with profiles.profile(ticker) if profiles else nullcontext():
+                result = process_one_company(
+                    sec=sec,
+                    drive=drive,
+                    output_dir=output_dir,
+                    drive_parent_folder_id=config.drive_parent_folder_id,
+                    ticker=ticker,
+                    company_name=company_name,
+                    ticker_to_cik=ticker_to_cik,
+                    options=options,
+                    job=job,
+                )
+            record(job, result)
         except Exception as exc:  # noqa: BLE001
             logging.exception("Failed ticker=%s: %s", ticker, exc)
-            append_result(
-                result_csv,
-                CompanyResult(company_name or ticker, ticker, "", False, False, False, False),
+            job.error = type(exc).__name__
+            record(job, failed_result(ticker, company_name))
+
+
+def merge_main(argv: list[str]) -> None:
+    args = parse_merge_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    output_dir = Path(args.output_dir).resolve()
+    result_csv = output_dir / args.result_csv
+    inputs = sorted(
+        [Path(path).resolve() for path in args.inputs]
+        if args.inputs
+        else output_dir.glob(f"{result_csv.stem}.*.sqlite3")
+    )
+    if not inputs:
+        raise SystemExit(f"No worker result stores found in {output_dir}")
+
+    order: list[str] = []
+    parked: list[CompanyResult] = []
+    if args.queue:
+        tasks = WorkQueue(Path(args.queue).resolve()).tickers()
+        order = [task.ticker for task in tasks]
+        parked = [failed_result(task.ticker, task.company_name) for task in tasks if task.status == "failed"]
+        unfinished = [task.ticker for task in tasks if task.status in {"pending", "leased"}]
+        if unfinished:
+            logging.warning(
+                "%d queued tickers are not finished yet: %s", len(unfinished), ", ".join(unfinished[:20])
             )
 
+    results = merge_results([load_results(path) for path in inputs], order, parked)
+    write_results(result_csv, results)
+    logging.info("Merged %d worker files into %s (%d companies)", len(inputs), result_csv, len(results))
+
+
+def search_main(argv: list[str]) -> None:
+    args = parse_search_args(argv)
+    index_path = Path(args.output_dir).resolve() / args.search_index
+    if not index_path.exists():
+        raise SystemExit(f"No search index at {index_path}; run the pipeline first")
+    index = SearchIndex(index_path)
+    started = time.perf_counter()
+    try:
+        hits = index.search(args.query, args.ticker, args.form, args.since, args.limit)
+    except sqlite3.OperationalError as exc:
+        raise SystemExit(f"Invalid search query {args.query!r}: {exc}") from exc
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    for rank, hit in enumerate(hits, start=1):
+        print(f"{rank:>3}. {hit.ticker} {hit.form} {hit.filing_date} {hit.kind} {hit.accession}", end="")
+        print(f" score={hit.score:.2f}")
+        print(f"     {hit.source_url}")
+        print(f"     {' '.join(hit.snippet.split())}")
+    print(f"{len(hits)} results from {index.count()} filings in {elapsed_ms:.1f} ms")
+
+
+def gc_main(argv: list[str]) -> None:
+    args = parse_gc_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    store_dir = Path(args.document_store).resolve()
+    if not (store_dir / "index.sqlite3").exists():
+        raise SystemExit(f"No document store at {store_dir}")
+    DocumentStore(store_dir).gc(min_age_seconds=args.min_age_hours * 3600, dry_run=args.dry_run)
+
+
+def financials_main(argv: list[str]) -> None:
+    args = parse_financials_args(argv)
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    output_dir = Path(args.output_dir).resolve()
+    work_dir = output_dir / "work"
+    # Financials only talks to the SEC, so no Google Drive settings are needed.
+    config = SecConfig.from_env()
+    cache_dir = Path(args.http_cache_dir).resolve() if args.http_cache_dir else work_dir / "http_cache"
+    sec = SecClient(
+        user_agent=config.user_agent,
+        timeout_seconds=config.request_timeout_seconds,
+        min_interval_seconds=config.min_request_interval_seconds,
+        cache=HttpCache(cache_dir),
+        max_requests_per_second=config.max_requests_per_second,
+    )
+    ticker_to_cik = TickerReferenceStore(sec, work_dir / "ticker_reference.sqlite3")
+    ticker_to_cik.ensure_fresh()
+
+    companies: list[tuple[str, str, str]] = []
+    for job in ticker_jobs(read_ticker_rows(Path(args.tickers_csv))):
+        cik = ticker_to_cik.get(job.ticker)
+        if cik:
+            companies.append((job.ticker, cik, job.company_name))
+        else:
+            logging.warning("No CIK found for ticker=%s", job.ticker)
+    concepts = load_concepts(Path(args.concepts_csv)) if args.concepts_csv else list(DEFAULT_CONCEPTS)
+    periods = args.period or default_periods(date.today())
+    ciks = [cik for _, cik, _ in companies]
+
+    started = time.perf_counter()
+    if args.companyfacts_zip:
+        zip_path = (
+            ensure_bulk_archive(sec, COMPANYFACTS_ZIP_URL, work_dir / "companyfacts.zip")
+            if args.companyfacts_zip == "download"
+            else Path(args.companyfacts_zip).resolve()
+        )
+        facts = collect_companyfacts(SubmissionsArchive(zip_path, ciks), concepts, periods, ciks)
+    else:
+        facts = collect_frames(sec, concepts, periods, ciks, workers=args.workers)
+    csv_path = output_dir / args.financials_csv
+    rows = write_financials(csv_path, companies, periods, concepts, facts)
+    logging.info(
+        "Wrote %s: %d rows for %d companies, %d concepts over %s in %.1fs",
+        csv_path,
+        rows,
+        len(companies),
+        len(concepts),
+        ", ".join(periods),
+        time.perf_counter() - started,
+    )
+
 
 if __name__ == "__main__":
     main()
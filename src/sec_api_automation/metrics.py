@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import cProfile
+import functools
+import heapq
+import inspect
+import json
+import itertools
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_Key = tuple[str, tuple[tuple[str, str], ...]]
+
+
+def _key(name: str, labels: dict[str, Any]) -> _Key:
+    return name, tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def _render(key: _Key) -> str:
+    name, labels = key
+    if not labels:
+        return name
+    rendered = ",".join(f'{label}="{value}"' for label, value in labels)
+    return f"{name}{{{rendered}}}"
+
+
+def _quantile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+# Process-wide counters and timers. Worker processes used for PDF conversion
+# have their own copy, so conversion time is recorded by the parent from the
+# worker's result, and the counters a worker records are drained after each
+# document and added to the parent's with that result.
+class RunMetrics:
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._counters: dict[_Key, float] = defaultdict(float)
+        self._timers: dict[_Key, list[float]] = defaultdict(list)
+        self._gauges: dict[_Key, float] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started_at = time.time()
+            self._counters.clear()
+            self._timers.clear()
+            self._gauges.clear()
+
+    def incr(self, name: str, value: float = 1, **labels: Any) -> None:
+        with self._lock:
+            self._counters[_key(name, labels)] += value
+
+    def drain_counters(self) -> dict[_Key, float]:
+        with self._lock:
+            counters = dict(self._counters)
+            self._counters.clear()
+        return counters
+
+    def add_counters(self, counters: dict[_Key, float]) -> None:
+        with self._lock:
+            for key, value in counters.items():
+                self._counters[key] += value
+
+    def set(self, name: str, value: float, **labels: Any) -> None:
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+
+    def observe(self, name: str, seconds: float, **labels: Any) -> None:
+        with self._lock:
+            self._timers[_key(name, labels)].append(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels: Any) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timed(self, name: str, **labels: Any) -> Callable[[F], F]:
+        def decorate(func: F) -> F:
+            if inspect.iscoroutinefunction(func):
+
+                @functools.wraps(func)
+                async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                    with self.timer(name, **labels):
+                        return await func(*args, **kwargs)
+
+                return async_wrapper  # type: ignore[return-value]
+
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorate
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            timers = {key: list(values) for key, values in self._timers.items()}
+        return {
+            "started_at": self.started_at,
+            "wall_seconds": time.time() - self.started_at,
+            "counters": {_render(key): value for key, value in sorted(counters.items())},
+            "gauges": {_render(key): value for key, value in sorted(gauges.items())},
+            "timers": {
+                _render(key): {
+                    "count": len(values),
+                    "sum": sum(values),
+                    "p50": _quantile(values, 0.5),
+                    "p95": _quantile(values, 0.95),
+                    "max": max(values),
+                }
+                for key, values in sorted(timers.items())
+                if values
+            },
+        }
+
+    def write_json(self, path: Path) -> None:
+        _write_atomic(path, json.dumps(self.summary(), indent=2))
+
+    def write_prometheus(self, path: Path, prefix: str = "sec_automation_") -> None:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            timers = {key: list(values) for key, values in self._timers.items()}
+        lines: list[str] = []
+        typed: set[str] = set()
+        for kind, values_by_key in (("counter", counters), ("gauge", gauges)):
+            for (name, labels), value in sorted(values_by_key.items()):
+                metric = f"{prefix}{name}"
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} {kind}")
+                    typed.add(metric)
+                lines.append(f"{_render((metric, labels))} {value:g}")
+        for (name, labels), values in sorted(timers.items()):
+            if not values:
+                continue
+            metric = f"{prefix}{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} summary")
+                typed.add(metric)
+            for q in (0.5, 0.95):
+                lines.append(f"{_render((metric, labels + (('quantile', str(q)),)))} {_quantile(values, q):.6f}")
+            lines.append(f"{_render((metric + '_sum', labels))} {sum(values):.6f}")
+            lines.append(f"{_render((metric + '_count', labels))} {len(values)}")
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    # node_exporter's textfile collector may read at any moment, so never expose a partial file.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(content, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+# Keeps cProfile dumps for the N slowest companies only; a min-heap on wall
+# time means a faster run is dropped as soon as a slower one arrives.
+class SlowestProfiles:
+    def __init__(self, keep: int) -> None:
+        self.keep = max(1, keep)
+        self._heap: list[tuple[float, int, str, cProfile.Profile]] = []
+        self._order = itertools.count()
+
+    @contextmanager
+    def profile(self, label: str) -> Iterator[None]:
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            entry = (time.perf_counter() - started, next(self._order), label, profiler)
+            if len(self._heap) < self.keep:
+                heapq.heappush(self._heap, entry)
+            else:
+                heapq.heappushpop(self._heap, entry)
+
+    def dump(self, directory: Path) -> list[Path]:
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = []
+        for rank, (seconds, _, label, profiler) in enumerate(sorted(self._heap, reverse=True), 1):
+            safe_label = re.sub(r"[^A-Za-z0-9._-]+", "_", label)
+            path = directory / f"{rank:02d}_{safe_label}_{seconds:.2f}s.prof"
+            profiler.dump_stats(str(path))
+            paths.append(path)
+        return paths
+
+
+METRICS = RunMetrics()
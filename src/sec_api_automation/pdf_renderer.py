@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import os
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import accumulate
+from pathlib import Path
+from typing import Iterable
+
+from reportlab.lib.pagesizes import A4, legal, letter
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfgen import canvas
+
+
+PAGE_SIZES = {"letter": letter, "legal": legal, "a4": A4}
+
+# The standard Type1 fonts are WinAnsi-encoded; characters outside cp1252
+# are written as '?'.
+ENCODING = "cp1252"
+
+_ESCAPES = str.maketrans(
+    {
+        **{chr(code): f"\\{code:03o}" for code in (*range(32), *range(127, 256))},
+        "\\": "\\\\",
+        "(": "\\(",
+        ")": "\\)",
+    }
+)
+
+
+@dataclass(frozen=True)
+class RenderOptions:
+    page_size: str = "letter"
+    font_name: str = "Helvetica"
+    font_size: float = 10.0
+    leading: float = 12.0
+    margin: float = 40.0
+    compress: bool = True
+
+
+@lru_cache(maxsize=None)
+def _char_widths(font_name: str) -> tuple[int, ...]:
+    # Glyph widths in 1/1000 em, indexed by encoded byte.
+    return tuple(pdfmetrics.getFont(font_name).widths)
+
+
+def wrap_line(line: bytes, widths: tuple[int, ...], max_units: float) -> list[bytes]:
+    # Running widths let each break be found with a bisect instead of
+    # measuring word by word; lines with no space to break at (URLs, table
+    # rules) are cut at the last character that fits.
+    running = list(accumulate(map(widths.__getitem__, line)))
+    if not running or running[-1] <= max_units:
+        return [line]
+    wrapped: list[bytes] = []
+    start = 0
+    while start < len(line):
+        offset = running[start - 1] if start else 0
+        end = bisect_right(running, offset + max_units, start)
+        if end >= len(line):
+            wrapped.append(line[start:])
+            break
+        cut = line.rfind(b" ", start, end + 1)
+        if cut <= start:
+            cut = max(end, start + 1)
+            wrapped.append(line[start:cut])
+        else:
+            wrapped.append(line[start:cut].rstrip())
+        start = cut
+        while start < len(line) and line[start] == 32:
+            start += 1
+    return wrapped
+
+
+def partial_path(path: Path) -> Path:
+    # Where an output is written before it is moved over `path`.
+    return path.with_name(f"{path.name}.tmp")
+
+
+def _text_block(x: float, y: float, lines: list[bytes]) -> str:
+    # textLine() re-encodes and escapes every line through reportlab's generic
+    # font path; lines here are already encoded, so they are escaped in one
+    # translate() call and written as "(...) Tj T*" in a single BT/ET block.
+    body = " ".join(f"({line.decode('latin-1').translate(_ESCAPES)}) Tj T*" for line in lines)
+    return f"BT 1 0 0 1 {x:.2f} {y:.2f} Tm {body} ET"
+
+
+# Lays out each page as one text object (a single BT/ET block using T* line
+# advances) instead of one text object per line. Lines are pulled from the
+# iterable as pages fill, so the extracted text is never held in full;
+# reportlab keeps only the finished, compressed page streams until save().
+# The PDF is saved beside `output_path` and moved over it, so an existing
+# output that is a hard link into the document store is never written through.
+# Compressed streams keep reportlab's ASCII85 encoding: it only adds about 15%
+# to the file, and turning it off means changing the process-wide rl_config.
+def render_text_pdf(lines: Iterable[str], output_path: Path, options: RenderOptions = RenderOptions()) -> int:
+    width, height = PAGE_SIZES[options.page_size]
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = partial_path(output_path)
+    pdf = canvas.Canvas(
+        str(tmp_path),
+        pagesize=(width, height),
+        invariant=True,
+        pageCompression=1 if options.compress else 0,
+    )
+    widths = _char_widths(options.font_name)
+    max_units = (width - 2 * options.margin) * 1000 / options.font_size
+    lines_per_page = max(1, int((height - 2 * options.margin) // options.leading) + 1)
+    pages = 0
+    page: list[bytes] = []
+
+    def flush() -> None:
+        # setFont() registers the font and sets the text state that the
+        # literal block below draws with.
+        pdf.setFont(options.font_name, options.font_size, options.leading)
+        pdf.addLiteral(_text_block(options.margin, height - options.margin, page))
+        pdf.showPage()
+
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line:
+            continue
+        page.extend(wrap_line(line.encode(ENCODING, "replace"), widths, max_units))
+        while len(page) >= lines_per_page:
+            rest = page[lines_per_page:]
+            del page[lines_per_page:]
+            flush()
+            pages += 1
+            page = rest
+    if page or pages == 0:
+        flush()
+        pages += 1
+    pdf.save()
+    os.replace(tmp_path, output_path)
+    return pages
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping
+
+from .backfill import BackfillCheckpoint, BackfillTracker, plan_backfill, upload_backfill_documents
+from .drive_client import DriveClient
+from .reporting import CompanyResult
+from .sec_client import SecClient
+from .stages import (
+    CompanyJob,
+    StageOptions,
+    convert_documents,
+    download_documents,
+    failed_result,
+    prepare_company_folders,
+    resolve_company,
+    upload_documents,
+)
+
+
+_DONE = object()
+
+
+@dataclass(frozen=True)
+class PipelineSettings:
+    metadata_workers: int = 2
+    download_workers: int = 2
+    convert_workers: int = 2
+    upload_workers: int = 2
+    queue_size: int = 8
+    folder_batch_size: int = 8
+
+
+@dataclass(frozen=True)
+class _Stage:
+    name: str
+    workers: int
+    handler: Callable[[CompanyJob], Any]
+    prepare: Callable[[list[CompanyJob]], None] | None = None
+    batch_size: int = 1
+    # The handler returns a list of jobs, each passed on to the next stage.
+    fan_out: bool = False
+
+
+def _take_batch(stage: _Stage, inbox: queue.Queue, first: CompanyJob) -> tuple[list[CompanyJob], bool]:
+    batch = [first]
+    while len(batch) < stage.batch_size:
+        try:
+            job = inbox.get_nowait()
+        except queue.Empty:
+            break
+        if job is _DONE:
+            return batch, True
+        batch.append(job)
+    return batch, False
+
+
+def _stage_worker(
+    stage: _Stage,
+    inbox: queue.Queue,
+    outbox: queue.Queue,
+    results: queue.Queue,
+) -> None:
+    while True:
+        job = inbox.get()
+        if job is _DONE:
+            return
+        batch, done = _take_batch(stage, inbox, job)
+        if stage.prepare is not None:
+            try:
+                stage.prepare(batch)
+            except Exception as exc:  # noqa: BLE001
+                # The handler still runs for each job and falls back to per-job calls.
+                logging.warning("Batch step failed in stage=%s: %s", stage.name, exc)
+        for job in batch:
+            try:
+                outcome = stage.handler(job)
+            except Exception as exc:  # noqa: BLE001
+                logging.exception("Failed ticker=%s in stage=%s: %s", job.ticker, stage.name, exc)
+                job.error = type(exc).__name__
+                results.put((job, failed_result(job.ticker, job.company_name)))
+                continue
+            if stage.fan_out:
+                for item in outcome:
+                    outbox.put(item)
+            else:
+                outbox.put(job if outcome is None else outcome)
+        if done:
+            return
+
+
+def run_pipeline(
+    sec: SecClient,
+    drive: DriveClient,
+    output_dir: Path,
+    drive_parent_folder_id: str | None,
+    ticker_to_cik: Mapping[str, str],
+    jobs: Iterable[CompanyJob],
+    on_result: Callable[[CompanyJob, CompanyResult], None],
+    settings: PipelineSettings = PipelineSettings(),
+    options: StageOptions = StageOptions(),
+) -> None:
+    # Upload workers drain whatever has queued up so that Drive folders for
+    # several companies are created in one batch request.
+    stages = [
+        _Stage(
+            "metadata",
+            settings.metadata_workers,
+            lambda job: resolve_company(sec, job, output_dir, ticker_to_cik, options),
+        ),
+        _Stage("download", settings.download_workers, lambda job: download_documents(sec, job, options)),
+        _Stage("convert", settings.convert_workers, lambda job: convert_documents(job, options)),
+        _Stage(
+            "upload",
+            settings.upload_workers,
+            lambda job: (job, upload_documents(drive, job, drive_parent_folder_id, options)),
+            prepare=lambda batch: prepare_company_folders(drive, batch, drive_parent_folder_id, options),
+            batch_size=settings.folder_batch_size,
+        ),
+    ]
+    _run_stages(stages, jobs, on_result, settings)
+
+
+def run_backfill_pipeline(
+    sec: SecClient,
+    output_dir: Path,
+    drive_parent_folder_id: str | None,
+    ticker_to_cik: Mapping[str, str],
+    jobs: Iterable[CompanyJob],
+    on_result: Callable[[CompanyJob, CompanyResult], None],
+    since: str,
+    checkpoint: BackfillCheckpoint,
+    settings: PipelineSettings = PipelineSettings(),
+    options: StageOptions = StageOptions(),
+) -> None:
+    # The metadata stage splits each company into one job per filing year, so
+    # the later stages see a stream of year jobs from many companies. All SEC
+    # traffic still goes through the client's shared RateController.
+    tracker = BackfillTracker(on_result)
+    stages = [
+        _Stage(
+            "metadata",
+            settings.metadata_workers,
+            lambda job: tracker.expect(
+                job, plan_backfill(sec, job, output_dir, ticker_to_cik, since, checkpoint)
+            ),
+            fan_out=True,
+        ),
+        _Stage(
+            "download",
+            settings.download_workers,
+            lambda job: download_documents(sec, job, options, skip_http_errors=True),
+        ),
+        _Stage("convert", settings.convert_workers, lambda job: convert_documents(job, options)),
+        _Stage(
+            "upload",
+            settings.upload_workers,
+            lambda job: (job, upload_backfill_documents(job, drive_parent_folder_id, checkpoint, options)),
+        ),
+    ]
+    _run_stages(stages, jobs, tracker.finish, settings)
+
+
+def _run_stages(
+    stages: list[_Stage],
+    jobs: Iterable[CompanyJob],
+    on_result: Callable[[CompanyJob, CompanyResult], None],
+    settings: PipelineSettings,
+) -> None:
+    results: queue.Queue = queue.Queue()
+    inboxes: list[queue.Queue] = [queue.Queue(maxsize=settings.queue_size) for _ in stages]
+    outboxes = inboxes[1:] + [results]
+    threads: list[list[threading.Thread]] = []
+    for stage, inbox, outbox in zip(stages, inboxes, outboxes):
+        stage_threads = [
+            threading.Thread(
+                target=_stage_worker,
+                args=(stage, inbox, outbox, results),
+                name=f"{stage.name}-{index}",
+                daemon=True,
+            )
+            for index in range(max(1, stage.workers))
+        ]
+        for thread in stage_threads:
+            thread.start()
+        threads.append(stage_threads)
+
+    def feed() -> None:
+        for job in jobs:
+            logging.info("Queued ticker=%s company=%s", job.ticker, job.company_name)
+            inboxes[0].put(job)
+        for inbox, stage_threads in zip(inboxes, threads):
+            for _ in stage_threads:
+                inbox.put(_DONE)
+            for thread in stage_threads:
+                thread.join()
+        results.put(_DONE)
+
+    feeder = threading.Thread(target=feed, name="pipeline-feeder", daemon=True)
+    feeder.start()
+
+    while True:
+        item = results.get()
+        if item is _DONE:
+            break
+        on_result(*item)
+    feeder.join()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+from .metrics import METRICS
+
+
+# SEC's fair-access policy allows 10 requests per second per user agent.
+SEC_MAX_REQUESTS_PER_SECOND = 10.0
+THROTTLE_STATUSES = frozenset({429, 503})
+EFFECTIVE_RATE_WINDOW_SECONDS = 10.0
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+# A token bucket shared by every thread and coroutine that talks to SEC. The
+# rate starts from the configured interval and climbs a little after each
+# response up to `max_rate`; a 429/503 cuts it by `decrease_factor` and a
+# Retry-After puts the bucket into debt, so every caller waits it out in turn
+# rather than all at once. reserve() only returns the delay, which lets
+# threads sleep and coroutines await on the same controller.
+class RateController:
+    def __init__(
+        self,
+        start_rate: float | None = None,
+        max_rate: float = SEC_MAX_REQUESTS_PER_SECOND,
+        min_rate: float = 0.5,
+        increase_per_response: float = 0.05,
+        decrease_factor: float = 0.5,
+        burst: float = 1.0,
+    ) -> None:
+        if max_rate <= 0:
+            raise ValueError("max_rate must be positive")
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, max_rate)
+        self.rate = min(max_rate, start_rate) if start_rate and start_rate > 0 else max_rate
+        self.increase_per_response = increase_per_response
+        self.decrease_factor = decrease_factor
+        self.burst = burst
+        self._tokens = burst
+        self._updated_at = time.monotonic()
+        self._started_at = self._updated_at
+        self._last_decrease_at = float("-inf")
+        self._responses: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_interval(cls, min_interval_seconds: float, max_rate: float) -> "RateController":
+        start_rate = 1 / min_interval_seconds if min_interval_seconds > 0 else None
+        return cls(start_rate=start_rate, max_rate=max_rate)
+
+    def set_max_rate(self, max_rate: float) -> None:
+        if max_rate <= 0:
+            raise ValueError("max_rate must be positive")
+        with self._lock:
+            self._refill(time.monotonic())
+            self.max_rate = max_rate
+            self.min_rate = min(self.min_rate, max_rate)
+            self.rate = min(self.rate, max_rate)
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def reserve(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def record_response(self, status: int, retry_after: str | None = None) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._responses.append(now)
+            if status in THROTTLE_STATUSES:
+                self._throttled(now, status, parse_retry_after(retry_after))
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase_per_response)
+            rate = self.rate
+        METRICS.set("sec_rate_limit_per_second", rate)
+        METRICS.set("sec_effective_requests_per_second", self.effective_rate)
+
+    def _throttled(self, now: float, status: int, retry_after: float | None) -> None:
+        METRICS.incr("sec_throttled_total", status=status)
+        # Requests already in flight when the limit was hit come back throttled
+        # together, so one cut per second is enough.
+        if now - self._last_decrease_at >= 1.0:
+            previous = self.rate
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            self._last_decrease_at = now
+            logging.warning(
+                "SEC answered %s; request rate %.1f -> %.1f/s%s",
+                status,
+                previous,
+                self.rate,
+                f", pausing {retry_after:.0f}s" if retry_after else "",
+            )
+        if retry_after:
+            self._tokens = min(self._tokens, -retry_after * self.rate)
+
+    @property
+    def effective_rate(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            while self._responses and now - self._responses[0] > EFFECTIVE_RATE_WINDOW_SECONDS:
+                self._responses.popleft()
+            window = min(EFFECTIVE_RATE_WINDOW_SECONDS, max(1.0, now - self._started_at))
+            return len(self._responses) / window
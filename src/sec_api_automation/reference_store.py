@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator, Mapping
+from dataclasses import dataclass
+from pathlib import Path
+
+from .db import connect
+from .sec_client import SEC_BASE, SecClient
+
+
+COMPANY_TICKERS_EXCHANGE_URL = f"{SEC_BASE}/files/company_tickers_exchange.json"
+
+# Suffixes vendors append to tickers: Reuters RICs (AAPL.O), Bloomberg (AAPL US),
+# and exchange-qualified forms (NASDAQ:AAPL / AAPL:US).
+EXCHANGE_SUFFIXES = {"N", "O", "OQ", "K", "A", "P", "Q", "US", "UN", "UW", "UQ", "UA", "UP"}
+EXCHANGE_PREFIXES = {"NASDAQ", "NYSE", "NYSEARCA", "NYSEAMERICAN", "AMEX", "BATS", "CBOE", "OTC"}
+_SEPARATORS = re.compile(r"[./\s]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickers (
+    ticker TEXT PRIMARY KEY,
+    cik TEXT NOT NULL,
+    name TEXT NOT NULL,
+    exchange TEXT NOT NULL,
+    active INTEGER NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tickers_cik ON tickers(cik);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class TickerRecord:
+    ticker: str
+    cik: str
+    name: str
+    exchange: str
+    active: bool
+
+
+def ticker_candidates(raw_ticker: str) -> list[str]:
+    ticker = raw_ticker.strip().upper()
+    if ticker.endswith(" EQUITY"):
+        ticker = ticker[: -len(" EQUITY")].strip()
+    if ":" in ticker:
+        left, right = ticker.split(":", 1)
+        ticker = left if right in EXCHANGE_SUFFIXES and left not in EXCHANGE_PREFIXES else right
+
+    candidates = [ticker, _SEPARATORS.sub("-", ticker), _SEPARATORS.sub("", ticker)]
+    parts = _SEPARATORS.split(ticker)
+    if len(parts) > 1 and parts[-1] in EXCHANGE_SUFFIXES:
+        base = "-".join(parts[:-1])
+        candidates.extend([base, base.replace("-", "")])
+    return list(dict.fromkeys(c for c in candidates if c))
+
+
+class TickerReferenceStore(Mapping[str, str]):
+    def __init__(self, sec: SecClient, path: Path, ttl_hours: float = 24.0) -> None:
+        self.sec = sec
+        self.path = path
+        self.ttl_seconds = ttl_hours * 3600
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._memo: dict[str, TickerRecord | None] = {}
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = connect(self.path)
+            self._db.executescript(_SCHEMA)
+        return self._db
+
+    def _refreshed_at(self) -> float:
+        row = self._connection().execute(
+            "SELECT value FROM meta WHERE key = 'refreshed_at'"
+        ).fetchone()
+        return float(row["value"]) if row else 0.0
+
+    def ensure_fresh(self) -> None:
+        with self._lock:
+            refreshed_at = self._refreshed_at()
+            if time.time() - refreshed_at < self.ttl_seconds:
+                return
+            try:
+                self._refresh()
+            except Exception as exc:  # noqa: BLE001
+                if not refreshed_at:
+                    raise
+                logging.warning("Ticker reference refresh failed, using stale data: %s", exc)
+
+    def _refresh(self) -> None:
+        payload = self.sec.get_json(COMPANY_TICKERS_EXCHANGE_URL)
+        fields = payload["fields"]
+        rows = [dict(zip(fields, values)) for values in payload["data"]]
+        now = time.time()
+        db = self._connection()
+        with db:
+            db.execute("UPDATE tickers SET active = 0")
+            db.executemany(
+                "INSERT OR REPLACE INTO tickers (ticker, cik, name, exchange, active, last_seen)"
+                " VALUES (?, ?, ?, ?, 1, ?)",
+                [
+                    (
+                        str(row["ticker"]).upper(),
+                        str(row["cik"]).zfill(10),
+                        row.get("name") or "",
+                        row.get("exchange") or "",
+                        now,
+                    )
+                    for row in rows
+                    if row.get("ticker")
+                ],
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('refreshed_at', ?)",
+                (str(now),),
+            )
+        self._memo.clear()
+        logging.info("Refreshed ticker reference store with %d tickers", len(rows))
+
+    def lookup(self, ticker: str) -> TickerRecord | None:
+        key = ticker.strip().upper()
+        if key in self._memo:
+            return self._memo[key]
+        self.ensure_fresh()
+        record = None
+        with self._lock:
+            for candidate in ticker_candidates(key):
+                row = self._connection().execute(
+                    "SELECT ticker, cik, name, exchange, active FROM tickers WHERE ticker = ?",
+                    (candidate,),
+                ).fetchone()
+                if row:
+                    record = TickerRecord(
+                        ticker=row["ticker"],
+                        cik=row["cik"],
+                        name=row["name"],
+                        exchange=row["exchange"],
+                        active=bool(row["active"]),
+                    )
+                    break
+            self._memo[key] = record
+        if record and not record.active:
+            logging.info("Resolved historical ticker=%s to cik=%s", key, record.cik)
+        return record
+
+    def __getitem__(self, ticker: str) -> str:
+        record = self.lookup(ticker)
+        if record is None:
+            raise KeyError(ticker)
+        return record.cik
+
+    def __contains__(self, ticker: object) -> bool:
+        return isinstance(ticker, str) and self.lookup(ticker) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        self.ensure_fresh()
+        with self._lock:
+            rows = self._connection().execute("SELECT ticker FROM tickers").fetchall()
+        return iter([row["ticker"] for row in rows])
+
+    def __len__(self) -> int:
+        self.ensure_fresh()
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM tickers").fetchone()[0]
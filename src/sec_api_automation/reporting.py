@@ -1,8 +1,21 @@
 from __future__ import annotations
 
 import csv
+import os
 from dataclasses import dataclass, asdict
 from pathlib import Path
+from typing import Iterable
+
+
+RESULT_FIELDS = [
+    "company_name",
+    "ticker",
+    "drive_folder_link",
+    "has_10k",
+    "has_10q",
+    "has_deck",
+    "has_transcript",
+]
 
 
 @dataclass
@@ -24,22 +37,62 @@ def read_completed_tickers(csv_path: Path) -> set[str]:
         return {row["ticker"].upper() for row in reader if row.get("ticker")}
 
 
+def read_results(csv_path: Path) -> list[CompanyResult]:
+    with csv_path.open("r", newline="", encoding="utf-8") as handle:
+        return [
+            CompanyResult(
+                company_name=row["company_name"],
+                ticker=row["ticker"],
+                drive_folder_link=row["drive_folder_link"],
+                has_10k=row["has_10k"] == "True",
+                has_10q=row["has_10q"] == "True",
+                has_deck=row["has_deck"] == "True",
+                has_transcript=row["has_transcript"] == "True",
+            )
+            for row in csv.DictReader(handle)
+            if row.get("ticker")
+        ]
+
+
 def append_result(csv_path: Path, result: CompanyResult) -> None:
     csv_path.parent.mkdir(parents=True, exist_ok=True)
     write_header = not csv_path.exists()
     with csv_path.open("a", newline="", encoding="utf-8") as handle:
-        writer = csv.DictWriter(
-            handle,
-            fieldnames=[
-                "company_name",
-                "ticker",
-                "drive_folder_link",
-                "has_10k",
-                "has_10q",
-                "has_deck",
-                "has_transcript",
-            ],
-        )
+        writer = csv.DictWriter(handle, fieldnames=RESULT_FIELDS)
         if write_header:
             writer.writeheader()
         writer.writerow(asdict(result))
+
+
+def worker_results_path(csv_path: Path, worker_id: str) -> Path:
+    return csv_path.with_name(f"{csv_path.stem}.{worker_id}{csv_path.suffix}")
+
+
+def merge_results(
+    sources: list[list[CompanyResult]],
+    order: list[str] | None = None,
+    parked: Iterable[CompanyResult] = (),
+) -> list[CompanyResult]:
+    # The output must not depend on which worker finished first. A ticker that
+    # was processed twice (its lease expired mid-run) keeps a row with a Drive
+    # folder over one without, then the row from the earliest source.
+    chosen: dict[str, CompanyResult] = {}
+    for source in sources:
+        for result in source:
+            current = chosen.get(result.ticker)
+            if current is None or (not current.drive_folder_link and result.drive_folder_link):
+                chosen[result.ticker] = result
+    for result in parked:
+        chosen.setdefault(result.ticker, result)
+    rank = {ticker: index for index, ticker in enumerate(order or [])}
+    return sorted(chosen.values(), key=lambda result: (rank.get(result.ticker, len(rank)), result.ticker))
+
+
+def write_results(csv_path: Path, results: Iterable[CompanyResult]) -> None:
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = csv_path.with_name(f"{csv_path.name}.tmp")
+    with tmp_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(asdict(result) for result in results)
+    os.replace(tmp_path, csv_path)
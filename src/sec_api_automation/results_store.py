@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from .db import connect
+from .reporting import CompanyResult, read_results, write_results
+from .stages import CompanyJob, DocumentTask
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    ticker TEXT PRIMARY KEY,
+    company_name TEXT NOT NULL,
+    cik TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT NOT NULL,
+    drive_folder_link TEXT NOT NULL,
+    has_10k INTEGER NOT NULL,
+    has_10q INTEGER NOT NULL,
+    has_deck INTEGER NOT NULL,
+    has_transcript INTEGER NOT NULL,
+    sequence INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    ticker TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    accession TEXT NOT NULL,
+    source_url TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    content_type TEXT NOT NULL,
+    conversion_seconds REAL NOT NULL,
+    drive_file_id TEXT NOT NULL,
+    error TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (ticker, kind, accession)
+);
+CREATE INDEX IF NOT EXISTS documents_failed ON documents(error) WHERE error != '';
+"""
+
+# 'ok' and 'no_documents' are final; 'partial', 'no_cik' and 'failed' are
+# picked up again by --resume.
+FINAL_STATUSES = ("ok", "no_documents")
+
+
+@dataclass(frozen=True)
+class FailedDocument:
+    ticker: str
+    kind: str
+    accession: str
+    source_url: str
+    error: str
+
+
+def company_status(job: CompanyJob) -> tuple[str, str]:
+    if job.error:
+        return "failed", job.error
+    if not job.cik:
+        return "no_cik", ""
+    errors = [doc.error for doc in job.documents if doc.error]
+    if errors:
+        return "partial", errors[0]
+    if not job.documents:
+        return "no_documents", ""
+    return "ok", ""
+
+
+# One row per company and per document, written in a single transaction per
+# company. WAL with synchronous=NORMAL makes each commit a plain append, and
+# several threads or processes may record into the same file.
+class ResultStore:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = connect(path)
+        self._db.executescript(_SCHEMA)
+
+    def clear(self) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM companies")
+            self._db.execute("DELETE FROM documents")
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM companies LIMIT 1").fetchone() is None
+
+    def record(self, job: CompanyJob, result: CompanyResult) -> None:
+        status, error = company_status(job)
+        self._write(result, job.cik, status, error, job.documents)
+
+    def _write(
+        self,
+        result: CompanyResult,
+        cik: str,
+        status: str,
+        error: str,
+        documents: list[DocumentTask],
+    ) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO companies (ticker, company_name, cik, status, error,"
+                " drive_folder_link, has_10k, has_10q, has_deck, has_transcript, sequence, updated_at) VALUES"
+                " (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(sequence) + 1, 0) FROM companies), ?)",
+                (
+                    result.ticker,
+                    result.company_name,
+                    cik,
+                    status,
+                    error,
+                    result.drive_folder_link,
+                    result.has_10k,
+                    result.has_10q,
+                    result.has_deck,
+                    result.has_transcript,
+                    now,
+                ),
+            )
+            self._db.execute("DELETE FROM documents WHERE ticker = ?", (result.ticker,))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO documents (ticker, kind, accession, source_url, bytes, content_type,"
+                " conversion_seconds, drive_file_id, error, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        result.ticker,
+                        doc.kind,
+                        doc.accession,
+                        doc.source_url,
+                        doc.bytes,
+                        doc.content_type,
+                        doc.conversion_seconds,
+                        doc.drive_file_id,
+                        doc.error,
+                        now,
+                    )
+                    for doc in documents
+                ],
+            )
+
+    def is_done(self, ticker: str) -> bool:
+        with self._lock:
+            row = self._db.execute("SELECT status FROM companies WHERE ticker = ?", (ticker,)).fetchone()
+        return row is not None and row["status"] in FINAL_STATUSES
+
+    def failed_documents(self) -> list[FailedDocument]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT ticker, kind, accession, source_url, error FROM documents"
+                " WHERE error != '' ORDER BY ticker, kind"
+            ).fetchall()
+        return [FailedDocument(**dict(row)) for row in rows]
+
+    def status_counts(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) AS n FROM companies GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def results(self) -> list[CompanyResult]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT company_name, ticker, drive_folder_link, has_10k, has_10q, has_deck, has_transcript"
+                " FROM companies ORDER BY sequence"
+            ).fetchall()
+        return [
+            CompanyResult(
+                company_name=row["company_name"],
+                ticker=row["ticker"],
+                drive_folder_link=row["drive_folder_link"],
+                has_10k=bool(row["has_10k"]),
+                has_10q=bool(row["has_10q"]),
+                has_deck=bool(row["has_deck"]),
+                has_transcript=bool(row["has_transcript"]),
+            )
+            for row in rows
+        ]
+
+    def import_csv(self, csv_path: Path) -> int:
+        # Lets --resume pick up a results CSV written before the store existed.
+        # Without per-document detail, a row with a Drive folder counts as done.
+        results = read_results(csv_path)
+        for result in results:
+            if result.drive_folder_link:
+                self._write(result, "", "ok", "", [])
+            else:
+                self._write(result, "", "failed", "imported", [])
+        return len(results)
+
+    def export_csv(self, csv_path: Path) -> int:
+        results = self.results()
+        write_results(csv_path, results)
+        return len(results)
+
+
+def store_path(result_csv: Path) -> Path:
+    return result_csv.with_suffix(".sqlite3")
+
+
+def load_results(path: Path) -> list[CompanyResult]:
+    if path.suffix == ".csv":
+        return read_results(path)
+    return ResultStore(path).results()
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from .db import connect
+from .metrics import METRICS
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS filings (
+    id INTEGER PRIMARY KEY,
+    ticker TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    form TEXT NOT NULL,
+    accession TEXT NOT NULL,
+    filing_date TEXT NOT NULL,
+    source_url TEXT NOT NULL,
+    indexed_at REAL NOT NULL,
+    UNIQUE (ticker, accession, kind)
+);
+CREATE INDEX IF NOT EXISTS filings_ticker ON filings(ticker, filing_date);
+CREATE TABLE IF NOT EXISTS passages (
+    id INTEGER PRIMARY KEY,
+    filing_id INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS passages_filing ON passages(filing_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS passage_text USING fts5(body, tokenize='porter unicode61');
+"""
+
+# snippet() re-tokenizes the text it is given, so filings are indexed as
+# passages of about this many characters rather than as one row each.
+PASSAGE_CHARS = 8000
+
+
+@dataclass(frozen=True)
+class SearchDocument:
+    ticker: str
+    kind: str
+    form: str
+    accession: str
+    filing_date: str
+    source_url: str
+    text_path: Path
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    ticker: str
+    kind: str
+    form: str
+    accession: str
+    filing_date: str
+    source_url: str
+    snippet: str
+    score: float
+
+
+def _passages(text_path: Path) -> Iterator[str]:
+    lines: list[str] = []
+    size = 0
+    with text_path.open(encoding="utf-8") as handle:
+        for line in handle:
+            lines.append(line)
+            size += len(line)
+            if size >= PASSAGE_CHARS:
+                yield "".join(lines)
+                lines, size = [], 0
+    if lines:
+        yield "".join(lines)
+
+
+# Filing metadata lives in `filings` and each passage of its text is a row of
+# the FTS5 table. Re-indexing an accession replaces its passages, while a
+# newer filing of the same kind is added next to the old one. A co-registrant
+# filing gets a row for each ticker that filed it.
+class SearchIndex:
+    def __init__(self, path: Path, wal: bool = True) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = connect(path, wal=wal)
+        self._db.executescript(_SCHEMA)
+
+    def add_documents(self, documents: list[SearchDocument]) -> int:
+        now = time.time()
+        with self._lock, self._db:
+            for document in documents:
+                row = self._db.execute(
+                    "SELECT id FROM filings WHERE ticker = ? AND accession = ? AND kind = ?",
+                    (document.ticker, document.accession, document.kind),
+                ).fetchone()
+                values = (
+                    document.form,
+                    document.filing_date,
+                    document.source_url,
+                    now,
+                    document.ticker,
+                    document.accession,
+                    document.kind,
+                )
+                if row is None:
+                    filing_id = self._db.execute(
+                        "INSERT INTO filings"
+                        " (form, filing_date, source_url, indexed_at, ticker, accession, kind)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        values,
+                    ).lastrowid
+                else:
+                    filing_id = row["id"]
+                    self._db.execute(
+                        "DELETE FROM passage_text"
+                        " WHERE rowid IN (SELECT id FROM passages WHERE filing_id = ?)",
+                        (filing_id,),
+                    )
+                    self._db.execute("DELETE FROM passages WHERE filing_id = ?", (filing_id,))
+                    self._db.execute(
+                        "UPDATE filings SET form = ?, filing_date = ?, source_url = ?, indexed_at = ?"
+                        " WHERE ticker = ? AND accession = ? AND kind = ?",
+                        values,
+                    )
+                for body in _passages(document.text_path):
+                    passage_id = self._db.execute(
+                        "INSERT INTO passages (filing_id) VALUES (?)", (filing_id,)
+                    ).lastrowid
+                    self._db.execute(
+                        "INSERT INTO passage_text (rowid, body) VALUES (?, ?)", (passage_id, body)
+                    )
+        return len(documents)
+
+    def search(
+        self,
+        query: str,
+        tickers: list[str] | None = None,
+        forms: list[str] | None = None,
+        since: str | None = None,
+        limit: int = 20,
+    ) -> list[SearchHit]:
+        # `query` uses FTS5 syntax: words, "exact phrases", AND/OR/NOT, prefix*.
+        # A filing ranks by its best-matching passage; bm25() only reads the
+        # index, and snippets are cut from the winning passages afterwards.
+        filters = ""
+        params: list[object] = [query]
+        if tickers:
+            filters += f" AND f.ticker IN ({', '.join('?' * len(tickers))})"
+            params += [ticker.upper() for ticker in tickers]
+        if forms:
+            filters += f" AND f.form IN ({', '.join('?' * len(forms))})"
+            params += forms
+        if since:
+            filters += " AND f.filing_date >= ?"
+            params.append(since)
+        params.append(limit)
+        # bm25() cannot sit inside an aggregate, so passages are scored in a
+        # CTE first. SQLite never flattens a subquery with a LIMIT into an
+        # aggregate join, so `LIMIT -1` keeps it separate without the
+        # MATERIALIZED hint, which needs SQLite 3.35. SQLite takes the bare
+        # passage_id column from the row that holds MIN().
+        sql = (
+            "WITH ranked AS ("
+            " SELECT passage_text.rowid AS passage_id, bm25(passage_text) AS score"
+            " FROM passage_text WHERE passage_text MATCH ? LIMIT -1)"
+            " SELECT f.ticker, f.kind, f.form, f.accession, f.filing_date, f.source_url,"
+            " ranked.passage_id, MIN(ranked.score) AS score"
+            " FROM ranked JOIN passages p ON p.id = ranked.passage_id"
+            f" JOIN filings f ON f.id = p.filing_id WHERE 1 = 1{filters}"
+            " GROUP BY f.id ORDER BY score LIMIT ?"
+        )
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+            passage_ids = [row["passage_id"] for row in rows]
+            snippets = dict(
+                self._db.execute(
+                    "SELECT rowid, snippet(passage_text, 0, '[', ']', ' ... ', 16) FROM passage_text"
+                    f" WHERE passage_text MATCH ? AND rowid IN ({', '.join('?' * len(passage_ids))})",
+                    [query, *passage_ids],
+                ).fetchall()
+            )
+        # bm25() is lower for better matches; flip it so higher scores rank first.
+        return [
+            SearchHit(
+                ticker=row["ticker"],
+                kind=row["kind"],
+                form=row["form"],
+                accession=row["accession"],
+                filing_date=row["filing_date"],
+                source_url=row["source_url"],
+                snippet=snippets.get(row["passage_id"], ""),
+                score=-row["score"],
+            )
+            for row in rows
+        ]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM filings").fetchone()[0]
+
+
+# Indexes converted documents from a background thread so the run never waits
+# on FTS inserts. Whatever has queued up since the last batch goes into one
+# transaction, and each text file is deleted once its batch is committed.
+class SearchIndexer:
+    def __init__(self, index: SearchIndex, batch_size: int = 16) -> None:
+        self.index = index
+        self.batch_size = batch_size
+        self.indexed = 0
+        self._queue: queue.Queue[SearchDocument | None] = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="search-indexer", daemon=True)
+        self._thread.start()
+
+    def add(self, document: SearchDocument) -> None:
+        self._queue.put(document)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = None in batch
+            documents = [document for document in batch if document is not None]
+            if documents:
+                self._index(documents)
+
+    def _index(self, documents: list[SearchDocument]) -> None:
+        try:
+            with METRICS.timer("search_index_batch_seconds"):
+                self.indexed += self.index.add_documents(documents)
+            METRICS.incr("search_documents_indexed_total", len(documents))
+        except Exception as exc:  # noqa: BLE001
+            logging.warning("Search indexing failed for %d documents: %s", len(documents), exc)
+        finally:
+            for document in documents:
+                document.text_path.unlink(missing_ok=True)
+
+
+def document_text_path(output_path: Path) -> Path:
+    return output_path.with_suffix(".txt")
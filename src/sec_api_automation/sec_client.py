@@ -1,15 +1,82 @@
 from __future__ import annotations
 
+import json
+import os
 import time
 from dataclasses import dataclass
-from typing import Any
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable
 
 import requests
-from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+from tenacity import (
+    RetryCallState,
+    retry,
+    retry_if_exception,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
 
+from .metrics import METRICS
+from .rate_control import SEC_MAX_REQUESTS_PER_SECOND, THROTTLE_STATUSES, RateController, parse_retry_after
 
-SEC_BASE = "https://www.sec.gov"
-SEC_DATA_BASE = "https://data.sec.gov"
+if TYPE_CHECKING:
+    from .bulk_submissions import SubmissionsArchive
+    from .http_cache import HttpCache
+
+
+# Overridable so benchmarks can point the client at a local stand-in server.
+SEC_BASE = os.getenv("SEC_BASE_URL", "https://www.sec.gov").rstrip("/")
+SEC_DATA_BASE = os.getenv("SEC_DATA_BASE_URL", "https://data.sec.gov").rstrip("/")
+
+
+def record_retry(retry_state: RetryCallState) -> None:
+    METRICS.incr("sec_retries_total")
+    if retry_state.next_action is not None:
+        METRICS.incr("sec_backoff_seconds_total", retry_state.next_action.sleep)
+
+
+def is_retryable(exc: BaseException) -> bool:
+    # A 404 or 403 will not change on a second try; only throttling, server
+    # errors and transport failures (no response at all) are worth retrying.
+    response = getattr(exc, "response", None)
+    if response is None:
+        return True
+    return response.status_code in THROTTLE_STATUSES or response.status_code >= 500
+
+
+_backoff = wait_exponential(multiplier=1, min=1, max=16)
+
+
+def wait_retry_after(retry_state: RetryCallState) -> float:
+    exc = retry_state.outcome.exception() if retry_state.outcome else None
+    response = getattr(exc, "response", None)
+    if response is not None:
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if retry_after is not None:
+            return retry_after
+    return _backoff(retry_state)
+
+
+def sec_retry(transport_error: type[Exception]) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    return retry(
+        reraise=True,
+        stop=stop_after_attempt(5),
+        wait=wait_retry_after,
+        retry=retry_if_exception_type(transport_error) & retry_if_exception(is_retryable),
+        before_sleep=record_retry,
+    )
+
+
+_sec_retry = sec_retry(requests.RequestException)
+
+
+class DocumentTooLargeError(ValueError):
+    def __init__(self, url: str, size: int, limit: int) -> None:
+        super().__init__(f"{url} is larger than the {limit} byte limit ({size} bytes)")
+        self.url = url
+        self.size = size
+        self.limit = limit
 
 
 @dataclass
@@ -18,56 +85,177 @@ class FilingMeta:
     filing_date: str
     accession: str
     primary_document: str
+    items: tuple[str, ...] = ()
 
 
 class SecClient:
-    def __init__(self, user_agent: str, timeout_seconds: int = 20, min_interval_seconds: float = 0.2) -> None:
+    def __init__(
+        self,
+        user_agent: str,
+        timeout_seconds: int = 20,
+        min_interval_seconds: float = 0.2,
+        cache: HttpCache | None = None,
+        max_requests_per_second: float = SEC_MAX_REQUESTS_PER_SECOND,
+    ) -> None:
         self.timeout_seconds = timeout_seconds
-        self.min_interval_seconds = min_interval_seconds
-        self.last_request_at = 0.0
+        self.cache = cache
+        self.submissions_archive: SubmissionsArchive | None = None
+        # min_interval_seconds sets the starting rate; the controller ramps from
+        # there toward max_requests_per_second.
+        self.rate_controller = RateController.from_interval(min_interval_seconds, max_requests_per_second)
         self.session = requests.Session()
         self.session.headers.update({"User-Agent": user_agent})
 
     def _throttle(self) -> None:
-        now = time.time()
-        elapsed = now - self.last_request_at
-        if elapsed < self.min_interval_seconds:
-            time.sleep(self.min_interval_seconds - elapsed)
-        self.last_request_at = time.time()
+        delay = self.rate_controller.reserve()
+        if delay > 0:
+            time.sleep(delay)
+            METRICS.incr("sec_throttle_sleep_seconds_total", delay)
 
-    @retry(
-        reraise=True,
-        stop=stop_after_attempt(5),
-        wait=wait_exponential(multiplier=1, min=1, max=16),
-        retry=retry_if_exception_type(requests.RequestException),
-    )
-    def _get(self, url: str) -> requests.Response:
+    def _request(self, url: str, **kwargs: Any) -> requests.Response:
+        try:
+            response = self.session.get(url, timeout=self.timeout_seconds, **kwargs)
+        except requests.RequestException:
+            METRICS.incr("sec_requests_total", endpoint=endpoint_name(url), status="error")
+            raise
+        METRICS.incr("sec_requests_total", endpoint=endpoint_name(url), status=response.status_code)
+        self.rate_controller.record_response(response.status_code, response.headers.get("Retry-After"))
+        return response
+
+    @_sec_retry
+    def _get(self, url: str, headers: dict[str, str] | None = None) -> requests.Response:
         self._throttle()
-        response = self.session.get(url, timeout=self.timeout_seconds)
+        response = self._request(url, headers=headers)
+        METRICS.incr("sec_bytes_downloaded_total", len(response.content), endpoint=endpoint_name(url))
         response.raise_for_status()
         return response
 
+    def _fetch(self, url: str) -> bytes:
+        if self.cache is None:
+            return self._get(url).content
+
+        entry = self.cache.lookup(url)
+        if entry is not None and self.cache.is_fresh(entry):
+            METRICS.incr("http_cache_hits_total", endpoint=endpoint_name(url))
+            return self.cache.read(entry)
+
+        response = self._get(url, headers=self.cache.conditional_headers(entry))
+        if response.status_code == 304 and entry is not None:
+            return self.cache.revalidated(entry)
+        self.cache.store(url, endpoint_name(url), response.content, response.headers)
+        return response.content
+
+    @_sec_retry
+    def _stream_to_file(
+        self,
+        url: str,
+        output_path: Path,
+        headers: dict[str, str] | None,
+        max_bytes: int | None,
+        chunk_size: int,
+    ) -> requests.Response:
+        self._throttle()
+        with self._request(url, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            if response.status_code == 304:
+                return response
+            declared = int(response.headers.get("Content-Length") or 0)
+            if max_bytes and declared > max_bytes:
+                raise DocumentTooLargeError(url, declared, max_bytes)
+            written = 0
+            with output_path.open("wb") as handle:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    written += len(chunk)
+                    if max_bytes and written > max_bytes:
+                        raise DocumentTooLargeError(url, written, max_bytes)
+                    handle.write(chunk)
+            METRICS.incr("sec_bytes_downloaded_total", written, endpoint=endpoint_name(url))
+            return response
+
+    @_sec_retry
+    def _get_range(self, url: str, num_bytes: int) -> bytes:
+        self._throttle()
+        headers = {"Range": f"bytes=0-{num_bytes - 1}"}
+        with self._request(url, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            # A server that ignores Range answers 200 with the whole body, so stop
+            # reading once enough bytes have arrived.
+            head = b""
+            for chunk in response.iter_content(chunk_size=num_bytes):
+                head += chunk
+                if len(head) >= num_bytes:
+                    break
+            METRICS.incr("sec_bytes_downloaded_total", len(head), endpoint=endpoint_name(url))
+            return head[:num_bytes]
+
+    def get_head(self, url: str, num_bytes: int = 8192) -> bytes:
+        if self.cache is not None:
+            entry = self.cache.lookup(url)
+            if entry is not None and self.cache.is_fresh(entry):
+                METRICS.incr("http_cache_hits_total", endpoint=endpoint_name(url))
+                return self.cache.read_head(entry, num_bytes)
+        return self._get_range(url, num_bytes)
+
+    def download_to_file(
+        self,
+        url: str,
+        output_path: Path,
+        max_bytes: int | None = None,
+        use_cache: bool = True,
+        chunk_size: int = 1024 * 1024,
+    ) -> Path:
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        cache = self.cache if use_cache else None
+        entry = cache.lookup(url) if cache else None
+        if cache and entry is not None and cache.is_fresh(entry):
+            METRICS.incr("http_cache_hits_total", endpoint=endpoint_name(url))
+            return cache.copy_to(entry, output_path)
+
+        tmp_path = output_path.with_name(f"{output_path.name}.part")
+        try:
+            response = self._stream_to_file(
+                url,
+                tmp_path,
+                cache.conditional_headers(entry) if cache else None,
+                max_bytes,
+                chunk_size,
+            )
+            if cache and entry is not None and response.status_code == 304:
+                cache.mark_revalidated(entry)
+                return cache.copy_to(entry, output_path)
+            if cache:
+                cache.store_file(url, endpoint_name(url), tmp_path, response.headers)
+            os.replace(tmp_path, output_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return output_path
+
     def get_json(self, url: str) -> dict[str, Any]:
-        response = self._get(url)
-        return response.json()
+        return json.loads(self._fetch(url))
 
     def get_bytes(self, url: str) -> bytes:
-        response = self._get(url)
-        return response.content
+        return self._fetch(url)
 
     def get_company_tickers(self) -> dict[str, dict[str, Any]]:
         return self.get_json(f"{SEC_BASE}/files/company_tickers.json")
 
     def ticker_to_cik_map(self) -> dict[str, str]:
-        payload = self.get_company_tickers()
-        return {
-            item["ticker"].upper(): str(item["cik_str"]).zfill(10)
-            for item in payload.values()
-        }
+        return ticker_map_from_company_tickers(self.get_company_tickers())
 
     def get_submissions(self, cik: str) -> dict[str, Any]:
+        if self.submissions_archive is not None:
+            submissions = self.submissions_archive.get(cik)
+            if submissions is not None:
+                return submissions
         return self.get_json(f"{SEC_DATA_BASE}/submissions/CIK{cik}.json")
 
+    def get_submissions_page(self, name: str) -> dict[str, Any]:
+        if self.submissions_archive is not None:
+            page = self.submissions_archive.get_file(name)
+            if page is not None:
+                return page
+        return self.get_json(f"{SEC_DATA_BASE}/submissions/{name}")
+
     def get_filing_index(self, cik: str, accession: str) -> dict[str, Any]:
         acc_nodash = accession.replace("-", "")
         return self.get_json(
@@ -75,8 +263,35 @@ class SecClient:
         )
 
     def sec_archive_url(self, cik: str, accession: str, filename: str) -> str:
-        acc_nodash = accession.replace("-", "")
-        return f"{SEC_BASE}/Archives/edgar/data/{int(cik)}/{acc_nodash}/{filename}"
+        return sec_archive_url(cik, accession, filename)
+
+
+def endpoint_name(url: str) -> str:
+    if "/Archives/edgar/data/" in url:
+        return "archives"
+    if "/submissions/" in url:
+        return "submissions"
+    if "/files/company_tickers" in url:
+        return "company_tickers"
+    if "/api/xbrl/" in url:
+        return "xbrl"
+    return "other"
+
+
+def sec_archive_url(cik: str, accession: str, filename: str) -> str:
+    acc_nodash = accession.replace("-", "")
+    return f"{SEC_BASE}/Archives/edgar/data/{int(cik)}/{acc_nodash}/{filename}"
+
+
+def ticker_map_from_company_tickers(payload: dict[str, dict[str, Any]]) -> dict[str, str]:
+    return {
+        item["ticker"].upper(): str(item["cik_str"]).zfill(10)
+        for item in payload.values()
+    }
+
+
+def parse_items(value: str | None) -> tuple[str, ...]:
+    return tuple(code.strip() for code in (value or "").split(",") if code.strip())
 
 
 def list_filings(submissions_json: dict[str, Any], form_types: set[str]) -> list[FilingMeta]:
@@ -85,6 +300,7 @@ def list_filings(submissions_json: dict[str, Any], form_types: set[str]) -> list
     dates = recent.get("filingDate", [])
     accessions = recent.get("accessionNumber", [])
     primary_docs = recent.get("primaryDocument", [])
+    items = recent.get("items", [])
 
     result: list[FilingMeta] = []
     for idx, form in enumerate(forms):
@@ -96,6 +312,7 @@ def list_filings(submissions_json: dict[str, Any], form_types: set[str]) -> list
                 filing_date=dates[idx],
                 accession=accessions[idx],
                 primary_document=primary_docs[idx],
+                items=parse_items(items[idx]) if idx < len(items) else (),
             )
         )
 
@@ -0,0 +1,475 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Mapping
+
+import requests
+from googleapiclient.errors import HttpError
+
+from .conversion import ConversionExecutor
+from .document_builder import is_pdf_file, normalize_file_to_pdf, raw_download_path
+from .document_store import PASSTHROUGH, DocumentStore, render_variant
+from .drive_client import DriveClient
+from .drive_sync import DriveSync
+from .filing_selector import EarningsExhibits, identify_latest_earnings_8k
+from .filing_table import FilingTable, PageLoader
+from .metrics import METRICS
+from .pdf_renderer import RenderOptions
+from .reporting import CompanyResult
+from .search_index import SearchDocument, SearchIndexer, document_text_path
+from .sec_client import DocumentTooLargeError, FilingMeta, SecClient, sec_archive_url
+from .state_store import CompanyState, DocumentState, StateStore
+
+
+EARNINGS_KINDS = ("EarningsDeck", "Transcript")
+
+
+@dataclass
+class DocumentTask:
+    kind: str
+    source_url: str
+    output_path: Path
+    accession: str = ""
+    form: str = ""
+    filing_date: str = ""
+    raw_path: Path | None = None
+    pdf_path: Path | None = None
+    drive_file_id: str = ""
+    unchanged: bool = False
+    bytes: int = 0
+    content_type: str = ""
+    content_digest: str = ""
+    conversion_seconds: float = 0.0
+    error: str = ""
+
+
+@dataclass
+class CompanyJob:
+    ticker: str
+    company_name: str
+    cik: str = ""
+    resolved_company_name: str = ""
+    latest_8k_accession: str = ""
+    drive_folder_id: str = ""
+    drive_folder_link: str = ""
+    documents: list[DocumentTask] = field(default_factory=list)
+    # Exception class name when a stage raised, so a crash is not mistaken
+    # for a company without filings.
+    error: str = ""
+
+
+@dataclass(frozen=True)
+class StageOptions:
+    state: StateStore | None = None
+    max_document_bytes: int | None = None
+    text_extractor: str = "stream"
+    converter: ConversionExecutor | None = None
+    drive_sync: DriveSync | None = None
+    render: RenderOptions = RenderOptions()
+    search_indexer: SearchIndexer | None = None
+    document_store: DocumentStore | None = None
+
+
+def document_output_path(output_dir: Path, ticker: str, kind: str) -> Path:
+    return output_dir / ticker / f"{ticker}_{kind}.pdf"
+
+
+def failed_result(ticker: str, company_name: str) -> CompanyResult:
+    # Every runner builds its failure rows here, so this is where failures are counted.
+    METRICS.incr("companies_failed_total")
+    return CompanyResult(company_name or ticker, ticker, "", False, False, False, False)
+
+
+def select_filings(
+    submissions: dict[str, Any],
+    page_loader: PageLoader | None = None,
+) -> tuple[FilingMeta | None, FilingMeta | None, list[FilingMeta]]:
+    table = FilingTable.from_submissions(submissions, page_loader)
+    return table.latest("10-K"), table.latest("10-Q"), table.filings({"8-K", "8-K/A"})
+
+
+def plan_documents(
+    job: CompanyJob,
+    output_dir: Path,
+    latest_10k: FilingMeta | None,
+    latest_10q: FilingMeta | None,
+    earnings: EarningsExhibits | None,
+) -> None:
+    ticker = job.ticker.upper()
+    (output_dir / ticker).mkdir(parents=True, exist_ok=True)
+
+    def add(kind: str, filing: FilingMeta, filename: str) -> None:
+        job.documents.append(
+            DocumentTask(
+                kind=kind,
+                source_url=sec_archive_url(job.cik, filing.accession, filename),
+                output_path=document_output_path(output_dir, ticker, kind),
+                accession=filing.accession,
+                form=filing.form,
+                filing_date=filing.filing_date,
+            )
+        )
+
+    if latest_10k:
+        add("10K", latest_10k, latest_10k.primary_document)
+    if latest_10q:
+        add("10Q", latest_10q, latest_10q.primary_document)
+    if earnings:
+        if earnings.deck_filename:
+            add("EarningsDeck", earnings.filing, earnings.deck_filename)
+        if earnings.transcript_filename:
+            add("Transcript", earnings.filing, earnings.transcript_filename)
+
+
+@METRICS.timed("stage_seconds", stage="resolve")
+def resolve_company(
+    sec: SecClient,
+    job: CompanyJob,
+    output_dir: Path,
+    ticker_to_cik: Mapping[str, str],
+    options: StageOptions = StageOptions(),
+) -> None:
+    ticker = job.ticker.upper()
+    cik = ticker_to_cik.get(ticker)
+    if not cik:
+        logging.warning("No CIK found for ticker=%s", job.ticker)
+        return
+
+    submissions = sec.get_submissions(cik)
+    job.cik = cik
+    job.resolved_company_name = job.company_name or submissions.get("name", ticker)
+
+    latest_10k, latest_10q, latest_8ks = select_filings(submissions, sec.get_submissions_page)
+    job.latest_8k_accession = latest_8ks[0].accession if latest_8ks else ""
+    state = options.state
+    previous = state.get_company(cik) if state else None
+    if previous and previous.latest_8k_accession == job.latest_8k_accession:
+        plan_documents(job, output_dir, latest_10k, latest_10q, None)
+        reuse_earnings_documents(job, output_dir, state)
+    else:
+        earnings = identify_latest_earnings_8k(sec, cik, latest_8ks)
+        plan_documents(job, output_dir, latest_10k, latest_10q, earnings)
+    if previous:
+        apply_previous_state(job, previous, state)
+
+
+def reuse_earnings_documents(job: CompanyJob, output_dir: Path, state: StateStore) -> None:
+    stored = state.get_documents(job.cik)
+    ticker = job.ticker.upper()
+    for kind in EARNINGS_KINDS:
+        if kind in stored:
+            job.documents.append(
+                DocumentTask(
+                    kind=kind,
+                    source_url=stored[kind].source_url,
+                    output_path=document_output_path(output_dir, ticker, kind),
+                    accession=stored[kind].accession,
+                )
+            )
+
+
+def apply_previous_state(job: CompanyJob, previous: CompanyState, state: StateStore) -> None:
+    job.drive_folder_id = previous.drive_folder_id
+    job.drive_folder_link = previous.drive_folder_link
+    stored = state.get_documents(job.cik)
+    for document in job.documents:
+        prior = stored.get(document.kind)
+        if prior is None:
+            continue
+        document.drive_file_id = prior.drive_file_id
+        document.unchanged = prior.accession == document.accession and bool(prior.drive_file_id)
+    unchanged = sum(document.unchanged for document in job.documents)
+    logging.info(
+        "Incremental ticker=%s: %d of %d documents unchanged",
+        job.ticker,
+        unchanged,
+        len(job.documents),
+    )
+
+
+@METRICS.timed("stage_seconds", stage="download")
+def download_documents(
+    sec: SecClient,
+    job: CompanyJob,
+    options: StageOptions = StageOptions(),
+    skip_http_errors: bool = False,
+) -> None:
+    # A backfill chunk holds many filings, so it skips a document SEC refuses
+    # instead of failing the whole chunk on every resume.
+    for document in job.documents:
+        if document.unchanged or reuse_stored_download(document, options):
+            continue
+        try:
+            document.raw_path = sec.download_to_file(
+                document.source_url,
+                raw_download_path(document.output_path),
+                max_bytes=options.max_document_bytes,
+            )
+        except DocumentTooLargeError as exc:
+            logging.warning("Skipping %s for ticker=%s: %s", document.kind, job.ticker, exc)
+            document.error = type(exc).__name__
+            continue
+        except requests.HTTPError as exc:
+            if not skip_http_errors:
+                raise
+            logging.warning("Skipping %s for ticker=%s: %s", document.kind, job.ticker, exc)
+            METRICS.incr("document_download_failures_total", kind=document.kind)
+            document.error = type(exc).__name__
+            continue
+        note_download(document, options)
+
+
+def reuse_stored_download(document: DocumentTask, options: StageOptions) -> bool:
+    if options.document_store is None:
+        return False
+    stored = options.document_store.find(document.source_url)
+    if stored is None:
+        return False
+    document.content_digest = stored.digest
+    document.bytes = stored.bytes
+    document.content_type = stored.content_type
+    METRICS.incr("document_store_hits_total", stage="download")
+    return True
+
+
+def note_download(document: DocumentTask, options: StageOptions = StageOptions()) -> None:
+    document.bytes = document.raw_path.stat().st_size
+    document.content_type = "application/pdf" if is_pdf_file(document.raw_path) else "text/html"
+    if options.document_store is not None:
+        stored = options.document_store.add_raw(document.source_url, document.raw_path, document.content_type)
+        document.content_digest = stored.digest
+        document.raw_path = None
+
+
+@METRICS.timed("stage_seconds", stage="convert")
+def convert_documents(job: CompanyJob, options: StageOptions = StageOptions()) -> None:
+    for document in job.documents:
+        if document.content_digest and options.document_store is not None:
+            convert_stored_document(job, document, options)
+            continue
+        if document.raw_path is None:
+            continue
+        text_path = document_text_path(document.output_path) if options.search_indexer else None
+        try:
+            converted = _normalize(job, document, document.raw_path, document.output_path, text_path, options)
+        finally:
+            document.raw_path.unlink(missing_ok=True)
+            document.raw_path = None
+        if converted:
+            document.pdf_path = document.output_path
+            index_document_text(job, document, text_path, options)
+
+
+def convert_stored_document(job: CompanyJob, document: DocumentTask, options: StageOptions) -> None:
+    store = options.document_store
+    digest = document.content_digest
+    if document.content_type == "application/pdf":
+        variant = PASSTHROUGH
+    else:
+        variant = render_variant(options.text_extractor, options.render)
+    if store.has_rendition(digest, variant):
+        METRICS.incr("document_store_hits_total", stage="convert")
+    else:
+        rendered = store.temp_path(".pdf")
+        # The text is kept in the store too, so every company that links this
+        # rendition later can still be indexed for search.
+        text = store.temp_path(".txt") if options.search_indexer else None
+        if not _normalize(job, document, store.raw_path(digest), rendered, text, options):
+            return
+        store.add_rendition(digest, variant, rendered, text)
+    document.pdf_path = store.link(document.output_path, digest, variant)
+    if options.search_indexer is not None:
+        text_path = store.link_text(document_text_path(document.output_path), digest, variant)
+        index_document_text(job, document, text_path, options)
+
+
+def _normalize(
+    job: CompanyJob,
+    document: DocumentTask,
+    raw_path: Path,
+    output_path: Path,
+    text_path: Path | None,
+    options: StageOptions,
+) -> bool:
+    if options.converter is not None:
+        outcome = options.converter.convert(
+            raw_path, output_path, options.text_extractor, options.render, text_path
+        )
+        document.conversion_seconds = outcome.seconds
+        METRICS.observe("document_conversion_seconds", outcome.seconds, kind=document.kind)
+        if outcome.error:
+            METRICS.incr("document_conversion_failures_total", kind=document.kind, error=outcome.error)
+            document.error = outcome.error
+            output_path.unlink(missing_ok=True)
+            if text_path is not None:
+                text_path.unlink(missing_ok=True)
+            logging.warning(
+                "Dropping %s for ticker=%s: conversion %s", document.kind, job.ticker, outcome.error
+            )
+            return False
+        return True
+
+    started = time.perf_counter()
+    try:
+        normalize_file_to_pdf(raw_path, output_path, options.text_extractor, options.render, text_path)
+    except Exception:
+        if text_path is not None:
+            text_path.unlink(missing_ok=True)
+        raise
+    document.conversion_seconds = time.perf_counter() - started
+    METRICS.observe("document_conversion_seconds", document.conversion_seconds, kind=document.kind)
+    return True
+
+
+def index_document_text(
+    job: CompanyJob,
+    document: DocumentTask,
+    text_path: Path | None,
+    options: StageOptions,
+) -> None:
+    # PDF filings are passed through untouched, so only HTML leaves text behind.
+    if text_path is None or not text_path.exists():
+        return
+    options.search_indexer.add(
+        SearchDocument(
+            ticker=job.ticker.upper(),
+            kind=document.kind,
+            form=document.form,
+            accession=document.accession,
+            filing_date=document.filing_date,
+            source_url=document.source_url,
+            text_path=text_path,
+        )
+    )
+
+
+def _upload_or_replace(drive: DriveClient, folder_id: str, document: DocumentTask) -> str:
+    if document.drive_file_id:
+        try:
+            file_id, _ = drive.update_file(document.drive_file_id, document.pdf_path)
+            return file_id
+        except HttpError as exc:
+            if exc.resp.status != 404:
+                raise
+            logging.info("Drive file %s is gone, uploading a new copy", document.drive_file_id)
+    file_id, _ = drive.upload_file(folder_id, document.pdf_path)
+    return file_id
+
+
+def company_folder_name(job: CompanyJob) -> str:
+    return f"{job.ticker.upper()} - {job.resolved_company_name}"
+
+
+def prepare_company_folders(
+    drive: DriveClient,
+    jobs: list[CompanyJob],
+    drive_parent_folder_id: str | None,
+    options: StageOptions = StageOptions(),
+) -> None:
+    missing = [job for job in jobs if job.cik and not job.drive_folder_id]
+    if len(missing) < 2:
+        return
+    sync = options.drive_sync
+    if sync is not None:
+        for job in missing:
+            folder = sync.find_folder(company_folder_name(job), drive_parent_folder_id)
+            if folder is not None:
+                job.drive_folder_id, job.drive_folder_link = folder
+        missing = [job for job in missing if not job.drive_folder_id]
+    if len(missing) < 2:
+        return
+    folders = drive.create_company_folders(
+        [company_folder_name(job) for job in missing],
+        parent_folder_id=drive_parent_folder_id,
+    )
+    for job, folder in zip(missing, folders):
+        if folder is None:
+            # Its batched create failed; upload_documents creates it on its own.
+            continue
+        folder_id, folder_link = folder
+        job.drive_folder_id, job.drive_folder_link = folder_id, folder_link
+        if sync is not None:
+            sync.remember_folder(
+                company_folder_name(job),
+                drive_parent_folder_id,
+                folder_id,
+                folder_link,
+                created=True,
+            )
+
+
+@METRICS.timed("stage_seconds", stage="upload")
+def upload_documents(
+    drive: DriveClient,
+    job: CompanyJob,
+    drive_parent_folder_id: str | None,
+    options: StageOptions = StageOptions(),
+) -> CompanyResult:
+    ticker = job.ticker.upper()
+    if not job.cik:
+        return failed_result(ticker, job.company_name or ticker)
+
+    folder_name = company_folder_name(job)
+    sync = options.drive_sync
+    if job.drive_folder_id:
+        folder_id, folder_link = job.drive_folder_id, job.drive_folder_link
+    elif sync is not None:
+        folder_id, folder_link = sync.company_folder(folder_name, drive_parent_folder_id)
+    else:
+        folder_id, folder_link = drive.create_company_folder(
+            folder_name,
+            parent_folder_id=drive_parent_folder_id,
+        )
+    if sync is not None:
+        synced = [doc for doc in job.documents if doc.pdf_path]
+        (folder_id, folder_link), file_ids = sync.sync_files(
+            folder_name,
+            drive_parent_folder_id,
+            (folder_id, folder_link),
+            [doc.pdf_path for doc in synced],
+        )
+        for document in synced:
+            document.drive_file_id = file_ids[document.pdf_path]
+    else:
+        for document in [doc for doc in job.documents if doc.pdf_path and doc.drive_file_id]:
+            document.drive_file_id = _upload_or_replace(drive, folder_id, document)
+        new_documents = [doc for doc in job.documents if doc.pdf_path and not doc.drive_file_id]
+        uploads = drive.upload_files(folder_id, [doc.pdf_path for doc in new_documents])
+        for document, (file_id, _) in zip(new_documents, uploads):
+            document.drive_file_id = file_id
+
+    available = [doc for doc in job.documents if doc.pdf_path or doc.unchanged]
+    if options.state is not None:
+        options.state.save(
+            CompanyState(
+                cik=job.cik,
+                ticker=ticker,
+                company_name=job.resolved_company_name,
+                latest_8k_accession=job.latest_8k_accession,
+                drive_folder_id=folder_id,
+                drive_folder_link=folder_link,
+            ),
+            [
+                DocumentState(
+                    kind=doc.kind,
+                    accession=doc.accession,
+                    source_url=doc.source_url,
+                    drive_file_id=doc.drive_file_id,
+                )
+                for doc in available
+            ],
+        )
+
+    kinds = {doc.kind for doc in available}
+    return CompanyResult(
+        company_name=job.resolved_company_name,
+        ticker=ticker,
+        drive_folder_link=folder_link,
+        has_10k="10K" in kinds,
+        has_10q="10Q" in kinds,
+        has_deck="EarningsDeck" in kinds,
+        has_transcript="Transcript" in kinds,
+    )
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from .db import connect
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS companies (
+    cik TEXT PRIMARY KEY,
+    ticker TEXT NOT NULL,
+    company_name TEXT NOT NULL,
+    latest_8k_accession TEXT NOT NULL,
+    drive_folder_id TEXT NOT NULL,
+    drive_folder_link TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS documents (
+    cik TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    accession TEXT NOT NULL,
+    source_url TEXT NOT NULL,
+    drive_file_id TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (cik, kind)
+);
+"""
+
+
+@dataclass(frozen=True)
+class CompanyState:
+    cik: str
+    ticker: str
+    company_name: str
+    latest_8k_accession: str
+    drive_folder_id: str
+    drive_folder_link: str
+
+
+@dataclass(frozen=True)
+class DocumentState:
+    kind: str
+    accession: str
+    source_url: str
+    drive_file_id: str
+
+
+class StateStore:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = connect(path)
+        self._db.executescript(_SCHEMA)
+
+    def get_company(self, cik: str) -> CompanyState | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT cik, ticker, company_name, latest_8k_accession, drive_folder_id,"
+                " drive_folder_link FROM companies WHERE cik = ?",
+                (cik,),
+            ).fetchone()
+        return CompanyState(**dict(row)) if row else None
+
+    def get_documents(self, cik: str) -> dict[str, DocumentState]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT kind, accession, source_url, drive_file_id FROM documents WHERE cik = ?",
+                (cik,),
+            ).fetchall()
+        return {row["kind"]: DocumentState(**dict(row)) for row in rows}
+
+    def save(self, company: CompanyState, documents: list[DocumentState]) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO companies (cik, ticker, company_name, latest_8k_accession,"
+                " drive_folder_id, drive_folder_link, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    company.cik,
+                    company.ticker,
+                    company.company_name,
+                    company.latest_8k_accession,
+                    company.drive_folder_id,
+                    company.drive_folder_link,
+                    now,
+                ),
+            )
+            self._db.execute("DELETE FROM documents WHERE cik = ?", (company.cik,))
+            self._db.executemany(
+                "INSERT INTO documents (cik, kind, accession, source_url, drive_file_id, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (company.cik, doc.kind, doc.accession, doc.source_url, doc.drive_file_id, now)
+                    for doc in documents
+                ],
+            )
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import BinaryIO, Callable, Iterator
+
+from bs4 import BeautifulSoup, Tag
+
+
+SKIP_TAGS = {"script", "style", "noscript", "ix:header"}
+BLOCK_TAGS = {
+    "address", "article", "blockquote", "br", "caption", "dd", "div", "dl", "dt",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hr", "li", "ol", "p", "pre", "section",
+    "table", "tbody", "tfoot", "thead", "tr", "ul",
+}
+CELL_TAGS = {"td", "th"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "wbr"}
+HIDDEN_STYLE = re.compile(r"display\s*:\s*none", re.IGNORECASE)
+CHARSET_PATTERN = re.compile(rb"charset=[\"']?([A-Za-z0-9_\-]+)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+READ_CHUNK_BYTES = 64 * 1024
+
+
+class _StreamingTextParser(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.lines: list[str] = []
+        self._parts: list[str] = []
+        self._skip_tag: str | None = None
+        self._skip_depth = 0
+
+    def _flush_line(self) -> None:
+        if not self._parts:
+            return
+        line = _WHITESPACE.sub(" ", "".join(self._parts)).strip()
+        self._parts.clear()
+        if line:
+            self.lines.append(line)
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self._skip_tag is not None:
+            if tag == self._skip_tag and tag not in VOID_TAGS:
+                self._skip_depth += 1
+            return
+        if tag in SKIP_TAGS or HIDDEN_STYLE.search(dict(attrs).get("style") or ""):
+            if tag not in VOID_TAGS:
+                self._skip_tag = tag
+                self._skip_depth = 1
+            return
+        if tag in BLOCK_TAGS:
+            self._flush_line()
+        elif tag in CELL_TAGS:
+            self._parts.append(" ")
+
+    def handle_startendtag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self._skip_tag is None and tag in BLOCK_TAGS:
+            self._flush_line()
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+        if tag in BLOCK_TAGS:
+            self._flush_line()
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_tag is None:
+            self._parts.append(data)
+
+    def drain(self) -> list[str]:
+        lines, self.lines = self.lines, []
+        return lines
+
+    def close(self) -> None:
+        super().close()
+        self._flush_line()
+
+
+def _decode_as_cp1252(error: UnicodeError) -> tuple[str, int]:
+    if not isinstance(error, UnicodeDecodeError):
+        raise error
+    return error.object[error.start : error.end].decode("cp1252", "replace"), error.end
+
+
+# Older EDGAR filings are often cp1252 without saying so. Bytes that are not
+# valid UTF-8 in an undeclared document are read as cp1252 rather than U+FFFD.
+codecs.register_error("cp1252_fallback", _decode_as_cp1252)
+
+
+def _sniff_encoding(head: bytes) -> tuple[str, str]:
+    match = CHARSET_PATTERN.search(head[:4096])
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode("ascii")).name, "replace"
+        except LookupError:
+            pass
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig", "replace"
+    try:
+        # An incremental decode tolerates a character cut off at the end of the head.
+        codecs.getincrementaldecoder("utf-8")().decode(head)
+    except UnicodeDecodeError:
+        return "cp1252", "replace"
+    return "utf-8", "cp1252_fallback"
+
+
+def iter_text_lines(handle: BinaryIO, chunk_size: int = READ_CHUNK_BYTES) -> Iterator[str]:
+    head = handle.read(chunk_size)
+    encoding, errors = _sniff_encoding(head)
+    decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+    parser = _StreamingTextParser()
+    chunk = head
+    while chunk:
+        parser.feed(decoder.decode(chunk))
+        yield from parser.drain()
+        chunk = handle.read(chunk_size)
+    parser.feed(decoder.decode(b"", final=True))
+    parser.close()
+    yield from parser.drain()
+
+
+def _is_skipped(tag: Tag) -> bool:
+    return tag.name in SKIP_TAGS or bool(HIDDEN_STYLE.search(tag.get("style") or ""))
+
+
+def iter_text_lines_bs4(handle: BinaryIO) -> Iterator[str]:
+    # Drops the same elements as the streaming parser, so both extractors
+    # produce the same text.
+    soup = BeautifulSoup(handle, "html.parser")
+    for tag in soup.find_all(_is_skipped):
+        if not tag.decomposed:
+            tag.decompose()
+    yield from soup.get_text("\n", strip=True).splitlines()
+
+
+EXTRACTORS: dict[str, Callable[[BinaryIO], Iterator[str]]] = {
+    "stream": iter_text_lines,
+    "bs4": iter_text_lines_bs4,
+}
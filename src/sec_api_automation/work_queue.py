@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable
+
+from .db import connect
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    ticker TEXT PRIMARY KEY,
+    company_name TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker_id TEXT NOT NULL DEFAULT '',
+    lease_expires REAL NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS tasks_claimable ON tasks(status, position);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+# A ticker whose lease has expired this many times is assumed to crash its
+# worker and is parked as 'failed' instead of being handed out again.
+MAX_ATTEMPTS = 3
+
+
+@dataclass(frozen=True)
+class QueuedTicker:
+    ticker: str
+    company_name: str
+    position: int
+    status: str
+
+
+class WorkQueue:
+    def __init__(self, path: Path, lease_seconds: float = 120.0) -> None:
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._db = connect(path, wal=False)
+        self._db.executescript(_SCHEMA)
+
+    def enqueue(self, rows: Iterable[tuple[str, str]]) -> int:
+        # Every worker may enqueue the same CSV; the first insert of a ticker wins.
+        with self._lock, self._db:
+            start = self._db.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM tasks").fetchone()[0]
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO tasks (ticker, company_name, position) VALUES (?, ?, ?)",
+                [(ticker, name, start + offset) for offset, (ticker, name) in enumerate(rows)],
+            )
+            return self._db.total_changes - before
+
+    def claim(self, worker_id: str, limit: int) -> list[QueuedTicker]:
+        now = time.time()
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock before reading, so two workers
+            # never claim the same row.
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "UPDATE tasks SET status = 'failed', updated_at = ?"
+                    " WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, now, MAX_ATTEMPTS),
+                )
+                rows = self._db.execute(
+                    "SELECT ticker, company_name, position, status FROM tasks"
+                    " WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)"
+                    " ORDER BY position LIMIT ?",
+                    (now, limit),
+                ).fetchall()
+                for row in rows:
+                    if row["status"] == "leased":
+                        logging.warning("Reclaiming ticker=%s from an expired lease", row["ticker"])
+                self._db.executemany(
+                    "UPDATE tasks SET status = 'leased', worker_id = ?, lease_expires = ?,"
+                    " attempts = attempts + 1, updated_at = ? WHERE ticker = ?",
+                    [(worker_id, now + self.lease_seconds, now, row["ticker"]) for row in rows],
+                )
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        return [QueuedTicker(row["ticker"], row["company_name"], row["position"], "leased") for row in rows]
+
+    def complete(self, worker_id: str, ticker: str) -> bool:
+        # Only the current lease holder can finish a ticker. False means the
+        # lease expired, and perhaps went to another worker, so the caller's
+        # result must be dropped.
+        now = time.time()
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "UPDATE tasks SET status = 'done', updated_at = ?"
+                " WHERE ticker = ? AND status = 'leased' AND worker_id = ? AND lease_expires > ?",
+                (now, ticker, worker_id, now),
+            )
+        return cursor.rowcount == 1
+
+    def heartbeat(self, worker_id: str, host: str) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO workers (worker_id, host, heartbeat_at) VALUES (?, ?, ?)",
+                (worker_id, host, now),
+            )
+            self._db.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE status = 'leased' AND worker_id = ?",
+                (now + self.lease_seconds, worker_id),
+            )
+
+    def leave(self, worker_id: str) -> None:
+        # Tickers still leased on a clean exit go straight back to the queue and
+        # do not count as a failed attempt.
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+            self._db.execute(
+                "UPDATE tasks SET status = 'pending', lease_expires = 0, attempts = attempts - 1"
+                " WHERE status = 'leased' AND worker_id = ?",
+                (worker_id,),
+            )
+
+    def live_workers(self, host: str | None = None) -> int:
+        query = "SELECT COUNT(*) FROM workers WHERE heartbeat_at >= ?"
+        params: tuple[object, ...] = (time.time() - self.lease_seconds,)
+        if host is not None:
+            query += " AND host = ?"
+            params += (host,)
+        with self._lock:
+            return self._db.execute(query, params).fetchone()[0]
+
+    def tickers(self) -> list[QueuedTicker]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT ticker, company_name, position, status FROM tasks ORDER BY position"
+            ).fetchall()
+        return [QueuedTicker(**dict(row)) for row in rows]
+
+    def counts(self) -> dict[str, int]:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+
+# Renews this worker's leases from a background thread and re-divides the SEC
+# request budget whenever the number of live workers changes.
+class LeaseKeeper:
+    def __init__(
+        self,
+        work_queue: WorkQueue,
+        worker_id: str,
+        host: str,
+        on_share_change: Callable[[int], None] | None = None,
+        share_across_hosts: bool = False,
+    ) -> None:
+        self.work_queue = work_queue
+        self.worker_id = worker_id
+        self.host = host
+        self.on_share_change = on_share_change
+        self.share_across_hosts = share_across_hosts
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-keeper", daemon=True)
+        self._sharing_with = 0
+
+    def __enter__(self) -> "LeaseKeeper":
+        self.beat()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.work_queue.leave(self.worker_id)
+
+    def beat(self) -> None:
+        self.work_queue.heartbeat(self.worker_id, self.host)
+        workers = max(1, self.work_queue.live_workers(None if self.share_across_hosts else self.host))
+        if workers != self._sharing_with:
+            self._sharing_with = workers
+            if self.on_share_change is not None:
+                self.on_share_change(workers)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.work_queue.lease_seconds / 3):
+            try:
+                self.beat()
+            except Exception as exc:  # noqa: BLE001
+                logging.warning("Queue heartbeat failed: %s", exc)
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import csv
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any, Iterable
+
+import requests
+
+from .bulk_submissions import SubmissionsArchive
+from .metrics import METRICS
+from .sec_client import SEC_BASE, SEC_DATA_BASE, SecClient
+
+
+COMPANYFACTS_ZIP_URL = f"{SEC_BASE}/Archives/edgar/daily-index/xbrl/companyfacts.zip"
+
+
+@dataclass(frozen=True)
+class Concept:
+    column: str
+    # Filers report the same line item under different tags; for each company
+    # and period the first tag with a value wins.
+    tags: tuple[str, ...]
+    unit: str = "USD"
+    taxonomy: str = "us-gaap"
+    instant: bool = False
+
+
+DEFAULT_CONCEPTS = (
+    Concept(
+        "revenue",
+        (
+            "Revenues",
+            "RevenueFromContractWithCustomerExcludingAssessedTax",
+            "SalesRevenueNet",
+            "RevenueFromContractWithCustomerIncludingAssessedTax",
+        ),
+    ),
+    Concept("gross_profit", ("GrossProfit",)),
+    Concept("operating_income", ("OperatingIncomeLoss",)),
+    Concept("net_income", ("NetIncomeLoss", "ProfitLoss")),
+    Concept("eps_basic", ("EarningsPerShareBasic",), unit="USD-per-shares"),
+    Concept("eps_diluted", ("EarningsPerShareDiluted",), unit="USD-per-shares"),
+    Concept("operating_cash_flow", ("NetCashProvidedByUsedInOperatingActivities",)),
+    Concept("total_assets", ("Assets",), instant=True),
+    Concept("total_liabilities", ("Liabilities",), instant=True),
+    Concept(
+        "stockholders_equity",
+        ("StockholdersEquity", "StockholdersEquityIncludingPortionAttributableToNoncontrollingInterest"),
+        instant=True,
+    ),
+    Concept("cash", ("CashAndCashEquivalentsAtCarryingValue",), instant=True),
+    Concept(
+        "shares_outstanding",
+        ("EntityCommonStockSharesOutstanding",),
+        unit="shares",
+        taxonomy="dei",
+        instant=True,
+    ),
+)
+
+
+@dataclass(frozen=True)
+class Fact:
+    entity_name: str
+    value: float
+    end: str
+
+
+def frame_name(period: str, instant: bool) -> str:
+    # Frames name durations CY2023 and CY2023Q4. Balance-sheet values are
+    # instants, named for the last day of the period: CY2023 -> CY2023Q4I.
+    if not instant:
+        return period
+    return f"{period}I" if "Q" in period else f"{period}Q4I"
+
+
+def default_periods(today: date, quarters: int = 4) -> list[str]:
+    # The last full calendar year and the last `quarters` full calendar quarters.
+    year, quarter = today.year, (today.month - 1) // 3
+    periods = [f"CY{year - 1}"]
+    for _ in range(quarters):
+        if quarter == 0:
+            year, quarter = year - 1, 4
+        periods.append(f"CY{year}Q{quarter}")
+        quarter -= 1
+    return periods
+
+
+def frames_url(taxonomy: str, tag: str, unit: str, frame: str) -> str:
+    return f"{SEC_DATA_BASE}/api/xbrl/frames/{taxonomy}/{tag}/{unit}/{frame}.json"
+
+
+def fetch_frame(sec: SecClient, taxonomy: str, tag: str, unit: str, frame: str) -> list[dict[str, Any]]:
+    try:
+        payload = sec.get_json(frames_url(taxonomy, tag, unit, frame))
+    except requests.HTTPError as exc:
+        # No filer reported this tag for the period.
+        if exc.response is not None and exc.response.status_code == 404:
+            return []
+        raise
+    METRICS.incr("xbrl_frames_total", taxonomy=taxonomy)
+    return payload.get("data", [])
+
+
+def load_concepts(csv_path: Path) -> list[Concept]:
+    # Columns: column, taxonomy, tag, unit, instant. Several rows for one column
+    # list its fallback tags in order.
+    concepts: dict[str, Concept] = {}
+    with csv_path.open("r", newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            column = row["column"].strip()
+            previous = concepts.get(column)
+            concepts[column] = Concept(
+                column=column,
+                tags=(*(previous.tags if previous else ()), row["tag"].strip()),
+                unit=(row.get("unit") or "USD").strip(),
+                taxonomy=(row.get("taxonomy") or "us-gaap").strip(),
+                instant=(row.get("instant") or "").strip().lower() in {"1", "true", "yes"},
+            )
+    return list(concepts.values())
+
+
+# Facts keyed by (CIK, period), each a mapping of concept column to its fact.
+FinancialFacts = dict[tuple[str, str], dict[str, Fact]]
+
+
+def _keep_first(facts: FinancialFacts, key: tuple[str, str], column: str, fact: Fact) -> None:
+    facts.setdefault(key, {}).setdefault(column, fact)
+
+
+def collect_frames(
+    sec: SecClient,
+    concepts: Iterable[Concept],
+    periods: list[str],
+    ciks: Iterable[str],
+    workers: int = 4,
+) -> FinancialFacts:
+    # One frames request per tag and period covers every filer at once; rows
+    # for companies outside `ciks` are dropped.
+    wanted = {str(cik).zfill(10) for cik in ciks}
+    lookups = [
+        (concept, tag, period)
+        for concept in concepts
+        for tag in concept.tags
+        for period in periods
+    ]
+
+    def fetch(lookup: tuple[Concept, str, str]) -> list[dict[str, Any]]:
+        concept, tag, period = lookup
+        return fetch_frame(sec, concept.taxonomy, tag, concept.unit, frame_name(period, concept.instant))
+
+    facts: FinancialFacts = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        # map() keeps request order, so tags are applied in their listed order.
+        for (concept, _, period), rows in zip(lookups, pool.map(fetch, lookups)):
+            for row in rows:
+                cik = str(row.get("cik", "")).zfill(10)
+                if cik not in wanted:
+                    continue
+                fact = Fact(row.get("entityName", ""), row["val"], row.get("end", ""))
+                _keep_first(facts, (cik, period), concept.column, fact)
+    logging.info("Read %d XBRL frames for %d companies", len(lookups), len(wanted))
+    return facts
+
+
+def collect_companyfacts(
+    archive: SubmissionsArchive,
+    concepts: Iterable[Concept],
+    periods: list[str],
+    ciks: Iterable[str],
+) -> FinancialFacts:
+    # companyfacts.zip holds one CIK##########.json per filer with every fact it
+    # has reported. Facts carry the same `frame` label the frames API uses, so
+    # both sources pick the same value.
+    concepts = list(concepts)
+    facts: FinancialFacts = {}
+    for cik in sorted({str(cik).zfill(10) for cik in ciks}):
+        payload = archive.get(cik)
+        if payload is None:
+            continue
+        entity_name = payload.get("entityName", "")
+        for concept in concepts:
+            frames = {frame_name(period, concept.instant): period for period in periods}
+            for tag in concept.tags:
+                units = payload.get("facts", {}).get(concept.taxonomy, {}).get(tag, {}).get("units", {})
+                for row in units.get(concept.unit, []):
+                    period = frames.get(row.get("frame", ""))
+                    if period is not None:
+                        fact = Fact(entity_name, row["val"], row.get("end", ""))
+                        _keep_first(facts, (cik, period), concept.column, fact)
+    return facts
+
+
+def write_financials(
+    csv_path: Path,
+    companies: list[tuple[str, str, str]],
+    periods: list[str],
+    concepts: Iterable[Concept],
+    facts: FinancialFacts,
+) -> int:
+    # One row per company and period, one column per concept. `companies` is
+    # (ticker, CIK, name) in input order; an empty name is taken from XBRL.
+    columns = [concept.column for concept in concepts]
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = csv_path.with_name(f"{csv_path.name}.tmp")
+    rows = 0
+    with tmp_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(["ticker", "cik", "company_name", "period", "period_end", *columns])
+        for ticker, cik, company_name in companies:
+            for period in periods:
+                values = facts.get((cik, period))
+                if not values:
+                    continue
+                first = next(iter(values.values()))
+                ends = [values[column].end for column in columns if column in values]
+                writer.writerow(
+                    [
+                        ticker,
+                        cik,
+                        company_name or first.entity_name,
+                        period,
+                        max(ends),
+                        *(values[column].value if column in values else "" for column in columns),
+                    ]
+                )
+                rows += 1
+    os.replace(tmp_path, csv_path)
+    return rows
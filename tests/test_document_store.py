@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+from sec_api_automation.document_store import DocumentStore, render_variant
+from sec_api_automation.pdf_renderer import RenderOptions
+from sec_api_automation.search_index import document_text_path
+from sec_api_automation.stages import (
+    CompanyJob,
+    DocumentTask,
+    StageOptions,
+    convert_documents,
+    note_download,
+)
+
+
+SOURCE_URL = "https://www.sec.gov/Archives/edgar/data/320193/000032019324000123/aapl-20240928.htm"
+
+
+class CollectingIndexer:
+    def __init__(self) -> None:
+        self.documents = []
+
+    def add(self, document) -> None:
+        self.documents.append(document)
+
+
+def _sha256(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_storeless_run_does_not_write_through_store_links(tmp_path: Path) -> None:
+    store = DocumentStore(tmp_path / "store")
+    output_path = tmp_path / "output" / "AAPL" / "AAPL_10-K.pdf"
+    text_path = document_text_path(output_path)
+
+    stored_options = StageOptions(document_store=store, search_indexer=CollectingIndexer())
+    document = DocumentTask(kind="10-K", source_url=SOURCE_URL, output_path=output_path)
+    job = CompanyJob(ticker="AAPL", company_name="Apple Inc.", documents=[document])
+    raw_path = output_path.with_name(f"{output_path.stem}.raw")
+    raw_path.parent.mkdir(parents=True)
+    raw_path.write_text("<html><body><p>stored annual report</p></body></html>", encoding="utf-8")
+    document.raw_path = raw_path
+    note_download(document, stored_options)
+    convert_documents(job, stored_options)
+
+    digest = document.content_digest
+    variant = render_variant(stored_options.text_extractor, RenderOptions())
+    blobs = (store.raw_path(digest), store.rendition_path(digest, variant), store.text_path(digest, variant))
+    stored = {path: _sha256(path) for path in blobs}
+    assert output_path.samefile(store.rendition_path(digest, variant))
+    assert text_path.samefile(store.text_path(digest, variant))
+
+    plain_options = StageOptions(search_indexer=CollectingIndexer())
+    document = DocumentTask(kind="10-K", source_url=SOURCE_URL, output_path=output_path)
+    job = CompanyJob(ticker="AAPL", company_name="Apple Inc.", documents=[document])
+    raw_path.write_text("<html><body><p>a different rendition</p></body></html>", encoding="utf-8")
+    document.raw_path = raw_path
+    convert_documents(job, plain_options)
+
+    assert {path: _sha256(path) for path in blobs} == stored
+    assert not output_path.samefile(store.rendition_path(digest, variant))
+    assert text_path.read_text(encoding="utf-8") == "a different rendition\n"
+    assert store.text_path(digest, variant).read_text(encoding="utf-8") == "stored annual report\n"
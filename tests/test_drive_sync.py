@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sec_api_automation.drive_sync import DriveFolderCache, DriveSync
+
+
+class _SlowDrive:
+    def __init__(self) -> None:
+        self.folders: dict[tuple[str, str | None], tuple[str, str]] = {}
+        self.creates = 0
+        self._lock = threading.Lock()
+
+    def find_folder(self, name: str, parent_id: str | None) -> tuple[str, str] | None:
+        time.sleep(0.01)
+        return self.folders.get((name, parent_id))
+
+    def create_company_folder(self, name: str, parent_folder_id: str | None) -> tuple[str, str]:
+        time.sleep(0.01)
+        with self._lock:
+            self.creates += 1
+            folder = (f"id-{self.creates}", f"link-{self.creates}")
+            self.folders[(name, parent_folder_id)] = folder
+        return folder
+
+
+def test_year_chunks_of_one_company_create_each_folder_once(tmp_path: Path) -> None:
+    drive = _SlowDrive()
+    sync = DriveSync(drive, DriveFolderCache(tmp_path / "folders.sqlite3"))
+
+    def upload_year(year: int) -> tuple[str, str]:
+        company = sync.company_folder("AAPL - Apple Inc.", "root")
+        return company, sync.company_folder(str(year), company[0])
+
+    with ThreadPoolExecutor(8) as pool:
+        folders = list(pool.map(upload_year, [2020, 2020, 2021, 2021, 2022, 2022, 2023, 2023]))
+
+    assert len({company for company, _ in folders}) == 1
+    assert len({year for _, year in folders}) == 4
+    assert drive.creates == 5
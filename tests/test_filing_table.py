@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from sec_api_automation.filing_selector import find_latest_form
+from sec_api_automation.filing_table import FilingTable
+from sec_api_automation.sec_client import list_filings
+
+
+def _columns(rows: list[tuple[str, str, str]]) -> dict:
+    return {
+        "form": [form for form, _, _ in rows],
+        "filingDate": [filing_date for _, filing_date, _ in rows],
+        "accessionNumber": [accession for _, _, accession in rows],
+        "primaryDocument": [f"{accession}.htm" for _, _, accession in rows],
+        "items": ["" for _ in rows],
+    }
+
+
+def _submissions(rows: list[tuple[str, str, str]], pages: list[dict] | None = None) -> dict:
+    return {"filings": {"recent": _columns(rows), "files": pages or []}}
+
+
+def _days_ago(days: int) -> str:
+    return (date.today() - timedelta(days=days)).isoformat()
+
+
+def test_same_day_filings_keep_list_filings_order() -> None:
+    # EDGAR lists filings newest-first, including filings made on one day.
+    submissions = _submissions(
+        [
+            ("8-K", "2024-05-01", "8NEW"),
+            ("10-Q", "2024-05-01", "NEW"),
+            ("8-K/A", "2024-05-01", "8AMEND"),
+            ("10-Q", "2024-05-01", "OLD"),
+            ("8-K", "2024-05-01", "8OLD"),
+            ("10-K", "2024-02-01", "K"),
+            ("8-K", "2024-01-15", "8JAN"),
+        ]
+    )
+    table = FilingTable.from_submissions(submissions)
+
+    expected = find_latest_form(list_filings(submissions, {"10-Q"}), "10-Q")
+    assert table.latest("10-Q") == expected
+    assert expected.accession == "NEW"
+    assert table.filings({"8-K", "8-K/A"}) == list_filings(submissions, {"8-K", "8-K/A"})
+    assert [filing.accession for filing in table.between({"8-K"}, "2024-01-01")] == ["8NEW", "8OLD", "8JAN"]
+
+
+def test_latest_stops_loading_history_past_the_lookback_window() -> None:
+    requested: list[str] = []
+    pages = {
+        "page-001.json": _columns([("20-F", _days_ago(800), "F1"), ("6-K", _days_ago(900), "S1")]),
+        "page-002.json": _columns([("20-F", _days_ago(1200), "F2"), ("6-K", _days_ago(1400), "S2")]),
+        "page-003.json": _columns([("20-F", _days_ago(1600), "F3")]),
+    }
+
+    def load(name: str) -> dict:
+        requested.append(name)
+        return pages[name]
+
+    recent = [("6-K", _days_ago(10), "S3"), ("20-F", _days_ago(300), "F0")]
+    files = [{"name": name} for name in pages]
+    table = FilingTable.from_submissions(_submissions(recent, files), load)
+    assert table.latest("10-K") is None
+    assert requested == ["page-001.json"]
+
+    # With filingTo known, a page that ends before the window is never fetched.
+    requested.clear()
+    files = [{"name": "page-001.json", "filingTo": _days_ago(800)}]
+    table = FilingTable.from_submissions(_submissions(recent, files), load)
+    assert table.latest("10-K") is None
+    assert requested == []
+
+    # A date range still reaches back as far as it asks for.
+    requested.clear()
+    table = FilingTable.from_submissions(_submissions(recent, [{"name": name} for name in pages]), load)
+    assert [filing.accession for filing in table.between({"20-F"}, _days_ago(1300))] == ["F0", "F1", "F2"]
+    assert requested == ["page-001.json", "page-002.json"]
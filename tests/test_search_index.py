@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from sec_api_automation.search_index import SearchDocument, SearchIndex
+
+
+ACCESSION = "0001193125-24-000001"
+
+
+def _document(tmp_path: Path, ticker: str, text: str, accession: str = ACCESSION) -> SearchDocument:
+    text_path = tmp_path / f"{ticker}_{accession}.txt"
+    text_path.write_text(text, encoding="utf-8")
+    return SearchDocument(
+        ticker=ticker,
+        kind="10K",
+        form="10-K",
+        accession=accession,
+        filing_date="2024-02-15",
+        source_url=f"https://www.sec.gov/Archives/edgar/data/1/{accession.replace('-', '')}/k.htm",
+        text_path=text_path,
+    )
+
+
+def test_co_registrant_filing_is_found_under_every_ticker(tmp_path: Path) -> None:
+    index = SearchIndex(tmp_path / "search.sqlite3")
+    index.add_documents([_document(tmp_path, "PCG", "utility wildfire mitigation plan")])
+    index.add_documents([_document(tmp_path, "PCG-PA", "utility wildfire mitigation plan")])
+
+    assert index.count() == 2
+    for ticker in ("PCG", "PCG-PA"):
+        hits = index.search("wildfire", tickers=[ticker])
+        assert [(hit.ticker, hit.accession) for hit in hits] == [(ticker, ACCESSION)]
+        assert "[wildfire]" in hits[0].snippet
+
+    # Re-indexing one ticker's copy replaces only that ticker's passages.
+    index.add_documents([_document(tmp_path, "PCG", "revised hedging policy")])
+    assert [hit.ticker for hit in index.search("wildfire")] == ["PCG-PA"]
+    assert [hit.ticker for hit in index.search("hedging")] == ["PCG"]
+
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+import io
+
+from sec_api_automation.text_extraction import iter_text_lines, iter_text_lines_bs4
+
+
+# An older EDGAR filing saved as cp1252 with no charset declaration.
+CP1252_FILING = (
+    "<html><body><p>The Company’s “net sales” rose 8%</p>"
+    "<p>Café and résumé costs — see Note 4</p></body></html>"
+).encode("cp1252")
+
+
+def test_undeclared_cp1252_filing_matches_bs4() -> None:
+    expected = ["The Company’s “net sales” rose 8%", "Café and résumé costs — see Note 4"]
+    assert list(iter_text_lines(io.BytesIO(CP1252_FILING))) == expected
+    assert list(iter_text_lines_bs4(io.BytesIO(CP1252_FILING))) == expected
+
+
+def test_cp1252_bytes_after_an_ascii_head_are_not_replaced() -> None:
+    filing = b"<p>" + b"x" * 200 + b"</p>" + "<p>“Quoted”</p>".encode("cp1252")
+    assert list(iter_text_lines(io.BytesIO(filing), chunk_size=64)) == ["x" * 200, "“Quoted”"]
+
+
+def test_utf8_filing_is_unchanged() -> None:
+    filing = "<p>The Company’s café</p>".encode("utf-8")
+    assert list(iter_text_lines(io.BytesIO(filing), chunk_size=20)) == ["The Company’s café"]
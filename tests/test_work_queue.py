@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+from sec_api_automation.work_queue import WorkQueue
+
+
+def test_only_the_current_lease_holder_completes_a_ticker(tmp_path: Path) -> None:
+    work_queue = WorkQueue(tmp_path / "queue.sqlite3", lease_seconds=0.05)
+    work_queue.enqueue([("AAPL", "Apple Inc."), ("MSFT", "Microsoft Corp")])
+    assert [task.ticker for task in work_queue.claim("slow", 1)] == ["AAPL"]
+
+    time.sleep(0.1)
+    assert not work_queue.complete("slow", "AAPL")
+    work_queue.lease_seconds = 60.0
+    assert [task.ticker for task in work_queue.claim("fast", 1)] == ["AAPL"]
+    assert not work_queue.complete("slow", "AAPL")
+    assert work_queue.complete("fast", "AAPL")
+    assert not work_queue.complete("fast", "AAPL")
+    assert work_queue.counts() == {"done": 1, "pending": 1}